@@ -0,0 +1,77 @@
+"""
+Measures size and speed of the binary message codec against pickle.
+
+Messages are the ones exchanged between app processes through the PubSub broker,
+see PUBSUB_BROKER_PATH.
+
+Usage: python -m benchmarks.pubsub_codec [--messages M]
+"""
+import argparse
+import pickle
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable
+
+from messages.codec import message_codec
+from messages.heartbeat import HeartbeatMessage
+from messages.rcon import RconCommand, RconResponse
+from messages.server_status import RconConnected, ServerQueried
+from models.server import Server
+from query.info import ServerInfo
+
+
+def _messages(count: int) -> list[Any]:
+    """Returns a mix of status, console and heartbeat messages."""
+    uids = [uuid.uuid4() for _ in range(10)]
+    kinds = [
+        lambda i: RconConnected(uids[i % 10]),
+        lambda i: ServerQueried(uids[i % 10], ServerInfo("server", i % 20, 20, "de_dust2", "1.0")),
+        lambda i: RconCommand("admin", f"say {i}"),
+        lambda i: RconResponse("admin", Server.Type.MINECRAFT_SERVER, "list", "players: " * 8),
+        lambda i: HeartbeatMessage(datetime.now()),
+    ]
+    return [kinds[i % len(kinds)](i) for i in range(count)]
+
+
+def _measure(
+        messages: list[Any],
+        encode: Callable[[Any], bytes],
+        decode: Callable[[bytes], Any],
+) -> tuple[float, float, int]:
+    """Returns seconds spent encoding, seconds spent decoding and total encoded bytes."""
+    started = time.perf_counter()
+    encoded = [encode(message) for message in messages]
+    encoded_at = time.perf_counter()
+    for data in encoded:
+        decode(data)
+    return encoded_at - started, time.perf_counter() - encoded_at, sum(map(len, encoded))
+
+
+def run(count: int):
+    """Runs the benchmark and prints results."""
+    messages = _messages(count)
+    codec = message_codec()
+    print(f"{count} messages")
+    for name, encode, decode in (
+        ("codec", codec.encode, codec.decode),
+        ("pickle", lambda m: pickle.dumps(m, pickle.HIGHEST_PROTOCOL), pickle.loads),
+    ):
+        encoding, decoding, size = _measure(messages, encode, decode)
+        print(
+            f"{name:>8}: {size / count:6.1f} B/message, "
+            f"encode {encoding / count * 1e6:6.2f} us, "
+            f"decode {decoding / count * 1e6:6.2f} us"
+        )
+
+
+def main():
+    """Benchmark entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=100000)
+    args = parser.parse_args()
+    run(args.messages)
+
+
+if __name__ == "__main__":
+    main()
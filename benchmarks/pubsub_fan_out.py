@@ -0,0 +1,64 @@
+"""
+Measures publishing to a topic with many filtered subscribers.
+
+Each subscriber receives status messages of a single server, like the server
+detail page does. Compares subscriptions filtered by FieldEquals, whose filters are
+all evaluated for each message, with subscriptions indexed by AttributeEquals.
+
+Usage: python -m benchmarks.pubsub_fan_out [--subscribers N] [--messages M]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from messages.server_status import server_status_topic, RconConnected
+from pubsub.filter import AttributeEquals, FieldEquals, PubSubFilter
+from pubsub.inprocess import InProcessPubSub
+
+
+def _publish_all(subscribers: int, messages: int, msg_filter: type[PubSubFilter]) -> float:
+    """Returns seconds spent publishing messages to servers of the subscribers."""
+    pubsub = InProcessPubSub()
+    uids = [uuid.uuid4() for _ in range(subscribers)]
+    if msg_filter is AttributeEquals:
+        filters = [AttributeEquals("server_uid", uid) for uid in uids]
+    else:
+        filters = [FieldEquals(lambda msg: msg.server_uid, uid) for uid in uids]
+    subscriptions = [pubsub.subscribe(server_status_topic, f) for f in filters]
+
+    status = [RconConnected(uids[i % subscribers]) for i in range(messages)]
+    started = time.perf_counter()
+    for message in status:
+        pubsub.publish(server_status_topic, message)
+    elapsed = time.perf_counter() - started
+
+    for subscription in subscriptions:
+        subscription.__exit__(None, None, None)
+    return elapsed
+
+
+async def run(subscribers: int, messages: int):
+    """Runs the benchmark and prints results."""
+    print(f"{subscribers} subscribers, {messages} messages")
+    for msg_filter in (FieldEquals, AttributeEquals):
+        elapsed = _publish_all(subscribers, messages, msg_filter)
+        print(
+            f"{msg_filter.__name__:>16}: {elapsed * 1000:8.1f} ms, "
+            f"{elapsed / messages * 1e6:8.2f} us/publish, "
+            f"{messages / elapsed:10.0f} messages/s"
+        )
+
+
+def main():
+    """Benchmark entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=1000)
+    args = parser.parse_args()
+    # Subscriptions create channels bound to the running event loop
+    asyncio.run(run(args.subscribers, args.messages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Measures publishing to topics with many pattern subscriptions.
+
+Each subscriber receives messages of all topics of a single server
+(`server/{uid}/*`), a few subscribers receive messages of all servers like an
+auditing consumer would (`server/**`). Compares the topic trie of InProcessPubSub
+with matching the topic against each pattern.
+
+Usage: python -m benchmarks.pubsub_patterns [--patterns N] [--messages M]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from pubsub.inprocess import InProcessPubSub
+from pubsub.topic import TopicDescriptor
+from pubsub.trie import TopicTrie
+
+
+def _patterns(count: int) -> tuple[list[uuid.UUID], list[str]]:
+    """Returns server UUIDs and patterns of per-server and all-server subscribers."""
+    uids = [uuid.uuid4() for _ in range(count)]
+    return uids, [f"server/{uid}/*" for uid in uids] + ["server/**", "*/*/status"]
+
+
+def _publish_all(uids: list[uuid.UUID], patterns: list[str], messages: int) -> float:
+    """Returns seconds spent publishing messages through pattern subscriptions."""
+    pubsub = InProcessPubSub()
+    subscriptions = [pubsub.subscribe(TopicDescriptor[int](pattern)) for pattern in patterns]
+    topics = [TopicDescriptor[int](f"server/{uids[i % len(uids)]}/status") for i in range(messages)]
+
+    started = time.perf_counter()
+    for i, topic in enumerate(topics):
+        pubsub.publish(topic, i)
+    elapsed = time.perf_counter() - started
+
+    for subscription in subscriptions:
+        subscription.__exit__(None, None, None)
+    return elapsed
+
+
+def _match_each(uids: list[uuid.UUID], patterns: list[str], messages: int) -> float:
+    """Returns seconds spent matching topics against each pattern on its own."""
+    matchers = []
+    for pattern in patterns:
+        matcher = TopicTrie[str]()
+        matcher.add(pattern, pattern)
+        matchers.append(matcher)
+    topics = [f"server/{uids[i % len(uids)]}/status" for i in range(messages)]
+
+    started = time.perf_counter()
+    for topic in topics:
+        for matcher in matchers:
+            matcher.match(topic)
+    return time.perf_counter() - started
+
+
+async def run(patterns: int, messages: int):
+    """Runs the benchmark and prints results."""
+    uids, subscribed = _patterns(patterns)
+    print(f"{len(subscribed)} patterns, {messages} messages")
+    for name, measure in (("each pattern", _match_each), ("trie", _publish_all)):
+        elapsed = measure(uids, subscribed, messages)
+        print(
+            f"{name:>12}: {elapsed * 1000:8.1f} ms, "
+            f"{elapsed / messages * 1e6:8.2f} us/publish, "
+            f"{messages / elapsed:10.0f} messages/s"
+        )
+
+
+def main():
+    """Benchmark entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--patterns", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=200)
+    args = parser.parse_args()
+    # Subscriptions create channels bound to the running event loop
+    asyncio.run(run(args.patterns, args.messages))
+
+
+if __name__ == "__main__":
+    main()
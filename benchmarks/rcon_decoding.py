@@ -0,0 +1,81 @@
+"""
+Compares RCON packet decoding over StreamReader and RconBufferedProtocol.
+
+Simulates long responses made of 4096 byte fragments sent over a local TCP socket.
+
+Usage: python -m benchmarks.rcon_decoding [--packets N] [--payload-size B] [--repeat R]
+"""
+import argparse
+import asyncio
+import time
+
+from rcon.protocol import RconBufferedProtocol
+from rcon.rcon_client import StreamRconConnection, BufferedRconConnection, RconConnection
+from utils.testing import response_packet
+
+
+async def _serve(data: bytes) -> asyncio.Server:
+    async def handle(_: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.write(data)
+        await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def _open_stream(port: int) -> RconConnection:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    return StreamRconConnection(reader, writer, "utf-8")
+
+
+async def _open_buffered(port: int) -> RconConnection:
+    _, protocol = await asyncio.get_running_loop().create_connection(
+        RconBufferedProtocol, "127.0.0.1", port
+    )
+    return BufferedRconConnection(protocol, "utf-8")
+
+
+async def _read_all(conn: RconConnection, packets: int) -> float:
+    start = time.perf_counter()
+    for _ in range(packets):
+        await conn.read()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+async def run(packets: int, payload_size: int, repeat: int):
+    """Runs the benchmark and prints results."""
+    payload = b"x" * payload_size
+    data = b"".join(response_packet(i, 0, payload) for i in range(packets))
+    server = await _serve(data)
+    port = server.sockets[0].getsockname()[1]
+
+    print(f"{packets} packets, {payload_size} B payload, {len(data) / 2**20:.1f} MiB total")
+    for name, opener in (("stream", _open_stream), ("buffered", _open_buffered)):
+        timings = []
+        for _ in range(repeat):
+            timings.append(await _read_all(await opener(port), packets))
+        best = min(timings)
+        print(
+            f"{name:>10}: {best * 1000:8.1f} ms, "
+            f"{packets / best:10.0f} packets/s, "
+            f"{len(data) / 2**20 / best:8.1f} MiB/s"
+        )
+
+    server.close()
+    await server.wait_closed()
+
+
+def main():
+    """Benchmark entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packets", type=int, default=50000)
+    parser.add_argument("--payload-size", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.packets, args.payload_size, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Replays captured RCON traffic through packet decoding, response assembly and formatting.
+
+Captures are recorded by RCON services when RCON_CONFIGURATION__CAPTURE_DIR is set.
+Received frames are decoded by next_packet, assembled into responses by
+RconClient.read and responses of Minecraft servers are formatted by
+minecraft_colored_str_to_html, as the app does before sending them to browsers.
+
+Usage: python -m benchmarks.rcon_replay CAPTURE [--realtime] [--repeat R]
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+from messages.rcon import RconResponse
+from models.server import Server
+from rcon.capture import capture_files, read_capture
+from rcon.replay import replay
+from utils.minecraft import minecraft_colored_str_to_html
+
+
+async def _replay_once(path: str, realtime: bool) -> tuple[float, int, int, int]:
+    """Returns seconds elapsed, records replayed, responses assembled and characters formatted."""
+    files = [read_capture(file) for file in capture_files(path)]
+    if not files:
+        raise FileNotFoundError(path)
+    server_type = files[0][0]
+    records = itertools.chain.from_iterable(file_records for _, file_records in files)
+
+    responses = 0
+    formatted = 0
+
+    def on_response(response: RconResponse):
+        nonlocal responses, formatted
+        responses += 1
+        if server_type == Server.Type.MINECRAFT_SERVER:
+            formatted += len(minecraft_colored_str_to_html(response.response))
+
+    started = time.perf_counter()
+    replayed = await replay(records, server_type, on_response, realtime)
+    return time.perf_counter() - started, replayed, responses, formatted
+
+
+async def run(path: str, realtime: bool, repeat: int):
+    """Runs the benchmark and prints results."""
+    timings = [await _replay_once(path, realtime) for _ in range(repeat)]
+    elapsed, replayed, responses, formatted = min(timings)
+    mode = "recorded speed" if realtime else "maximum speed"
+    print(f"{path}: {replayed} records, {responses} responses, {mode}")
+    print(
+        f"{elapsed * 1000:8.1f} ms, "
+        f"{replayed / elapsed:10.0f} records/s, "
+        f"{responses / elapsed:10.0f} responses/s, "
+        f"{formatted / 2**20 / elapsed:8.1f} MiB/s formatted"
+    )
+
+
+def main():
+    """Benchmark entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("capture", help="Capture file, rotated files are replayed before it")
+    parser.add_argument("--realtime", action="store_true", help="Keep captured timing")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.capture, args.realtime, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
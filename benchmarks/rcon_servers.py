@@ -0,0 +1,193 @@
+"""
+Measures RCON throughput and event loop latency with many servers.
+
+Fake RCON servers run in a separate process. RCON services run on the benchmark
+event loop, or in worker processes with --workers. Event loop latency is how late
+a periodic timer of the benchmark event loop fires, which is what HTTP and
+websocket handlers of the app would wait.
+
+Usage: python -m benchmarks.rcon_servers [--servers N] [--commands C] [--workers W]
+       [--response-size B] [--port P]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Optional
+from asyncio.subprocess import Process
+
+from configuration import RconConfiguration
+from messages.rcon import RconCommand, rcon_command_topic, rcon_response_topic
+from messages.server_status import server_status_topic, RconConnected
+from models.server import Server
+from pubsub.inprocess import InProcessPubSub
+from rcon.connect_scheduler import ConnectScheduler
+from rcon.rcon_service import RconService
+from rcon.workers import RconWorkerPool
+from services.service import Service
+
+
+async def _start_fake_servers(args: argparse.Namespace) -> Process:
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "utils.fake_rcon_server",
+        "--servers", str(args.servers),
+        "--port", str(args.port),
+        "--response-size", str(args.response_size),
+    )
+    # Wait until the last server listens
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", args.port + args.servers - 1)
+            writer.close()
+            return process
+        except OSError:
+            await asyncio.sleep(0.1)
+
+
+async def _measure_lag(lags: list[float], interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - started - interval)
+
+
+async def _wait_for(predicate, timeout: float):
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+# pylint: disable-next=too-many-locals
+async def run(args: argparse.Namespace):
+    """Runs the benchmark and prints results."""
+    fake_servers = await _start_fake_servers(args)
+    pubsub = InProcessPubSub()
+    configuration = RconConfiguration(
+        workers=args.workers,
+        keepalive_interval=0,
+        rate_limit=1_000_000,
+        rate_limit_burst=1_000_000,
+        max_queued_commands=1_000_000,
+        connect_concurrency=64,
+    )
+    servers = [
+        Server(
+            type=Server.Type.MINECRAFT_SERVER,
+            name=f"fake-{i}",
+            host="127.0.0.1",
+            port=args.port + i,
+            rcon_port=args.port + i,
+            rcon_password="test",
+        )
+        for i in range(args.servers)
+    ]
+
+    pool = RconWorkerPool(
+        pubsub,
+        configuration,
+        args.workers,
+        "WARNING",
+    ) if args.workers else None
+    if pool:
+        await pool.start()
+    services = _services(pubsub, configuration, servers, pool)
+
+    responses = 0
+
+    def count(_):
+        nonlocal responses
+        responses += 1
+
+    connected = 0
+
+    def count_connected(msg):
+        nonlocal connected
+        if isinstance(msg, RconConnected):
+            connected += 1
+
+    subscriptions = [
+        pubsub.subscribe(rcon_response_topic(server.uid), capacity=0) for server in servers
+    ]
+    status_subscription = pubsub.subscribe(server_status_topic, capacity=0)
+    tasks = [asyncio.create_task(service.launch()) for service in services]
+    counters = [asyncio.create_task(_consume(sub, count)) for sub in subscriptions]
+    counters.append(asyncio.create_task(_consume(status_subscription, count_connected)))
+    await _wait_for(lambda: connected == len(servers), 60)
+
+    lags: list[float] = []
+    lag_task = asyncio.create_task(_measure_lag(lags))
+    responses = 0
+    total = args.servers * args.commands
+    started = time.perf_counter()
+    for i in range(args.commands):
+        for server in servers:
+            pubsub.publish(rcon_command_topic(server.uid), RconCommand("bench", f"cmd {i}"))
+        await asyncio.sleep(0)
+    await _wait_for(lambda: responses == total, 300)
+    elapsed = time.perf_counter() - started
+    lag_task.cancel()
+    lags = lags or [0.0]
+
+    mode = f"{args.workers} workers" if args.workers else "main event loop"
+    print(
+        f"{args.servers} servers, {total} commands, {args.response_size} B responses, {mode}"
+    )
+    print(
+        f"{total / elapsed:10.0f} commands/s, "
+        f"loop lag p50 {statistics.median(lags) * 1000:6.2f} ms, "
+        f"max {max(lags) * 1000:6.2f} ms"
+    )
+
+    for task in tasks + counters:
+        task.cancel()
+    for sub in subscriptions + [status_subscription]:
+        sub.__exit__(None, None, None)
+    if pool:
+        pool.close()
+    fake_servers.terminate()
+    await fake_servers.wait()
+
+
+def _services(
+        pubsub: InProcessPubSub,
+        configuration: RconConfiguration,
+        servers: list[Server],
+        pool: Optional[RconWorkerPool],
+) -> list[Service]:
+    if pool:
+        return [pool.service(server) for server in servers]
+
+    scheduler = ConnectScheduler(configuration.connect_concurrency)
+
+    def supplier(server: Server):
+        async def supply():
+            return server
+        return supply
+
+    return [
+        RconService(pubsub, server.uid, supplier(server), configuration, scheduler)
+        for server in servers
+    ]
+
+
+async def _consume(sub, on_message):
+    async for msg in sub:
+        on_message(msg)
+
+
+def main():
+    """Benchmark entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--servers", type=int, default=200)
+    parser.add_argument("--commands", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--response-size", type=int, default=2048)
+    parser.add_argument("--port", type=int, default=26000)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
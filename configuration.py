@@ -1,11 +1,13 @@
 """This module contains app configuration models."""
 from enum import Enum
-from typing import Literal, Union
+from typing import Literal, Optional, Union
 
-from pydantic import Field
+from pydantic import Field, field_validator
 from pydantic.dataclasses import dataclass
 from pydantic_settings import BaseSettings
 
+from rcon.types import RconTransport
+
 
 # str Enum workaround - https://github.com/pydantic/pydantic/issues/3850#issuecomment-1069353196
 class DatabaseProvider(str, Enum):
@@ -20,6 +22,112 @@ class SqliteDbConfiguration:
     db_provider: Literal[DatabaseProvider.SQLITE] = DatabaseProvider.SQLITE
 
 
+@dataclass
+# pylint: disable-next=too-many-instance-attributes
+class RconConfiguration:
+    """Configuration of RCON connections."""
+    transport: RconTransport = RconTransport.STREAM
+    max_command_batch: int = 32
+    pool_size: int = 1
+    stream_responses: bool = False
+    # Seconds to wait for response of a command executed on behalf of a caller
+    command_timeout: float = 10
+    # Commands without side effects - identical ones in flight are sent only once
+    read_only_commands: list[str] = Field(default_factory=lambda: ["list", "status", "tps"])
+    # Seconds responses to read-only commands are cached for
+    read_only_cache_ttl: float = 1
+    # Maximal number of servers a fanned out command is in flight on
+    fan_out_concurrency: int = 32
+    # Seconds to wait for each server to respond to a fanned out command
+    fan_out_timeout: float = 10
+    # Commands per second sent to a server and the number of commands sent at once
+    rate_limit: float = 20
+    rate_limit_burst: int = 40
+    # Commands per second of a single user, 0 for no per-user limit
+    user_rate_limit: float = 0
+    user_rate_limit_burst: int = 10
+    # Maximal number of commands of a single user waiting for the rate limit
+    max_queued_commands: int = 100
+    # Weights of users sharing a server, 1 for users not listed
+    user_weights: dict[str, float] = Field(default_factory=dict)
+    # Send commands of server managers before commands of other users
+    priority_lane: bool = False
+    # Seconds between keepalive probes, 0 disables the probes
+    keepalive_interval: float = 15
+    # Seconds to wait for a probe to be answered before the connection is closed
+    keepalive_timeout: float = 5
+    # Maximal number of connects and logins in progress across all servers
+    connect_concurrency: int = 8
+    # Minimal and maximal seconds between connection attempts to a server
+    connect_backoff: float = 1
+    connect_max_backoff: float = 240
+    # Reconnects per second allowed across all servers and reconnects allowed at once
+    connect_retry_rate: float = 2
+    connect_retry_burst: int = 20
+    # Seconds resolved addresses of RCON hosts are cached for
+    dns_ttl: float = 300
+    # Seconds failed resolutions of RCON hosts are cached for
+    dns_negative_ttl: float = 10
+    # Seconds to wait for a connect to an address before the next address is tried
+    happy_eyeballs_delay: float = 0.25
+    # Seconds between logs of resolution and connect latency of RCON hosts, 0 to log none
+    connector_log_interval: float = 300
+    # Keep a second authenticated connection to fail over to (when pool_size is 1)
+    warm_standby: bool = False
+    # Connect only when the server is used and disconnect after idle_timeout seconds unused
+    lazy_connect: bool = False
+    idle_timeout: float = 300
+    # Number of worker processes RCON connections run in, 0 to run them in the main process
+    workers: int = 0
+    # Keep wire-level statistics of RCON connections and publish them every stats_interval seconds
+    wire_stats: bool = False
+    stats_interval: float = 10
+    # Directory raw RCON traffic of each server is captured to after login, None to capture none
+    capture_dir: Optional[str] = None
+    # Size in bytes at which a capture file is rotated and number of capture files kept per server
+    capture_max_file_size: int = 16 * 2 ** 20
+    capture_max_files: int = 4
+
+    @field_validator("read_only_commands", mode="before")
+    @classmethod
+    def _split_commands(cls, value):
+        """Commands can be set from an environmental variable as comma separated list."""
+        if isinstance(value, str):
+            return [command.strip() for command in value.split(",") if command.strip()]
+        return value
+
+    @field_validator("user_weights", mode="before")
+    @classmethod
+    def _split_weights(cls, value):
+        """Weights can be set from an environmental variable as comma separated user=weight."""
+        if not isinstance(value, str):
+            return value
+        weights = {}
+        for pair in value.split(","):
+            if not pair.strip():
+                continue
+            user, separator, weight = pair.strip().partition("=")
+            if not separator or not user.strip():
+                raise ValueError(f"User weight '{pair.strip()}' is not in user=weight format")
+            try:
+                weights[user.strip()] = float(weight)
+            except ValueError as e:
+                raise ValueError(f"Weight in user weight '{pair.strip()}' is not a number") from e
+        return weights
+
+
+@dataclass
+class QueryConfiguration:
+    """Configuration of server status queries sent to game ports."""
+    enabled: bool = True
+    # Seconds between queries of each server
+    interval: float = 30
+    # Seconds to wait for a server to respond
+    timeout: float = 2
+    # Maximal number of servers queried at the same time
+    concurrency: int = 64
+
+
 class Configuration(BaseSettings):
     """Application configuration model."""
     db_configuration: Union[SqliteDbConfiguration] = Field(
@@ -31,6 +139,10 @@ class Configuration(BaseSettings):
     default_user_name: str = "admin"
     default_user_password: str = "admin"
     log_level: str = "INFO"
+    # Unix socket app processes exchange PubSub messages over, None for a single process
+    pubsub_broker_path: Optional[str] = None
+    rcon_configuration: RconConfiguration = RconConfiguration()
+    query_configuration: QueryConfiguration = QueryConfiguration()
 
     class Config:
         """Configuration settings"""
@@ -109,7 +109,12 @@ def rcon_converter_factory(
     def create(
             server_id: uuid.UUID,
     ):
-        return RconWSConverter(server_id, user.username, templates.get_template)
+        return RconWSConverter(
+            server_id,
+            user.username,
+            templates.get_template,
+            UserCapability.SERVER_MANAGEMENT in user.capabilities,
+        )
     return create
 
 
@@ -1,8 +1,8 @@
 """Main module for PyConCraft app."""
 import logging
-import uuid
 from contextlib import asynccontextmanager
 from datetime import timedelta
+from typing import Optional
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
@@ -12,14 +12,23 @@ from auth.jwt import JwtTokenUtils
 from configuration import Configuration
 from dao.dao import ServerDao, UserDao
 from dependencies import dao_factory, ioc, migrator_factory
+from messages.codec import message_codec
 from messages.heartbeat import HeartbeatConverter
 from messages.notifications import NotificationConverter
 from models.user import UserCapability
+from pubsub.broker import BrokerPubSub
 from pubsub.inprocess import InProcessPubSub
 from pubsub.pubsub import PubSub
-from rcon.rcon_service import RconService
+from query.client import QueryClient
+from rcon.connect_scheduler import ConnectScheduler
+from rcon.connector import Connector
+from rcon.remote import RconCallClient, RconCallServer, RconExecutors
+from rcon.service_factory import RconServiceFactory
+from rcon.workers import RconWorkerPool
 from routes import auth, index, servers, users
 from services.heartbeat import HeartbeatPublisherService
+from services.rcon_servers import RconServersService
+from services.server_query import ServerQueryService
 from services.server_status import ServerStatusService
 from services.service import ServiceLauncher
 from templating import TemplateProvider
@@ -34,7 +43,13 @@ logging.basicConfig(level=configuration.log_level)
 service_launcher = ServiceLauncher(ioc)
 ioc.register(service_launcher, ServiceLauncher)
 
-pubsub: PubSub = InProcessPubSub()
+# Processes serving the same port exchange messages through a broker
+broker_pubsub: Optional[BrokerPubSub] = BrokerPubSub(
+    configuration.pubsub_broker_path,
+    message_codec(),
+) if configuration.pubsub_broker_path else None
+
+pubsub: PubSub = broker_pubsub or InProcessPubSub()
 ioc.register(pubsub, PubSub)
 
 (user_dao, server_dao) = dao_factory(configuration)
@@ -58,11 +73,71 @@ templates = TemplateProvider(
 ioc.register(templates)
 
 ioc.register(NotificationConverter(templates.get_template))
+
+# Connection attempts of all RCON services share concurrency and retry budget
+connect_scheduler = ConnectScheduler(
+    configuration.rcon_configuration.connect_concurrency,
+    configuration.rcon_configuration.connect_backoff,
+    configuration.rcon_configuration.connect_max_backoff,
+    configuration.rcon_configuration.connect_retry_rate,
+    configuration.rcon_configuration.connect_retry_burst,
+)
+ioc.register(connect_scheduler)
+
+# Resolved addresses of RCON hosts are shared by all RCON services
+connector = Connector(
+    configuration.rcon_configuration.dns_ttl,
+    configuration.rcon_configuration.dns_negative_ttl,
+    configuration.rcon_configuration.happy_eyeballs_delay,
+    log_interval=configuration.rcon_configuration.connector_log_interval,
+)
+ioc.register(connector)
+
+# RCON connections run in worker processes, their messages are bridged to pubsub
+worker_pool = RconWorkerPool(
+    pubsub,
+    configuration.rcon_configuration,
+    configuration.rcon_configuration.workers,
+    configuration.log_level,
+) if configuration.rcon_configuration.workers > 0 else None
+
+rcon_service_factory = RconServiceFactory(
+    pubsub,
+    server_dao,
+    configuration.rcon_configuration,
+    connect_scheduler,
+    connector,
+    worker_pool,
+)
+ioc.register(rcon_service_factory)
 ioc.register(HeartbeatConverter(templates.get_template))
 
 
 async def startup():
     """Startup logic."""
+    if broker_pubsub:
+        await broker_pubsub.start()
+
+    # Watches for server status changes and provides latest state
+    service_launcher.launch(
+        ServerStatusService(pubsub), ServerStatusService
+    )
+
+    if broker_pubsub and not broker_pubsub.hosts_broker:
+        # Process hosting the broker runs the services shared by all processes,
+        # RCON services are called through it
+        rcon_call_client = RconCallClient(pubsub)
+        service_launcher.launch(rcon_call_client)
+        ioc.register(
+            RconExecutors(service_launcher, configuration.rcon_configuration, rcon_call_client)
+        )
+        return
+
+    ioc.register(RconExecutors(service_launcher, configuration.rcon_configuration))
+    if broker_pubsub:
+        # Executes RCON calls of other processes
+        service_launcher.launch(RconCallServer(pubsub, service_launcher))
+
     migrate = migrator_factory(configuration)
     migrate()
 
@@ -85,32 +160,40 @@ async def startup():
         HeartbeatPublisherService(pubsub, 1)
     )
 
-    # Watches for server status changes and provides latest state
+    # Restarts RCON services of servers changed by any process
     service_launcher.launch(
-        ServerStatusService(pubsub), ServerStatusService
+        RconServersService(pubsub, server_dao, service_launcher, rcon_service_factory)
     )
 
-    all_servers = await server_dao.get_all()
-
-    def server_supplier(uid: uuid.UUID):
-        def supply():
-            return server_dao.get_by_uid(uid)
-        return supply
-
-    for server in all_servers:
-        # Launch RCON services for all persisted servers
+    if configuration.query_configuration.enabled:
+        # Polls game ports of servers for player counts, map and version
         service_launcher.launch(
-            RconService(
+            ServerQueryService(
                 pubsub,
-                server.uid,
-                server_supplier(server.uid)
+                server_dao,
+                configuration.query_configuration.interval,
+                QueryClient(
+                    configuration.query_configuration.timeout,
+                    configuration.query_configuration.concurrency,
+                ),
             )
         )
 
+    if worker_pool:
+        await worker_pool.start()
+
+    for server in await server_dao.get_all():
+        # Launch RCON services for all persisted servers
+        service_launcher.launch(rcon_service_factory.create(server))
+
 
 async def shutdown():
     """Shutdown logic."""
     service_launcher.stop()
+    if worker_pool:
+        worker_pool.close()
+    if broker_pubsub:
+        broker_pubsub.close()
 
 
 @asynccontextmanager
@@ -0,0 +1,51 @@
+"""Binary codec of the PubSub messages of the app."""
+from messages.heartbeat import HeartbeatMessage
+from messages.notifications import NotificationMessage
+from messages.rcon import RconCommand, RconResponse, RconResponseChunk
+from messages.rcon_calls import RconCall, RconCallBatchResult, RconCallResult
+from messages.rcon_stats import RconStats
+from messages.server_changes import ServerChanged
+from messages.server_status import (
+    RconConnected,
+    RconDisconnected,
+    RconFailover,
+    RconIdle,
+    ServerQueried,
+    ServerQueryFailed,
+)
+from models.server import Server
+from pubsub.codec import MessageCodec
+from query.info import ServerInfo
+from rcon.rate_limit import UserQueueStats
+from rcon.stats import Histogram, WireStats
+
+# Types are identified by their position, new types are appended at the end
+_MESSAGE_TYPES = (
+    HeartbeatMessage,
+    NotificationMessage,
+    NotificationMessage.NotificationType,
+    RconCommand,
+    RconResponse,
+    RconResponseChunk,
+    Server.Type,
+    RconStats,
+    WireStats,
+    Histogram,
+    RconConnected,
+    RconDisconnected,
+    RconIdle,
+    RconFailover,
+    ServerQueried,
+    ServerQueryFailed,
+    ServerInfo,
+    ServerChanged,
+    RconCall,
+    RconCallBatchResult,
+    RconCallResult,
+    UserQueueStats,
+)
+
+
+def message_codec() -> MessageCodec:
+    """Returns codec of all messages published by the app."""
+    return MessageCodec(_MESSAGE_TYPES)
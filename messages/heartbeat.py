@@ -6,7 +6,7 @@ from typing import Never, Callable, override
 from jinja2 import Template
 
 from messages.converter import HtmxConverter
-from pubsub.topic import TopicDescriptor
+from pubsub.topic import TopicDescriptor, OverflowPolicy
 
 
 @dataclass(eq=True, frozen=True)
@@ -15,7 +15,8 @@ class HeartbeatMessage:
     timestamp: datetime
 
 
-heartbeat_topic = TopicDescriptor[HeartbeatMessage]("heartbeat")
+# Only the latest heartbeat matters to a stalled or new subscriber
+heartbeat_topic = TopicDescriptor[HeartbeatMessage]("heartbeat", 1, OverflowPolicy.CONFLATE, ())
 
 
 class HeartbeatConverter(HtmxConverter[Never, Never, HeartbeatMessage]):
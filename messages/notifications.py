@@ -6,7 +6,7 @@ from typing import Never, Any, Optional, Literal, Callable, override
 from jinja2 import Template
 
 from messages.converter import HtmxConverter
-from pubsub.topic import TopicDescriptor
+from pubsub.topic import TopicDescriptor, OverflowPolicy
 
 
 @dataclass
@@ -26,7 +26,11 @@ class NotificationMessage:
     remove_after: Optional[int] = None
 
 
-notification_topic = TopicDescriptor[NotificationMessage]("notifications")
+notification_topic = TopicDescriptor[NotificationMessage](
+    "notifications",
+    100,
+    OverflowPolicy.DROP_OLDEST,
+)
 
 
 cls_conversions = {
@@ -8,8 +8,8 @@ from jinja2 import Template
 
 from messages.converter import HtmxConverter
 from models.server import Server
-from pubsub.topic import TopicDescriptor
-from utils.minecraft import minecraft_colored_str_to_html
+from pubsub.topic import TopicDescriptor, OverflowPolicy
+from utils.minecraft import minecraft_colored_str_to_html, MinecraftHtmlFormatter
 
 
 @dataclass(eq=True, frozen=True)
@@ -17,6 +17,8 @@ class RconCommand:
     """Rcon command message."""
     issuing_user: str
     command: str
+    # Sent before commands without priority when the priority lane is enabled
+    priority: bool = False
 
 
 def rcon_command_topic(server_uuid: uuid.UUID) -> TopicDescriptor[RconCommand]:
@@ -33,34 +35,80 @@ class RconResponse:
     response: str
 
 
-def rcon_response_topic(server_uuid: uuid.UUID) -> TopicDescriptor[RconResponse]:
+@dataclass(eq=True, frozen=True)
+class RconResponseChunk:
+    """Part of a Rcon response delivered before the whole response is received."""
+    response_id: uuid.UUID
+    # Order of the chunk in the response, starting from 0
+    index: int
+    issuing_user: str
+    server_type: Server.Type
+    command: str
+    chunk: str
+    # Last chunk of the response
+    final: bool
+
+
+RconResponseMessage = RconResponse | RconResponseChunk
+
+
+def rcon_response_topic(server_uuid: uuid.UUID) -> TopicDescriptor[RconResponseMessage]:
     """Returns a topic descriptor for a RCON responses from a given server."""
-    return TopicDescriptor[RconResponse](f"rcon_response/{server_uuid}")
+    # Responses must not be lost silently, a subscriber that cannot keep up is disconnected
+    return TopicDescriptor[RconResponseMessage](
+        f"rcon_response/{server_uuid}",
+        1000,
+        OverflowPolicy.DISCONNECT,
+    )
 
 
 _response_formatters = {
     Server.Type.MINECRAFT_SERVER: minecraft_colored_str_to_html,
 }
 
+_chunk_formatter_factories = {
+    Server.Type.MINECRAFT_SERVER: lambda: MinecraftHtmlFormatter().feed,
+}
+
 
-class RconWSConverter(HtmxConverter[dict, RconCommand, RconResponse]):
+class RconWSConverter(HtmxConverter[dict, RconCommand, RconResponseMessage]):
     """Converts RCON messages to/from WS data."""
-    def __init__(self, server: uuid.UUID, user: str, template_provider: Callable[[str], Template]):
+    def __init__(
+            self,
+            server: uuid.UUID,
+            user: str,
+            template_provider: Callable[[str], Template],
+            priority: bool = False,
+    ):
+        """
+        :param server: UUID of the server
+        :param user: User sending the commands
+        :param template_provider: Provides templates of responses
+        :param priority: Commands of the user have priority
+        """
         self._template = template_provider("rcon/response.html")
+        self._chunk_template = template_provider("rcon/response_chunk.html")
         self._server = server
         self._user = user
+        self._priority = priority
+        # Formatters of streamed responses, formatting state carries over between chunks
+        self._chunk_formatters: dict[uuid.UUID, Callable[[str], str]] = {}
 
     @override
     def convert_in(self, data: dict) -> RconCommand:
         """Converts RCON commands from UI to RconCommand messages."""
         return RconCommand(
             self._user,
-            data["command"]
+            data["command"],
+            self._priority,
         )
 
     @override
-    def convert_out(self, message: RconResponse) -> str:
+    def convert_out(self, message: RconResponseMessage) -> str:
         """Converts RCON response messages to UI elements to show."""
+        if isinstance(message, RconResponseChunk):
+            return self._convert_chunk(message)
+
         formatter = _response_formatters.get(message.server_type, lambda x: x)
         return self._template.render(
             command=message.command,
@@ -68,3 +116,21 @@ class RconWSConverter(HtmxConverter[dict, RconCommand, RconResponse]):
             user=message.issuing_user,
             timestamp=datetime.now().strftime("%H:%M:%S")
         )
+
+    def _convert_chunk(self, message: RconResponseChunk) -> str:
+        """Appends chunk of a streamed response to the response it belongs to."""
+        if message.index == 0:
+            factory = _chunk_formatter_factories.get(message.server_type, lambda: lambda x: x)
+            self._chunk_formatters[message.response_id] = factory()
+        formatter = self._chunk_formatters.get(message.response_id, lambda x: x)
+        if message.final:
+            self._chunk_formatters.pop(message.response_id, None)
+
+        return self._chunk_template.render(
+            response_id=message.response_id,
+            first=message.index == 0,
+            command=message.command,
+            response=formatter(message.chunk),
+            user=message.issuing_user,
+            timestamp=datetime.now().strftime("%H:%M:%S")
+        )
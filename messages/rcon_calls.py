@@ -0,0 +1,48 @@
+"""Messages of RCON operations called by processes not running RCON services."""
+import uuid
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from messages.rcon import RconResponse
+from pubsub.topic import TopicDescriptor
+
+
+@dataclass(eq=True, frozen=True)
+class RconCall:
+    """Message asking the process running RCON services to execute an operation of RconExecutor."""
+    request_id: uuid.UUID
+    server_uid: uuid.UUID
+    # execute, execute_batch, wire_stats, command_queues or wake
+    operation: str
+    args: list
+    # Topic the result is published to, None when the caller does not wait for it
+    reply_topic: Optional[str]
+
+
+@dataclass(eq=True, frozen=True)
+class RconCallBatchResult:
+    """Outcome of a command of a called batch, see CommandResult."""
+    command: str
+    response: Optional[RconResponse]
+    # Message of the error the command failed with
+    error: Optional[str]
+    elapsed: float
+
+
+@dataclass(eq=True, frozen=True)
+class RconCallResult:
+    """Message carrying the result of an RconCall."""
+    request_id: uuid.UUID
+    result: Any
+    # Name of the error type the operation failed with and its message
+    error_type: Optional[str]
+    error: Optional[str]
+
+
+# Calls must reach the process running RCON services, none can be dropped
+rcon_call_topic = TopicDescriptor[RconCall]("rcon_call")
+
+
+def rcon_call_result_topic(process_uid: uuid.UUID) -> TopicDescriptor[RconCallResult]:
+    """Returns topic results of calls of a process are published to."""
+    return TopicDescriptor[RconCallResult](f"rcon_call_result/{process_uid}")
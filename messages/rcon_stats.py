@@ -0,0 +1,16 @@
+"""RCON statistics messages."""
+import uuid
+from dataclasses import dataclass
+
+from pubsub.topic import TopicDescriptor, OverflowPolicy
+from rcon.stats import WireStats
+
+
+@dataclass(eq=True, frozen=True)
+class RconStats:
+    """Message carrying wire-level statistics of RCON connections to a server."""
+    server_uid: uuid.UUID
+    stats: WireStats
+
+
+rcon_stats_topic = TopicDescriptor[RconStats]("rcon_stats", 100, OverflowPolicy.DROP_OLDEST)
@@ -0,0 +1,15 @@
+"""Server configuration change messages."""
+import uuid
+from dataclasses import dataclass
+
+from pubsub.topic import TopicDescriptor
+
+
+@dataclass(eq=True, frozen=True)
+class ServerChanged:
+    """Message signalling the server was created, updated or deleted."""
+    server_uid: uuid.UUID
+
+
+# Changes must reach the process running RCON services, none can be dropped
+server_changed_topic = TopicDescriptor[ServerChanged]("server_changed")
@@ -1,29 +1,88 @@
 """ServerStatus messages."""
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import Enum
 from typing import Never, Optional, Callable, override
 
 from jinja2 import Template
 
 from messages.converter import HtmxConverter
-from pubsub.topic import TopicDescriptor
+from query.info import ServerInfo
+from pubsub.topic import TopicDescriptor, OverflowPolicy
+
+
+class StatusSource(Enum):
+    """Source of a server state, the latest state of each source is retained."""
+    RCON = "RCON"
+    QUERY = "QUERY"
 
 
 @dataclass(eq=True, frozen=True)
 class RconConnected:
     """Message signalling RCON connection was established."""
     server_uid: uuid.UUID
+    # Retained as the latest RCON connection state of the server
+    source: StatusSource = field(default=StatusSource.RCON, init=False)
 
 
 @dataclass(eq=True, frozen=True)
 class RconDisconnected:
     """Message signalling RCON connection to the server ended."""
     server_uid: uuid.UUID
+    # Retained as the latest RCON connection state of the server
+    source: StatusSource = field(default=StatusSource.RCON, init=False)
+
+
+@dataclass(eq=True, frozen=True)
+class RconIdle:
+    """Message signalling RCON is not connected because the server is not being used."""
+    server_uid: uuid.UUID
+    # Retained as the latest RCON connection state of the server
+    source: StatusSource = field(default=StatusSource.RCON, init=False)
+
+
+@dataclass(eq=True, frozen=True)
+class RconFailover:
+    """Message signalling failed RCON connection was replaced by the standby connection."""
+    server_uid: uuid.UUID
+    # Seconds between the connection failing and the standby connection taking over
+    latency: float
+
+
+@dataclass(eq=True, frozen=True)
+class ServerQueried:
+    """Message carrying information the server reported on its game port."""
+    server_uid: uuid.UUID
+    info: ServerInfo
+    # Retained as the latest query state of the server
+    source: StatusSource = field(default=StatusSource.QUERY, init=False)
 
 
-ServerStatusMessage = RconConnected | RconDisconnected
+@dataclass(eq=True, frozen=True)
+class ServerQueryFailed:
+    """Message signalling the server did not respond to a query on its game port."""
+    server_uid: uuid.UUID
+    # Retained as the latest query state of the server
+    source: StatusSource = field(default=StatusSource.QUERY, init=False)
+
+
+ServerStatusMessage = (
+    RconConnected
+    | RconDisconnected
+    | RconIdle
+    | RconFailover
+    | ServerQueried
+    | ServerQueryFailed
+)
 
-server_status_topic = TopicDescriptor[ServerStatusMessage]("server_status")
+# New subscribers receive the latest RCON connection and query states of each server,
+# failovers are events and are not retained
+server_status_topic = TopicDescriptor[ServerStatusMessage](
+    "server_status",
+    1000,
+    OverflowPolicy.DROP_OLDEST,
+    ("server_uid", "source"),
+)
 
 
 class ServerStatusUpdateConverter(HtmxConverter[Never, Never, ServerStatusMessage]):
@@ -42,6 +101,8 @@ class ServerStatusUpdateConverter(HtmxConverter[Never, Never, ServerStatusMessag
         """
         template = "servers/detail_update.html" if server_uid else "servers/list_update.html"
         self._template = template_provider(template)
+        self._query_template = template_provider("servers/query_update.html")
+        self._failover_template = template_provider("servers/failover_update.html")
 
     @override
     def convert_in(self, data: Never) -> Never:
@@ -61,3 +122,24 @@ class ServerStatusUpdateConverter(HtmxConverter[Never, Never, ServerStatusMessag
                     server_uid=message.server_uid,
                     rcon_connected=False,
                 )
+            case RconIdle():
+                return self._template.render(
+                    server_uid=message.server_uid,
+                    rcon_connected=False,
+                    rcon_idle=True,
+                )
+            case RconFailover():
+                return self._failover_template.render(
+                    server_uid=message.server_uid,
+                    latency_ms=message.latency * 1000,
+                )
+            case ServerQueried():
+                return self._query_template.render(
+                    server_uid=message.server_uid,
+                    info=message.info,
+                )
+            case ServerQueryFailed():
+                return self._query_template.render(
+                    server_uid=message.server_uid,
+                    info=None,
+                )
@@ -0,0 +1,42 @@
+"""RCON batch and fan-out execution models."""
+import uuid
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class RconBatchRequest(BaseModel):
+    """Ordered list of commands to execute."""
+    commands: list[str] = Field(min_length=1, max_length=1000)
+
+
+class RconBatchCommandResult(BaseModel):
+    """Result of a single command of the batch."""
+    command: str
+    response: Optional[str] = None
+    error: Optional[str] = None
+    # Milliseconds from sending the batch to receiving the response
+    elapsed_ms: float
+
+
+class RconBatchResponse(BaseModel):
+    """Results of the batch in order of the commands."""
+    results: list[RconBatchCommandResult]
+    elapsed_ms: float
+
+
+class RconFanOutRequest(BaseModel):
+    """Command to execute on many servers."""
+    command: str = Field(min_length=1)
+    # Servers to execute the command on, all servers of the user when not set
+    servers: Optional[list[uuid.UUID]] = None
+
+
+class RconFanOutResult(BaseModel):
+    """Result of the command on a single server."""
+    server_uid: uuid.UUID
+    server_name: str
+    response: Optional[str] = None
+    error: Optional[str] = None
+    # Milliseconds from dispatching the command to the server to its response
+    elapsed_ms: float
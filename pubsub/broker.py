@@ -0,0 +1,388 @@
+"""PubSub messaging between app processes through a local broker."""
+import asyncio
+import fcntl
+import logging
+import os
+import struct
+import uuid
+from typing import Any, Callable, Optional, TextIO, override
+
+from pubsub.codec import CodecError, MessageCodec
+from pubsub.filter import PubSubFilter
+from pubsub.inprocess import InProcessPubSub
+from pubsub.pubsub import Subscription
+from pubsub.topic import TopicDescriptor, OverflowPolicy
+from pubsub.trie import TopicTrie, is_pattern, topic_matches
+
+logger = logging.getLogger(__name__)
+
+# Frames exchanged between processes and the broker, first item is the operation.
+# Process to broker: subscribe, unsubscribe, publish, clear.
+# Broker to process: message, interest, clear.
+Frame = tuple[Any, ...]
+
+_FRAME_HEADER = struct.Struct("!I")
+
+# Frames carry names, flags and encoded messages only
+_frame_codec = MessageCodec(())
+
+
+def _write_frame(writer: asyncio.StreamWriter, frame: Frame):
+    payload = _frame_codec.encode(frame)
+    writer.write(_FRAME_HEADER.pack(len(payload)) + payload)
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Frame:
+    header = await reader.readexactly(_FRAME_HEADER.size)
+    (length,) = _FRAME_HEADER.unpack(header)
+    return _frame_codec.decode(await reader.readexactly(length))
+
+
+class PubSubBroker:
+    """
+    Forwards messages between processes connected over a Unix-domain socket.
+
+    Messages are forwarded encoded, to the connections subscribed to their topic
+    except the publishing one. Each connection is told whether other connections
+    subscribe to a topic or topic pattern, so messages nobody wants are not sent
+    to the broker. The latest messages of retained topics are sent to connections
+    subscribing to the topic or a matching pattern. Clearing retained messages is
+    forwarded to all connections, each process forgets its own copies.
+
+    A connection not reading the frames sent to it is dropped once more than
+    max_buffered bytes wait to be sent to it, its process connects again.
+    """
+    def __init__(self, path: str, max_buffered: int = 4 * 2 ** 20):
+        """
+        :param path: Path of the socket
+        :param max_buffered: Maximal number of bytes waiting to be sent to a connection
+        """
+        self._path = path
+        self._max_buffered = max_buffered
+        self._server: Optional[asyncio.AbstractServer] = None
+        # Connections subscribed to each topic and topic pattern
+        self._subscribers: dict[str, set[asyncio.StreamWriter]] = {}
+        # Connections subscribed to topic patterns
+        self._patterns: TopicTrie[asyncio.StreamWriter] = TopicTrie()
+        # Topics each connection was told other connections subscribe to
+        self._interest: dict[asyncio.StreamWriter, set[str]] = {}
+        # Latest encoded messages of topics by encoded values of the retain key attributes
+        self._retained: dict[str, dict[tuple[bytes, ...], bytes]] = {}
+
+    async def start(self):
+        """Starts accepting connections, replacing a socket left by a previous broker."""
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        self._server = await asyncio.start_unix_server(self._handle, self._path)
+
+    def close(self):
+        """Stops accepting connections and closes the connected ones."""
+        if self._server:
+            self._server.close()
+        for writer in self._interest:
+            writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._interest[writer] = set()
+        self._update_interest(self._subscribers)
+        try:
+            while True:
+                match await _read_frame(reader):
+                    case ("subscribe", topic):
+                        self._subscribe(writer, topic)
+                        self._update_interest((topic,))
+                    case ("unsubscribe", topic):
+                        self._unsubscribe(writer, topic)
+                        self._update_interest((topic,))
+                    case ("publish", topic, key, payload):
+                        if key is not None:
+                            self._retained.setdefault(topic, {})[key] = payload
+                        subscribers = self._subscribers.get(topic, set())
+                        if self._patterns:
+                            subscribers = subscribers | self._patterns.match(topic)
+                        for subscriber in subscribers:
+                            if subscriber is not writer:
+                                self._send(subscriber, ("message", topic, payload))
+                    case ("clear", topic, values):
+                        self._clear(topic, values)
+                        for connection in self._interest:
+                            if connection is not writer:
+                                self._send(connection, ("clear", topic, values))
+        except (asyncio.IncompleteReadError, ConnectionError, CodecError):
+            # Process exited or sent data the broker does not understand
+            pass
+        finally:
+            topics = [topic for topic, writers in self._subscribers.items() if writer in writers]
+            for topic in topics:
+                self._unsubscribe(writer, topic)
+            del self._interest[writer]
+            self._update_interest(topics)
+            writer.close()
+
+    def _subscribe(self, writer: asyncio.StreamWriter, topic: str):
+        writers = self._subscribers.setdefault(topic, set())
+        if writer in writers:
+            return
+        writers.add(writer)
+        if is_pattern(topic):
+            self._patterns.add(topic, writer)
+            retained_topics = [name for name in self._retained if topic_matches(topic, name)]
+        else:
+            retained_topics = [topic] if topic in self._retained else []
+        for retained_topic in retained_topics:
+            for payload in self._retained[retained_topic].values():
+                self._send(writer, ("message", retained_topic, payload))
+
+    def _send(self, writer: asyncio.StreamWriter, frame: Frame):
+        """Sends a frame to a connection, drops the connection when it does not keep up."""
+        if writer.is_closing():
+            return
+        _write_frame(writer, frame)
+        if writer.transport.get_write_buffer_size() > self._max_buffered:
+            logger.warning("PubSub connection not reading its messages, dropping it.")
+            # Reading from the connection fails, which unsubscribes it
+            writer.transport.abort()
+
+    def _clear(self, topic: str, values: dict[int, bytes]):
+        """Forgets retained messages with the encoded values at the positions of the retain key."""
+        retained = self._retained.get(topic, {})
+        for key in [key for key in retained if all(key[i] == v for i, v in values.items())]:
+            del retained[key]
+        if not retained:
+            self._retained.pop(topic, None)
+
+    def _unsubscribe(self, writer: asyncio.StreamWriter, topic: str):
+        writers = self._subscribers.get(topic, set())
+        if writer not in writers:
+            return
+        writers.remove(writer)
+        if is_pattern(topic):
+            self._patterns.remove(topic, writer)
+        if not writers:
+            del self._subscribers[topic]
+
+    def _update_interest(self, topics):
+        """Tells connections whose interest in the topics changed."""
+        for writer, interest in self._interest.items():
+            for topic in topics:
+                writers = self._subscribers.get(topic, ())
+                interested = len(writers) > (writer in writers)
+                if interested != (topic in interest):
+                    (interest.add if interested else interest.discard)(topic)
+                    self._send(writer, ("interest", topic, interested))
+
+
+# pylint: disable-next=too-many-instance-attributes
+class BrokerPubSub(InProcessPubSub):
+    """
+    PubSub connecting app processes through a PubSubBroker.
+
+    Messages are delivered to subscribers of this process directly and sent to
+    the broker when another process subscribes to their topic or when their topic
+    retains messages. Filters are evaluated by the receiving process. The first
+    process to start hosts the broker, the others connect to it.
+
+    Subscriptions to topic patterns receive messages of matching topics published
+    by any process.
+    """
+    def __init__(
+            self,
+            path: str,
+            codec: MessageCodec,
+            reconnect_delay: float = 1,
+            max_buffered: int = 4 * 2 ** 20,
+    ):
+        """
+        :param path: Path of the broker socket, processes sharing the path exchange messages
+        :param codec: Codec of the exchanged messages
+        :param reconnect_delay: Seconds between attempts to connect to the broker
+        :param max_buffered: Maximal number of bytes the broker, when hosted by this
+            process, buffers for a connection, see PubSubBroker
+        """
+        super().__init__()
+        self._path = path
+        self._codec = codec
+        self._reconnect_delay = reconnect_delay
+        self._max_buffered = max_buffered
+        self._broker: Optional[PubSubBroker] = None
+        # Held by the process hosting the broker
+        self._lock: Optional[TextIO] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader: Optional[asyncio.Task] = None
+        # Descriptors and numbers of subscriptions of this process by topic name
+        self._topics: dict[str, TopicDescriptor] = {}
+        self._subscribed: dict[str, int] = {}
+        # Topics and topic patterns other processes subscribe to
+        self._remote_interest: set[str] = set()
+        self._remote_patterns: TopicTrie[str] = TopicTrie()
+
+    @property
+    def hosts_broker(self) -> bool:
+        """This process hosts the broker."""
+        return self._broker is not None
+
+    async def start(self):
+        """Hosts the broker unless another process does and connects to it."""
+        # pylint: disable-next=consider-using-with
+        lock = open(f"{self._path}.lock", "a", encoding="utf-8")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+        else:
+            self._lock = lock
+            self._broker = PubSubBroker(self._path, self._max_buffered)
+            await self._broker.start()
+            logger.info("Hosting PubSub broker at %s.", self._path)
+        reader = await self._connect()
+        self._reader = asyncio.create_task(self._read(reader))
+
+    def close(self):
+        """Disconnects from the broker, stops the broker when hosted by this process."""
+        if self._reader:
+            self._reader.cancel()
+            self._reader = None
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+        if self._broker:
+            self._broker.close()
+            self._broker = None
+        if self._lock:
+            self._lock.close()
+            self._lock = None
+
+    @override
+    def publish[MessageT](
+            self,
+            topic: TopicDescriptor[MessageT],
+            message: MessageT
+    ):
+        super().publish(topic, message)
+        if self._writer is None:
+            return
+        key = self._retain_values(topic, message) if topic.retain_key is not None else None
+        if key is None and not self._remotely_subscribed(topic.topic):
+            return
+        try:
+            payload = self._codec.encode(message)
+            encoded_key = tuple(map(self._codec.encode, key)) if key is not None else None
+        except CodecError as e:
+            logger.warning("Message of topic %s not sent to other processes: %s", topic.topic, e)
+            return
+        _write_frame(self._writer, ("publish", topic.topic, encoded_key, payload))
+
+    @override
+    def subscribe[MessageT](
+            self,
+            topic: TopicDescriptor[MessageT],
+            msg_filter: Optional[PubSubFilter] = None,
+            capacity: Optional[int] = None,
+            overflow: Optional[OverflowPolicy] = None,
+    ) -> Subscription[MessageT]:
+        subscription = super().subscribe(topic, msg_filter, capacity, overflow)
+        subscribed = self._subscribed.get(topic.topic, 0)
+        self._subscribed[topic.topic] = subscribed + 1
+        if not subscribed:
+            self._topics[topic.topic] = topic
+            self._send(("subscribe", topic.topic))
+        return subscription
+
+    @override
+    def _unsubscribe(self, subscription_id: uuid.UUID) -> Callable[[Subscription], None]:
+        unsubscribe = super()._unsubscribe(subscription_id)
+
+        def _inner(subscription: Subscription):
+            topic = self._subscription_record_id_map[subscription_id].topic.topic
+            unsubscribe(subscription)
+            self._subscribed[topic] -= 1
+            if not self._subscribed[topic]:
+                del self._subscribed[topic]
+                del self._topics[topic]
+                self._send(("unsubscribe", topic))
+        return _inner
+
+    @override
+    def clear_retained[MessageT](self, topic: TopicDescriptor[MessageT], **values: Any):
+        indexes = self._retain_indexes(topic, values)
+        self._clear_retained(topic, indexes)
+        try:
+            encoded = {index: self._codec.encode(value) for index, value in indexes.items()}
+        except CodecError as e:
+            logger.warning(
+                "Retained messages of topic %s not cleared in other processes: %s",
+                topic.topic,
+                e,
+            )
+            return
+        self._send(("clear", topic.topic, encoded))
+
+    def _remotely_subscribed(self, topic: str) -> bool:
+        """Returns whether another process subscribes to the topic or a matching pattern."""
+        if topic in self._remote_interest:
+            return True
+        return bool(self._remote_patterns) and bool(self._remote_patterns.match(topic))
+
+    def _send(self, frame: Frame):
+        # Frames sent while disconnected are dropped, subscriptions are sent again on reconnect
+        if self._writer:
+            _write_frame(self._writer, frame)
+
+    async def _connect(self) -> asyncio.StreamReader:
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self._path)
+                break
+            except (FileNotFoundError, ConnectionError) as e:
+                # Hosting process might not have started the broker yet
+                logger.debug("PubSub broker at %s not available: %s", self._path, e)
+                await asyncio.sleep(self._reconnect_delay)
+        for topic in self._topics:
+            self._send(("subscribe", topic))
+        return reader
+
+    async def _read(self, reader: asyncio.StreamReader):
+        while True:
+            try:
+                while True:
+                    self._on_frame(await _read_frame(reader))
+            except (asyncio.IncompleteReadError, ConnectionError, CodecError) as e:
+                logger.error("Connection to PubSub broker at %s lost: %s", self._path, e)
+            self._writer.close()
+            self._writer = None
+            self._remote_interest.clear()
+            self._remote_patterns = TopicTrie()
+            reader = await self._connect()
+
+    def _on_frame(self, frame: Frame):
+        match frame:
+            case ("message", topic, payload):
+                # Subscriptions might have ended while the message was on its way
+                descriptor = self._topics.get(topic)
+                if descriptor is None and self._patterns:
+                    # Topic matched a pattern, patterns do not retain received messages
+                    descriptor = TopicDescriptor(topic)
+                if descriptor:
+                    try:
+                        message = self._codec.decode(payload)
+                    except CodecError as e:
+                        logger.warning("Message of topic %s not decoded: %s", topic, e)
+                        return
+                    super().publish(descriptor, message)
+            case ("clear", topic, values):
+                try:
+                    indexes = {index: self._codec.decode(value) for index, value in values.items()}
+                except CodecError as e:
+                    logger.warning("Clearing of topic %s not decoded: %s", topic, e)
+                    return
+                self._clear_retained(TopicDescriptor(topic), indexes)
+            case ("interest", topic, True):
+                if is_pattern(topic):
+                    self._remote_patterns.add(topic, topic)
+                else:
+                    self._remote_interest.add(topic)
+            case ("interest", topic, False):
+                if is_pattern(topic):
+                    self._remote_patterns.remove(topic, topic)
+                else:
+                    self._remote_interest.discard(topic)
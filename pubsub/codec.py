@@ -0,0 +1,211 @@
+"""
+Compact binary serialization of PubSub messages.
+
+Values are encoded as a tag byte followed by the value. Integers and lengths are
+varints, dataclasses and enums are referenced by their index in the codec
+registry, so the registry must list the same types in the same order in all
+processes exchanging messages. Dataclass fields not set by the constructor are
+not encoded, they take their default when decoded.
+"""
+import dataclasses
+import struct
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Any, Iterable
+
+_NONE = 0
+_FALSE = 1
+_TRUE = 2
+_INT = 3
+_FLOAT = 4
+_STR = 5
+_BYTES = 6
+_LIST = 7
+_TUPLE = 8
+_DICT = 9
+_UUID = 10
+_DATETIME = 11
+_ENUM = 12
+_DATACLASS = 13
+
+_float = struct.Struct("<d")
+
+
+class CodecError(Exception):
+    """Value cannot be encoded or data cannot be decoded."""
+
+
+class MessageCodec:
+    """Encodes and decodes messages made of registered dataclasses and enums."""
+    def __init__(self, types: Iterable[type]):
+        """
+        :param types: Dataclasses and enums messages can be made of
+        """
+        self._types = list(types)
+        self._ids = {cls: i for i, cls in enumerate(self._types)}
+        self._fields = {
+            cls: tuple(field.name for field in dataclasses.fields(cls) if field.init)
+            for cls in self._types
+            if dataclasses.is_dataclass(cls)
+        }
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Encodes a value.
+
+        :raises CodecError: Value contains an unregistered or unsupported type
+        """
+        out = bytearray()
+        self._encode(value, out)
+        return bytes(out)
+
+    def decode(self, data: bytes) -> Any:
+        """
+        Decodes a value.
+
+        :raises CodecError: Data is corrupted or refers to an unknown type
+        """
+        try:
+            value, offset = self._decode(memoryview(data), 0)
+        except (IndexError, struct.error, ValueError, TypeError) as e:
+            raise CodecError(f"Invalid data: {e}") from e
+        if offset != len(data):
+            raise CodecError("Trailing data")
+        return value
+
+    # pylint: disable-next=too-many-branches
+    def _encode(self, value: Any, out: bytearray):
+        match value:
+            case None:
+                out.append(_NONE)
+            case bool():
+                out.append(_TRUE if value else _FALSE)
+            case Enum():
+                out.append(_ENUM)
+                _write_varint(out, self._type_id(type(value)))
+                self._encode(value.value, out)
+            case int():
+                out.append(_INT)
+                # Zigzag encoding keeps small negative numbers short
+                _write_varint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+            case float():
+                out.append(_FLOAT)
+                out += _float.pack(value)
+            case str():
+                self._encode_str(_STR, value, out)
+            case bytes() | bytearray() | memoryview():
+                out.append(_BYTES)
+                _write_varint(out, len(value))
+                out += value
+            case uuid.UUID():
+                out.append(_UUID)
+                out += value.bytes
+            case datetime():
+                self._encode_str(_DATETIME, value.isoformat(), out)
+            case list() | tuple():
+                out.append(_LIST if isinstance(value, list) else _TUPLE)
+                _write_varint(out, len(value))
+                for item in value:
+                    self._encode(item, out)
+            case dict():
+                out.append(_DICT)
+                _write_varint(out, len(value))
+                for key, item in value.items():
+                    self._encode(key, out)
+                    self._encode(item, out)
+            case _ if type(value) in self._fields:
+                out.append(_DATACLASS)
+                _write_varint(out, self._ids[type(value)])
+                for name in self._fields[type(value)]:
+                    self._encode(getattr(value, name), out)
+            case _:
+                raise CodecError(f"Cannot encode {type(value).__name__}")
+
+    @staticmethod
+    def _encode_str(tag: int, value: str, out: bytearray):
+        encoded = value.encode("utf-8")
+        out.append(tag)
+        _write_varint(out, len(encoded))
+        out += encoded
+
+    # pylint: disable-next=too-many-return-statements
+    def _decode(self, data: memoryview, offset: int) -> tuple[Any, int]:
+        tag = data[offset]
+        offset += 1
+        match tag:
+            case 0 | 1 | 2:
+                return (None, False, True)[tag], offset
+            case 3:
+                zigzag, offset = _read_varint(data, offset)
+                return (zigzag >> 1) ^ -(zigzag & 1), offset
+            case 4:
+                return _float.unpack_from(data, offset)[0], offset + _float.size
+            case 5 | 6 | 11:
+                length, offset = _read_varint(data, offset)
+                raw = bytes(data[offset:offset + length])
+                if len(raw) != length:
+                    raise CodecError("Truncated data")
+                if tag == _BYTES:
+                    return raw, offset + length
+                text = raw.decode("utf-8")
+                return (text if tag == _STR else datetime.fromisoformat(text)), offset + length
+            case 7 | 8:
+                length, offset = _read_varint(data, offset)
+                items = []
+                for _ in range(length):
+                    item, offset = self._decode(data, offset)
+                    items.append(item)
+                return (items if tag == _LIST else tuple(items)), offset
+            case 9:
+                length, offset = _read_varint(data, offset)
+                items = {}
+                for _ in range(length):
+                    key, offset = self._decode(data, offset)
+                    items[key], offset = self._decode(data, offset)
+                return items, offset
+            case 10:
+                if len(data) < offset + 16:
+                    raise CodecError("Truncated data")
+                return uuid.UUID(bytes=bytes(data[offset:offset + 16])), offset + 16
+            case 12:
+                cls, offset = self._decode_type(data, offset)
+                value, offset = self._decode(data, offset)
+                return cls(value), offset
+            case 13:
+                cls, offset = self._decode_type(data, offset)
+                values = {}
+                for name in self._fields.get(cls, ()):
+                    values[name], offset = self._decode(data, offset)
+                return cls(**values), offset
+        raise CodecError(f"Unknown tag {tag}")
+
+    def _decode_type(self, data: memoryview, offset: int) -> tuple[type, int]:
+        type_id, offset = _read_varint(data, offset)
+        if type_id >= len(self._types):
+            raise CodecError(f"Unknown type {type_id}")
+        return self._types[type_id], offset
+
+    def _type_id(self, cls: type) -> int:
+        if cls not in self._ids:
+            raise CodecError(f"Cannot encode unregistered {cls.__name__}")
+        return self._ids[cls]
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: memoryview, offset: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
@@ -2,8 +2,12 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Hashable
 from enum import Enum
-from typing import Callable, Container, override, Collection
+from typing import Callable, Container, Optional, override, Collection
+
+# Value of an attribute missing on a message
+_MISSING = object()
 
 
 class PubSubFilter[MessageT](ABC):
@@ -12,6 +16,16 @@ class PubSubFilter[MessageT](ABC):
     def accept(self, message: MessageT) -> bool:
         """Signals if message passes the filter."""
 
+    def index_key(self) -> Optional[tuple[str, Hashable]]:
+        """
+        Returns attribute name and value a message must have to pass the filter.
+
+        PubSub implementations can use the key to look up subscriptions of a message
+        instead of evaluating filters of all subscriptions of a topic.
+        :return: Attribute name and value, None when the filter cannot be indexed
+        """
+        return None
+
     def __and__(self, other: PubSubFilter):
         return _FilterAnd(self, other)
 
@@ -42,6 +56,11 @@ class _FilterAnd[MessageT](PubSubFilter[MessageT]):
         """Signals if message passes both filters."""
         return self._left.accept(message) and self._right.accept(message)
 
+    @override
+    def index_key(self) -> Optional[tuple[str, Hashable]]:
+        """Message passing both filters has the key of either of them."""
+        return self._left.index_key() or self._right.index_key()
+
 
 class _FilterOr[MessageT](PubSubFilter[MessageT]):
     def __init__(self, left: PubSubFilter[MessageT], right: PubSubFilter[MessageT]):
@@ -67,6 +86,26 @@ class FieldEquals[MessageT, ValueT](PubSubFilter[MessageT]):
         return self._selector(message) == self._value
 
 
+class AttributeEquals[MessageT](FieldEquals[MessageT, Hashable]):
+    """
+    FieldEquals on a named attribute, subscriptions with it are indexed by the attribute.
+
+    Messages with an unhashable value of the attribute do not pass the filter.
+    """
+    def __init__(self, attribute: str, value: Hashable):
+        """
+        :param attribute: Name of the message attribute
+        :param value: Hashable value the attribute must be equal to
+        """
+        super().__init__(lambda message: getattr(message, attribute, _MISSING), value)
+        self._attribute = attribute
+
+    @override
+    def index_key(self) -> Optional[tuple[str, Hashable]]:
+        """Messages passing the filter have the value of the attribute."""
+        return self._attribute, self._value
+
+
 class IsType[MessageT](PubSubFilter[MessageT]):
     """Filters messages based on a type."""
     def __init__(self, subtype: type[MessageT]):
@@ -1,16 +1,32 @@
 """InProcess messaging using PubSub."""
 import uuid
 from collections import defaultdict
+from collections.abc import Hashable
 from dataclasses import dataclass
-from typing import Optional, Callable, override
+from typing import Any, Optional, Callable, override
 
 from pubsub.filter import PubSubFilter
 from pubsub.pubsub import PubSub, Subscription
-from pubsub.topic import TopicDescriptor
+from pubsub.topic import TopicDescriptor, OverflowPolicy
+from pubsub.trie import TopicTrie, is_pattern, topic_matches
+
+
+# Value of an attribute missing on a message
+_MISSING = object()
 
 
 class InProcessPubSub(PubSub):
-    """PubSub messaging between different modules of the app in the same process."""
+    """
+    PubSub messaging between different modules of the app in the same process.
+
+    Subscriptions with a filter declaring an index key are looked up by the value of
+    the key attribute of a published message, filters of other subscriptions of the
+    topic are evaluated for each message.
+
+    Subscriptions to topic patterns (`rcon_response/*`, `rcon_*/**`, see pubsub.trie)
+    receive messages of all matching topics. Patterns are kept in a trie, so publishing
+    walks only the patterns matching the topic.
+    """
     @dataclass(eq=True, frozen=True)
     class SubscriptionRecord[MessageT]:
         """Registered subscription."""
@@ -19,11 +35,21 @@ class InProcessPubSub(PubSub):
         msg_filter: PubSubFilter[MessageT]
 
     def __init__(self):
+        # Subscriptions without an index key
         self._subscriptions: dict[
             TopicDescriptor,
             set[InProcessPubSub.SubscriptionRecord]
         ] = defaultdict(set)
+        # Indexed subscriptions by topic, attribute name and attribute value
+        self._indexed: dict[
+            TopicDescriptor,
+            dict[str, dict[Hashable, set[InProcessPubSub.SubscriptionRecord]]]
+        ] = {}
+        # Subscriptions to topic patterns
+        self._patterns: TopicTrie[InProcessPubSub.SubscriptionRecord] = TopicTrie()
         self._subscription_record_id_map: dict[uuid.UUID, InProcessPubSub.SubscriptionRecord] = {}
+        # Latest messages of topics with retain key by values of the key attributes
+        self._retained: dict[TopicDescriptor, dict[tuple, object]] = {}
 
     @override
     def publish[MessageT](
@@ -31,27 +57,134 @@ class InProcessPubSub(PubSub):
             topic: TopicDescriptor[MessageT],
             message: MessageT
     ):
-        subscriptions = self._subscriptions[topic]
-        for sub in subscriptions:
+        if is_pattern(topic.topic):
+            raise ValueError(f"Cannot publish to topic pattern {topic.topic}")
+        if topic.retain_key is not None:
+            self._retain(topic, message)
+        for sub in self._subscriptions.get(topic, ()):
             if not sub.msg_filter or sub.msg_filter.accept(message):
                 # pylint: disable=protected-access
                 sub.subscription._on_message(message)
+        for attribute, by_value in self._indexed.get(topic, {}).items():
+            value = getattr(message, attribute, _MISSING)
+            if not isinstance(value, Hashable):
+                # Unhashable value is never equal to a hashable filter value
+                continue
+            for sub in by_value.get(value, ()):
+                # Rest of the filter, the key is already matched
+                if sub.msg_filter.accept(message):
+                    # pylint: disable=protected-access
+                    sub.subscription._on_message(message)
+        if self._patterns:
+            for sub in self._patterns.match(topic.topic):
+                if not sub.msg_filter or sub.msg_filter.accept(message):
+                    # pylint: disable=protected-access
+                    sub.subscription._on_message(message)
 
     @override
     def subscribe[MessageT](
             self,
             topic: TopicDescriptor[MessageT],
             msg_filter: Optional[PubSubFilter] = None,
+            capacity: Optional[int] = None,
+            overflow: Optional[OverflowPolicy] = None,
     ) -> Subscription[MessageT]:
         sub_id = uuid.uuid4()
-        subscription = Subscription(self, self._unsubscribe(sub_id))
+        subscription = Subscription(
+            self,
+            self._unsubscribe(sub_id),
+            topic.capacity if capacity is None else capacity,
+            overflow or topic.overflow,
+        )
         record = InProcessPubSub.SubscriptionRecord(topic, subscription, msg_filter)
-        self._subscriptions[topic].add(record)
+        if is_pattern(topic.topic):
+            self._patterns.add(topic.topic, record)
+        elif key := (msg_filter.index_key() if msg_filter else None):
+            attribute, value = key
+            by_value = self._indexed.setdefault(topic, {}).setdefault(attribute, {})
+            by_value.setdefault(value, set()).add(record)
+        else:
+            self._subscriptions[topic].add(record)
         self._subscription_record_id_map[sub_id] = record
+        for message in self._retained_messages(topic):
+            if not msg_filter or msg_filter.accept(message):
+                # pylint: disable=protected-access
+                subscription._on_message(message)
         return subscription
 
+    @override
+    def clear_retained[MessageT](self, topic: TopicDescriptor[MessageT], **values: Any):
+        self._clear_retained(topic, self._retain_indexes(topic, values))
+
+    def _clear_retained[MessageT](self, topic: TopicDescriptor[MessageT], indexes: dict[int, Any]):
+        """Forgets retained messages with the values at the positions of the retain key."""
+        retained = self._retained.get(topic, {})
+        for key in [key for key in retained if all(key[i] == v for i, v in indexes.items())]:
+            del retained[key]
+        if not retained:
+            self._retained.pop(topic, None)
+
+    @staticmethod
+    def _retain_indexes[MessageT](
+            topic: TopicDescriptor[MessageT],
+            values: dict[str, Any],
+    ) -> dict[int, Any]:
+        """Returns the values by position of their attributes in the retain key."""
+        retain_key = topic.retain_key or ()
+        for attribute in values:
+            if attribute not in retain_key:
+                raise ValueError(f"{attribute} is not part of retain key of topic {topic.topic}")
+        return {retain_key.index(attribute): value for attribute, value in values.items()}
+
+    def _retained_messages[MessageT](self, topic: TopicDescriptor[MessageT]) -> list[MessageT]:
+        """Returns retained messages of the topic or of all topics matching the pattern."""
+        if not is_pattern(topic.topic):
+            return list(self._retained.get(topic, {}).values())
+        return [
+            message
+            for retained_topic, messages in self._retained.items()
+            if topic_matches(topic.topic, retained_topic.topic)
+            for message in messages.values()
+        ]
+
+    def _retain[MessageT](self, topic: TopicDescriptor[MessageT], message: MessageT):
+        key = self._retain_values(topic, message)
+        if key is not None:
+            self._retained.setdefault(topic, {})[key] = message
+
+    @staticmethod
+    def _retain_values[MessageT](
+            topic: TopicDescriptor[MessageT],
+            message: MessageT,
+    ) -> Optional[tuple]:
+        """Returns values of the retain key attributes, None when the message is not retained."""
+        key = tuple(getattr(message, attribute, _MISSING) for attribute in topic.retain_key)
+        if any(value is _MISSING or not isinstance(value, Hashable) for value in key):
+            return None
+        return key
+
     def _unsubscribe(self, subscription_id: uuid.UUID) -> Callable[[Subscription], None]:
         def _inner(_: Subscription):
             record = self._subscription_record_id_map.pop(subscription_id)
-            self._subscriptions[record.topic].remove(record)
+            if is_pattern(record.topic.topic):
+                self._patterns.remove(record.topic.topic, record)
+                return
+            key = record.msg_filter.index_key() if record.msg_filter else None
+            if key is None:
+                self._subscriptions[record.topic].remove(record)
+                if not self._subscriptions[record.topic]:
+                    del self._subscriptions[record.topic]
+                return
+
+            attribute, value = key
+            by_attribute = self._indexed[record.topic]
+            records = by_attribute[attribute][value]
+            records.remove(record)
+            # Drop empty index levels so they are not walked by publish
+            if not records:
+                del by_attribute[attribute][value]
+                if not by_attribute[attribute]:
+                    del by_attribute[attribute]
+                    if not by_attribute:
+                        del self._indexed[record.topic]
         return _inner
@@ -1,27 +1,97 @@
 """PubSub messaging pattern."""
 from __future__ import annotations
 
+import logging
 from abc import abstractmethod, ABC
-from typing import Optional, AsyncIterable, Callable
+from typing import Any, Optional, AsyncIterator, Callable
 
 from aiochannel import Channel
 
 from pubsub.filter import PubSubFilter
-from pubsub.topic import TopicDescriptor
+from pubsub.topic import TopicDescriptor, OverflowPolicy
+
+logger = logging.getLogger(__name__)
 
 
 class Subscription[MessageT]:
-    """Subscription to a topic."""
-    def __init__(self, pubsub: PubSub, on_exit: Callable[[Subscription], None]):
+    """
+    Subscription to a topic.
+
+    Messages wait in a channel of given capacity until they are read. Messages
+    delivered to a full channel are handled by the overflow policy.
+    """
+    def __init__(
+            self,
+            pubsub: PubSub,
+            on_exit: Callable[[Subscription], None],
+            capacity: int = 0,
+            overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ):
+        """
+        :param pubsub: PubSub the subscription belongs to
+        :param on_exit: Called when the subscription is exited
+        :param capacity: Maximal number of waiting messages, 0 for unbounded
+        :param overflow: Policy of messages delivered at capacity
+        """
         self._pubsub = pubsub
         self._on_exit = on_exit
-        self._channel: Channel[MessageT] = Channel()
+        self._overflow = overflow
+        self._channel: Channel[MessageT] = Channel(capacity)
+        # Number of messages dropped by the overflow policy
+        self.dropped = 0
+        # Subscription was closed by the DISCONNECT overflow policy
+        self.disconnected = False
 
     def _on_message(self, msg: MessageT) -> None:
-        self._channel.put_nowait(msg)
+        if self._channel.closed():
+            self.dropped += 1
+            return
+        if not self._channel.full():
+            self._channel.put_nowait(msg)
+            return
+
+        if not self.dropped:
+            # Conflation is expected of subscribers of latest values only
+            logger.log(
+                logging.DEBUG if self._overflow == OverflowPolicy.CONFLATE else logging.WARNING,
+                "Subscription reached its capacity of %d messages, applying %s",
+                self._channel.maxsize,
+                self._overflow.name,
+            )
+        match self._overflow:
+            case OverflowPolicy.DROP_OLDEST:
+                self._channel.get_nowait()
+                self._channel.put_nowait(msg)
+                self.dropped += 1
+            case OverflowPolicy.DROP_NEWEST:
+                self.dropped += 1
+            case OverflowPolicy.CONFLATE:
+                while not self._channel.empty():
+                    self._channel.get_nowait()
+                    self.dropped += 1
+                self._channel.put_nowait(msg)
+            case OverflowPolicy.DISCONNECT:
+                self._channel.close()
+                self.disconnected = True
+                self.dropped += 1
+
+    def get_ready(self, max_messages: int) -> list[MessageT]:
+        """
+        Returns already received messages without waiting for new ones.
+
+        :param max_messages: Maximal number of messages to return
+        :return: Up to max_messages received messages in order of arrival
+        """
+        messages = []
+        while len(messages) < max_messages and not self._channel.empty():
+            messages.append(self._channel.get_nowait())
+        return messages
 
-    def __enter__(self) -> AsyncIterable[MessageT]:
-        return self._channel
+    def __aiter__(self) -> AsyncIterator[MessageT]:
+        return self._channel.__aiter__()
+
+    def __enter__(self) -> Subscription[MessageT]:
+        return self
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         self._channel.close()
@@ -42,6 +112,28 @@ class PubSub(ABC):
     def subscribe[MessageT](
             self,
             topic: TopicDescriptor[MessageT],
-            msg_filter: Optional[PubSubFilter] = None
+            msg_filter: Optional[PubSubFilter] = None,
+            capacity: Optional[int] = None,
+            overflow: Optional[OverflowPolicy] = None,
     ) -> Subscription[MessageT]:
-        """Subscribes to the given topic with optional filters."""
+        """
+        Subscribes to the given topic with optional filters.
+
+        Retained messages of the topic passing the filter are delivered first.
+
+        :param topic: Topic to subscribe to or a pattern of topics, see pubsub.trie
+        :param msg_filter: Filter of delivered messages
+        :param capacity: Maximal number of waiting messages, default of the topic when None
+        :param overflow: Policy of messages delivered at capacity, default of the topic when None
+        """
+
+    @abstractmethod
+    def clear_retained[MessageT](self, topic: TopicDescriptor[MessageT], **values: Any) -> None:
+        """
+        Forgets retained messages of the topic, e.g. of a deleted server.
+
+        :param topic: Topic with retain key
+        :param values: Values of retain key attributes of the forgotten messages,
+            messages of all values of the attributes not given are forgotten
+        :raises ValueError: Attribute is not part of the retain key
+        """
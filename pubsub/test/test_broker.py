@@ -0,0 +1,160 @@
+"""Broker PubSub tests."""
+# pylint: disable=missing-class-docstring,protected-access
+import asyncio
+import os
+import tempfile
+import unittest
+from dataclasses import dataclass
+
+from pubsub.broker import BrokerPubSub, _write_frame
+from pubsub.codec import MessageCodec
+from pubsub.filter import AttributeEquals
+from pubsub.topic import TopicDescriptor
+
+
+@dataclass(eq=True, frozen=True)
+class Message:
+    field1: str
+    field2: str
+
+
+topic = TopicDescriptor[Message]("msg_topic")
+
+
+class BrokerPubSubTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.dir.name, "pubsub.sock")
+        self.first = BrokerPubSub(
+            self.path,
+            MessageCodec([Message]),
+            reconnect_delay=0.01,
+            max_buffered=2 ** 16,
+        )
+        self.second = BrokerPubSub(self.path, MessageCodec([Message]), reconnect_delay=0.01)
+        await self.first.start()
+        await self.second.start()
+
+    async def asyncTearDown(self):
+        self.second.close()
+        self.first.close()
+        # Broker ends reading from the closed connections
+        await asyncio.sleep(0.01)
+        self.dir.cleanup()
+
+    async def _until(self, condition):
+        for _ in range(100):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        self.fail("Condition not met")
+
+    async def test_first_process_hosts_broker(self):
+        """Tests only the first started process hosts the broker."""
+        self.assertTrue(self.first.hosts_broker)
+        self.assertFalse(self.second.hosts_broker)
+
+    async def test_messages_delivered_to_other_process(self):
+        """Tests messages are delivered to both processes and filtered by the subscriber."""
+        with (
+            self.first.subscribe(topic) as local,
+            self.second.subscribe(topic, AttributeEquals("field1", "b")) as remote,
+        ):
+            await self._until(lambda: "msg_topic" in self.first._remote_interest)
+            for message in (Message("a", "1"), Message("b", "2")):
+                self.first.publish(topic, message)
+            await self._until(lambda: not remote._channel.empty())
+
+            self.assertEqual([Message("a", "1"), Message("b", "2")], local.get_ready(10))
+            self.assertEqual([Message("b", "2")], remote.get_ready(10))
+
+    async def test_messages_not_sent_without_interest(self):
+        """Tests messages are sent to the broker only while another process subscribes."""
+        sent = []
+        write = self.first._writer.write
+        self.first._writer.write = lambda data: (sent.append(data), write(data))
+
+        self.first.publish(topic, Message("a", "1"))
+        with self.second.subscribe(topic):
+            await self._until(lambda: "msg_topic" in self.first._remote_interest)
+            self.first.publish(topic, Message("a", "2"))
+        await self._until(lambda: "msg_topic" not in self.first._remote_interest)
+        self.first.publish(topic, Message("a", "3"))
+
+        self.assertEqual(1, len(sent))
+
+    async def test_retained_messages_sent_to_new_subscribers(self):
+        """Tests processes subscribing later receive the latest retained messages."""
+        retained = TopicDescriptor[Message]("retained", retain_key=("field1",))
+        for message in (Message("a", "1"), Message("b", "1"), Message("a", "2")):
+            self.first.publish(retained, message)
+        await asyncio.sleep(0.05)
+
+        with self.second.subscribe(retained) as sub:
+            await self._until(lambda: sub._channel.qsize() == 2)
+
+            self.assertEqual({Message("a", "2"), Message("b", "1")}, set(sub.get_ready(10)))
+
+    async def test_clear_retained(self):
+        """Tests retained messages cleared by a process are forgotten by the broker and others."""
+        retained = TopicDescriptor[Message]("retained", retain_key=("field1",))
+        for message in (Message("a", "1"), Message("b", "1")):
+            self.first.publish(retained, message)
+        await asyncio.sleep(0.05)
+
+        self.second.clear_retained(retained, field1="a")
+        broker = self.first._broker
+        await self._until(lambda: len(broker._retained["retained"]) == 1)
+        await self._until(lambda: len(self.first._retained[retained]) == 1)
+
+        with self.second.subscribe(retained) as sub:
+            await self._until(lambda: sub._channel.qsize() == 1)
+
+            self.assertEqual([Message("b", "1")], sub.get_ready(10))
+
+    async def test_slow_connection_dropped(self):
+        """Tests a connection not reading its messages is dropped by the broker."""
+        _, writer = await asyncio.open_unix_connection(self.path)
+        self.addCleanup(writer.close)
+        _write_frame(writer, ("subscribe", "msg_topic"))
+        broker = self.first._broker
+        await self._until(lambda: "msg_topic" in self.first._remote_interest)
+
+        for i in range(1000):
+            self.first.publish(topic, Message(str(i), "x" * 1000))
+            await asyncio.sleep(0)
+        await self._until(lambda: len(broker._interest) == 2)
+
+        self.assertNotIn("msg_topic", broker._subscribers)
+
+    async def test_subscriptions_restored_after_reconnect(self):
+        """Tests a process reconnecting to the broker subscribes again."""
+        with self.second.subscribe(topic) as sub:
+            await self._until(lambda: "msg_topic" in self.first._remote_interest)
+            writer = self.second._writer
+            writer.close()
+            broker = self.first._broker
+            await self._until(lambda: self.second._writer not in (None, writer))
+            # Closed connection is dropped and the new one subscribed
+            await self._until(lambda: len(broker._interest) == 2)
+            await self._until(lambda: len(broker._subscribers.get("msg_topic", ())) == 1)
+            await self._until(lambda: "msg_topic" in self.first._remote_interest)
+
+            self.first.publish(topic, Message("a", "1"))
+            await self._until(lambda: not sub._channel.empty())
+
+            self.assertEqual([Message("a", "1")], sub.get_ready(10))
+
+    async def test_pattern_subscriptions(self):
+        """Tests pattern subscribers receive messages and retained messages of matching topics."""
+        retained = TopicDescriptor[Message]("status/1", retain_key=())
+        self.first.publish(retained, Message("a", "1"))
+        await asyncio.sleep(0.05)
+
+        with self.second.subscribe(TopicDescriptor[Message]("status/*")) as sub:
+            await self._until(lambda: self.first._remote_patterns.match("status/2"))
+            self.first.publish(TopicDescriptor[Message]("status/2"), Message("b", "2"))
+            self.first.publish(TopicDescriptor[Message]("other/2"), Message("c", "3"))
+            await self._until(lambda: sub._channel.qsize() == 2)
+
+            self.assertEqual([Message("a", "1"), Message("b", "2")], sub.get_ready(10))
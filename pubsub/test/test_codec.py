@@ -0,0 +1,80 @@
+"""Message codec tests."""
+# pylint: disable=missing-class-docstring
+import unittest
+import uuid
+from datetime import datetime
+
+from messages.codec import message_codec
+from messages.heartbeat import HeartbeatMessage
+from messages.notifications import NotificationMessage
+from messages.rcon import RconCommand, RconResponse, RconResponseChunk
+from messages.rcon_stats import RconStats
+from messages.server_changes import ServerChanged
+from messages.server_status import RconConnected, RconFailover, ServerQueried
+from models.server import Server
+from pubsub.codec import CodecError, MessageCodec
+from query.info import ServerInfo
+from rcon.stats import WireStats
+
+
+class MessageCodecTest(unittest.TestCase):
+    def setUp(self):
+        self.codec = message_codec()
+
+    def test_values(self):
+        """Tests values of supported types are decoded equal and of the same type."""
+        values = [
+            None, True, False, 0, 1, -1, 2 ** 70, -2 ** 70, 0.5, "", "příliš", b"\x00\xff",
+            [1, "a"], (1, (2, None)), {"a": [1], 2: {}}, uuid.uuid4(), datetime(2024, 1, 2, 3, 4),
+        ]
+        for value in values:
+            with self.subTest(value=value):
+                decoded = self.codec.decode(self.codec.encode(value))
+                self.assertEqual(value, decoded)
+                self.assertIs(type(value), type(decoded))
+
+    def test_messages(self):
+        """Tests messages of the app are decoded equal."""
+        server_uid = uuid.uuid4()
+        stats = WireStats()
+        stats.round_trip.record(0.01)
+        stats.packets_in["ResponsePacket"] = 3
+        messages = [
+            HeartbeatMessage(datetime.now()),
+            NotificationMessage("all", "hello", NotificationMessage.NotificationType.ERROR, 5),
+            NotificationMessage(["admin"], "hi"),
+            RconCommand("admin", "list", True),
+            RconResponse("admin", Server.Type.MINECRAFT_SERVER, "list", "§aplayers"),
+            RconResponseChunk(
+                uuid.uuid4(), 2, "admin", Server.Type.SOURCE_SERVER, "status", "x", True
+            ),
+            RconStats(server_uid, stats),
+            RconConnected(server_uid),
+            RconFailover(server_uid, 0.25),
+            ServerQueried(server_uid, ServerInfo("name", 1, 10, "map", "1.20")),
+            ServerChanged(server_uid),
+        ]
+        for message in messages:
+            with self.subTest(message=message):
+                self.assertEqual(message, self.codec.decode(self.codec.encode(message)))
+
+    def test_compact(self):
+        """Tests small integers take two bytes and messages carry no field names."""
+        self.assertEqual(2, len(self.codec.encode(-64)))
+        encoded = self.codec.encode(RconCommand("admin", "list"))
+        self.assertEqual(16, len(encoded))
+        self.assertNotIn(b"issuing_user", encoded)
+
+    def test_unregistered_type(self):
+        """Tests encoding of an unregistered type fails."""
+        with self.assertRaises(CodecError):
+            MessageCodec(()).encode(RconCommand("admin", "list"))
+        with self.assertRaises(CodecError):
+            self.codec.encode(object())
+
+    def test_invalid_data(self):
+        """Tests decoding of truncated, trailing and unknown data fails."""
+        encoded = self.codec.encode(RconCommand("admin", "list"))
+        for data in (encoded[:-1], encoded + b"\x00", b"\xff", b"\x0d\x7f"):
+            with self.subTest(data=data), self.assertRaises(CodecError):
+                self.codec.decode(data)
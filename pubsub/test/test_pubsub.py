@@ -1,12 +1,12 @@
 """PubSub tests."""
-# pylint: disable=missing-class-docstring
+# pylint: disable=missing-class-docstring,too-many-public-methods
 import asyncio
 import unittest
 from dataclasses import dataclass
 
-from pubsub.filter import FieldContains, FieldLength, IsType, FieldEquals
+from pubsub.filter import AttributeEquals, FieldContains, FieldLength, IsType, FieldEquals
 from pubsub.inprocess import InProcessPubSub
-from pubsub.topic import TopicDescriptor
+from pubsub.topic import TopicDescriptor, OverflowPolicy
 from utils.async_helpers import yield_to_event_loop
 
 
@@ -195,6 +195,209 @@ class InProcessPubSubTest(unittest.IsolatedAsyncioTestCase):
         await self._pubsub_test(topic, messages_out, msg_filter)
         self.assertEqual([messages_out[1], messages_out[2]], self.messages_in)
 
+    async def test_filter_attribute_equals(self):
+        """Tests indexed AttributeEquals filter alone and combined with other filters."""
+        topic = TopicDescriptor[Message]("msg_topic")
+
+        messages_out = [
+            Message(field1="hello", field2="world"),
+            Message(field1="world", field2="hello"),
+            Message(field1="hello", field2="different"),
+        ]
+
+        await self._pubsub_test(topic, messages_out, AttributeEquals("field1", "hello"))
+        self.assertEqual([messages_out[0], messages_out[2]], self.messages_in)
+        self.messages_in.clear()
+
+        msg_filter = (AttributeEquals("field1", "hello")
+                      & FieldEquals[Message, str](lambda msg: msg.field2, "world"))
+        await self._pubsub_test(topic, messages_out, msg_filter)
+        self.assertEqual([messages_out[0]], self.messages_in)
+        self.messages_in.clear()
+
+        await self._pubsub_test(topic, messages_out, ~AttributeEquals[Message]("field1", "hello"))
+        self.assertEqual([messages_out[1]], self.messages_in)
+
+    async def test_indexed_and_generic_subscriptions(self):
+        """Tests indexed and generic subscriptions of a topic receive their messages."""
+        topic = TopicDescriptor[Message]("msg_topic")
+
+        with (
+            self.pubsub.subscribe(topic, AttributeEquals("field1", "a")) as by_field1,
+            self.pubsub.subscribe(topic, AttributeEquals("field2", "a")) as by_field2,
+            self.pubsub.subscribe(topic) as everything,
+            self.pubsub.subscribe(topic, AttributeEquals("missing", "a")) as missing,
+            self.pubsub.subscribe(topic, AttributeEquals("list_content", "a")) as unhashable,
+        ):
+            for message in (Message("a", "b"), Message("b", "a"), Message("a", "a")):
+                self.pubsub.publish(topic, message)
+
+            self.assertEqual([Message("a", "b"), Message("a", "a")], by_field1.get_ready(10))
+            self.assertEqual([Message("b", "a"), Message("a", "a")], by_field2.get_ready(10))
+            self.assertEqual(3, len(everything.get_ready(10)))
+            self.assertEqual([], missing.get_ready(10))
+
+            self.pubsub.publish(topic, StrListMessage("a", [1]))
+            self.assertEqual([], unhashable.get_ready(10))
+
+        # pylint: disable=protected-access
+        self.assertEqual({}, self.pubsub._indexed)
+        self.assertEqual({}, dict(self.pubsub._subscriptions))
+
+    async def test_get_ready(self):
+        """Tests already received messages are returned without waiting."""
+        topic = TopicDescriptor[int]("int_topic")
+
+        with self.pubsub.subscribe(topic) as sub:
+            for message in range(5):
+                self.pubsub.publish(topic, message)
+
+            self.assertEqual([0, 1, 2], sub.get_ready(3))
+            self.assertEqual([3, 4], sub.get_ready(3))
+            self.assertEqual([], sub.get_ready(3))
+
+    async def test_overflow_policies(self):
+        """Tests messages delivered to a full subscription are handled by its policy."""
+        topic = TopicDescriptor[int]("int_topic")
+        expected = {
+            OverflowPolicy.DROP_OLDEST: ([2, 3, 4], 2),
+            OverflowPolicy.DROP_NEWEST: ([0, 1, 2], 2),
+            OverflowPolicy.CONFLATE: ([3, 4], 3),
+            OverflowPolicy.DISCONNECT: ([0, 1, 2], 2),
+        }
+
+        for policy, (messages, dropped) in expected.items():
+            with self.subTest(policy=policy):
+                with self.pubsub.subscribe(topic, capacity=3, overflow=policy) as sub:
+                    for message in range(5):
+                        self.pubsub.publish(topic, message)
+
+                    self.assertEqual(messages, sub.get_ready(10))
+                    self.assertEqual(dropped, sub.dropped)
+                    self.assertEqual(policy == OverflowPolicy.DISCONNECT, sub.disconnected)
+
+    async def test_disconnected_subscription_ends(self):
+        """Tests iteration of a disconnected subscription ends after the waiting messages."""
+        topic = TopicDescriptor[int]("int_topic", 2, OverflowPolicy.DISCONNECT)
+
+        with self.pubsub.subscribe(topic) as sub:
+            for message in range(3):
+                self.pubsub.publish(topic, message)
+
+            self.assertEqual([0, 1], [message async for message in sub])
+
+    async def test_topic_defaults(self):
+        """Tests subscriptions use capacity and policy of the topic unless overridden."""
+        topic = TopicDescriptor[int]("int_topic", 1, OverflowPolicy.CONFLATE)
+
+        with (
+            self.pubsub.subscribe(topic) as conflated,
+            self.pubsub.subscribe(topic, capacity=0) as unbounded,
+        ):
+            for message in range(3):
+                self.pubsub.publish(TopicDescriptor[int]("int_topic"), message)
+
+            self.assertEqual([2], conflated.get_ready(10))
+            self.assertEqual([0, 1, 2], unbounded.get_ready(10))
+
+    async def test_retained_messages(self):
+        """Tests new subscribers receive the latest message of each retain key first."""
+        topic = TopicDescriptor[Message]("msg_topic", retain_key=("field1",))
+        for message in (Message("a", "1"), Message("b", "1"), Message("a", "2")):
+            self.pubsub.publish(topic, message)
+
+        with (
+            self.pubsub.subscribe(topic) as everything,
+            self.pubsub.subscribe(topic, AttributeEquals("field1", "b")) as filtered,
+        ):
+            self.pubsub.publish(topic, Message("b", "2"))
+
+            self.assertEqual(
+                [Message("a", "2"), Message("b", "1"), Message("b", "2")],
+                everything.get_ready(10),
+            )
+            self.assertEqual([Message("b", "1"), Message("b", "2")], filtered.get_ready(10))
+
+    async def test_clear_retained(self):
+        """Tests cleared retained messages are not delivered to new subscribers."""
+        topic = TopicDescriptor[Message]("msg_topic", retain_key=("field1", "field2"))
+        for message in (Message("a", "1"), Message("a", "2"), Message("b", "1")):
+            self.pubsub.publish(topic, message)
+
+        self.pubsub.clear_retained(topic, field1="a")
+
+        with self.pubsub.subscribe(topic) as sub:
+            self.assertEqual([Message("b", "1")], sub.get_ready(10))
+        with self.assertRaises(ValueError):
+            self.pubsub.clear_retained(topic, field3="a")
+
+    async def test_retained_latest_message(self):
+        """Tests empty retain key retains the latest message and others retain nothing."""
+        retained = TopicDescriptor[int]("retained", retain_key=())
+        plain = TopicDescriptor[int]("plain")
+        for message in range(3):
+            self.pubsub.publish(retained, message)
+            self.pubsub.publish(plain, message)
+
+        with (
+            self.pubsub.subscribe(TopicDescriptor[int]("retained")) as retained_sub,
+            self.pubsub.subscribe(plain) as plain_sub,
+        ):
+            self.assertEqual([2], retained_sub.get_ready(10))
+            self.assertEqual([], plain_sub.get_ready(10))
+
+    async def test_pattern_subscriptions(self):
+        """Tests pattern subscriptions receive filtered messages of all matching topics."""
+        first = TopicDescriptor[Message]("rcon_response/1")
+        second = TopicDescriptor[Message]("rcon_response/2")
+        other = TopicDescriptor[Message]("server_status")
+
+        with (
+            self.pubsub.subscribe(TopicDescriptor[Message]("rcon_response/*")) as responses,
+            self.pubsub.subscribe(
+                TopicDescriptor[Message]("**"),
+                AttributeEquals("field1", "b"),
+            ) as filtered,
+        ):
+            for topic in (first, second, other):
+                self.pubsub.publish(topic, Message("a", topic.topic))
+                self.pubsub.publish(topic, Message("b", topic.topic))
+
+            self.assertEqual(
+                [
+                    Message("a", "rcon_response/1"),
+                    Message("b", "rcon_response/1"),
+                    Message("a", "rcon_response/2"),
+                    Message("b", "rcon_response/2"),
+                ],
+                responses.get_ready(10),
+            )
+            self.assertEqual(
+                [Message("b", topic.topic) for topic in (first, second, other)],
+                filtered.get_ready(10),
+            )
+
+        self.pubsub.publish(first, Message("a", "1"))
+        self.assertFalse(self.pubsub._patterns)  # pylint: disable=protected-access
+
+    async def test_pattern_subscription_retained_messages(self):
+        """Tests pattern subscribers receive retained messages of all matching topics."""
+        for uid in (1, 2):
+            topic = TopicDescriptor[Message](f"status/{uid}", retain_key=())
+            self.pubsub.publish(topic, Message(str(uid), "old"))
+            self.pubsub.publish(topic, Message(str(uid), "new"))
+
+        with self.pubsub.subscribe(TopicDescriptor[Message]("status/*")) as sub:
+            self.assertEqual(
+                {Message("1", "new"), Message("2", "new")},
+                set(sub.get_ready(10)),
+            )
+
+    async def test_publish_to_pattern(self):
+        """Tests publishing to a topic pattern fails."""
+        with self.assertRaises(ValueError):
+            self.pubsub.publish(TopicDescriptor[int]("rcon_response/*"), 1)
+
     async def _pubsub_test(
             self,
             topic,
@@ -0,0 +1,66 @@
+"""Topic trie tests."""
+# pylint: disable=missing-class-docstring,protected-access
+import unittest
+
+from pubsub.trie import TopicTrie, is_pattern, topic_matches
+
+
+class TopicTrieTest(unittest.TestCase):
+    def test_patterns(self):
+        """Tests topic names matched by literal, wildcard and deep wildcard patterns."""
+        cases = [
+            ("rcon_response/1", "rcon_response/1", True),
+            ("rcon_response/1", "rcon_response/2", False),
+            ("rcon_response/*", "rcon_response/1", True),
+            ("rcon_response/*", "rcon_response", False),
+            ("rcon_response/*", "rcon_response/1/2", False),
+            ("rcon_*", "rcon_stats", True),
+            ("rcon_*", "server_status", False),
+            ("*_status", "server_status", True),
+            ("r*_*e", "rcon_response", True),
+            ("rcon_*/**", "rcon_command/1", True),
+            ("rcon_*/**", "rcon_stats", True),
+            ("rcon_*/**", "rcon_response/1/2", True),
+            ("**", "heartbeat", True),
+            ("**/1", "rcon_response/1", True),
+            ("**/1", "rcon_response/2", False),
+            ("a/**/b", "a/b", True),
+            ("a/**/b", "a/x/y/b", True),
+            ("a/**/b", "a/x/y/c", False),
+            ("a.*", "abc", False),
+        ]
+        for pattern, topic, matches in cases:
+            with self.subTest(pattern=pattern, topic=topic):
+                self.assertEqual(matches, topic_matches(pattern, topic))
+
+    def test_match_returns_values_of_matching_patterns(self):
+        """Tests values of all matching patterns are returned once."""
+        trie = TopicTrie[str]()
+        for pattern in ("rcon_response/*", "rcon_*/**", "**", "rcon_command/*", "a/**/**"):
+            trie.add(pattern, pattern)
+
+        self.assertEqual({"rcon_response/*", "rcon_*/**", "**"}, trie.match("rcon_response/1"))
+        self.assertEqual({"**", "a/**/**"}, trie.match("a/b/c"))
+
+    def test_remove_drops_unused_nodes(self):
+        """Tests removed patterns do not match and their nodes are dropped."""
+        trie = TopicTrie[int]()
+        trie.add("rcon_response/*", 1)
+        trie.add("rcon_response/*", 2)
+        trie.add("rcon_*/**", 3)
+
+        trie.remove("rcon_response/*", 1)
+        self.assertEqual({2, 3}, trie.match("rcon_response/1"))
+        trie.remove("rcon_response/*", 2)
+        trie.remove("rcon_*/**", 3)
+
+        self.assertEqual(set(), trie.match("rcon_response/1"))
+        self.assertFalse(trie)
+        self.assertTrue(trie._root.empty())
+        with self.assertRaises(KeyError):
+            trie.remove("rcon_response/*", 2)
+
+    def test_is_pattern(self):
+        """Tests topic names with wildcards are patterns."""
+        self.assertTrue(is_pattern("rcon_response/*"))
+        self.assertFalse(is_pattern("rcon_response/1"))
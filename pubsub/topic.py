@@ -1,8 +1,37 @@
 """PubSub topics."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Optional
+
+
+class OverflowPolicy(Enum):
+    """What happens to a message delivered to a subscription at its capacity."""
+    # Oldest waiting message is dropped to make room
+    DROP_OLDEST = "DROP_OLDEST"
+    # Delivered message is dropped
+    DROP_NEWEST = "DROP_NEWEST"
+    # All waiting messages are dropped, only the delivered one is kept
+    CONFLATE = "CONFLATE"
+    # Subscription is closed, the subscriber receives the waiting messages only
+    DISCONNECT = "DISCONNECT"
 
 
 @dataclass(eq=True, frozen=True)
 class TopicDescriptor[MessageT]:
-    """Wrapper class for PubSub topics."""
+    """
+    Wrapper class for PubSub topics.
+
+    Capacity and overflow policy are defaults of subscriptions to the topic,
+    topics are identified by name only.
+
+    Messages of a topic with retain_key are retained - the latest message of each
+    combination of values of the retain_key attributes is delivered to new
+    subscribers before live messages. Empty retain_key retains the latest message
+    of the topic, messages missing any of the attributes are not retained.
+    """
     topic: str
+    # Maximal number of messages waiting in a subscription, 0 for unbounded
+    capacity: int = field(default=0, compare=False)
+    overflow: OverflowPolicy = field(default=OverflowPolicy.DROP_OLDEST, compare=False)
+    # Names of attributes retained messages are keyed by, None to retain no messages
+    retain_key: Optional[tuple[str, ...]] = field(default=None, compare=False)
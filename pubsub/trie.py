@@ -0,0 +1,134 @@
+"""
+Matching of topic names against topic patterns.
+
+Topic names are made of segments separated by "/". In patterns, a "*" in a
+segment matches any characters within the segment (`rcon_*`, `*`) and a "**"
+segment matches any number of segments, including none (`rcon_response/**`).
+"""
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+SEPARATOR = "/"
+WILDCARD = "*"
+# Segment matching any number of segments
+DEEP_WILDCARD = "**"
+
+
+def is_pattern(topic: str) -> bool:
+    """Returns whether the topic name is a pattern matching other topics."""
+    return WILDCARD in topic
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    """Returns whether the topic name matches the pattern."""
+    trie = TopicTrie[bool]()
+    trie.add(pattern, True)
+    return bool(trie.match(topic))
+
+
+class _Node[ValueT]:
+    """Node of the trie reached by a pattern prefix."""
+    __slots__ = ("values", "literals", "wildcards", "deep")
+
+    def __init__(self):
+        # Values of patterns ending at the node
+        self.values: set[ValueT] = set()
+        # Children by literal segments
+        self.literals: dict[str, _Node[ValueT]] = {}
+        # Children by segments with wildcards, with the expression matching the segment
+        self.wildcards: dict[str, tuple[re.Pattern, _Node[ValueT]]] = {}
+        # Child of the deep wildcard segment
+        self.deep: Optional[_Node[ValueT]] = None
+
+    def empty(self) -> bool:
+        """Returns whether no pattern ends at or passes through the node."""
+        return not (self.values or self.literals or self.wildcards or self.deep)
+
+
+class TopicTrie[ValueT]:
+    """
+    Values stored by topic patterns, looked up by topic names matching the patterns.
+
+    Patterns sharing a prefix share nodes, so matching a topic walks only the
+    nodes of patterns whose segments match the topic, not all patterns.
+    """
+    def __init__(self):
+        self._root = _Node[ValueT]()
+
+    def __bool__(self) -> bool:
+        return not self._root.empty()
+
+    def add(self, pattern: str, value: ValueT):
+        """Stores a value by a pattern."""
+        node = self._root
+        for segment in pattern.split(SEPARATOR):
+            if segment == DEEP_WILDCARD:
+                if node.deep is None:
+                    node.deep = _Node()
+                node = node.deep
+            elif WILDCARD in segment:
+                if segment not in node.wildcards:
+                    expression = re.compile(
+                        ".*".join(map(re.escape, segment.split(WILDCARD))),
+                        re.DOTALL,
+                    )
+                    node.wildcards[segment] = (expression, _Node())
+                node = node.wildcards[segment][1]
+            else:
+                node = node.literals.setdefault(segment, _Node())
+        node.values.add(value)
+
+    def remove(self, pattern: str, value: ValueT):
+        """
+        Removes a value stored by a pattern.
+
+        :raises KeyError: Value is not stored by the pattern
+        """
+        path: list[tuple[_Node[ValueT], str]] = []
+        node = self._root
+        for segment in pattern.split(SEPARATOR):
+            path.append((node, segment))
+            if segment == DEEP_WILDCARD:
+                node = node.deep
+            elif WILDCARD in segment:
+                node = node.wildcards[segment][1] if segment in node.wildcards else None
+            else:
+                node = node.literals.get(segment)
+            if node is None:
+                raise KeyError(pattern)
+        node.values.remove(value)
+
+        # Drop nodes no other pattern uses so they are not walked by match
+        for parent, segment in reversed(path):
+            if not node.empty():
+                break
+            if segment == DEEP_WILDCARD:
+                parent.deep = None
+            elif WILDCARD in segment:
+                del parent.wildcards[segment]
+            else:
+                del parent.literals[segment]
+            node = parent
+
+    def match(self, topic: str) -> set[ValueT]:
+        """Returns values of all patterns matching the topic name."""
+        matched: set[ValueT] = set()
+        self._match(self._root, topic.split(SEPARATOR), 0, matched)
+        return matched
+
+    def _match(self, node: _Node[ValueT], segments: list[str], index: int, matched: set[ValueT]):
+        if node.deep is not None:
+            # Deep wildcard consumes none up to all the remaining segments
+            for rest in range(index, len(segments) + 1):
+                self._match(node.deep, segments, rest, matched)
+        if index == len(segments):
+            matched |= node.values
+            return
+        segment = segments[index]
+        if (child := node.literals.get(segment)) is not None:
+            self._match(child, segments, index + 1, matched)
+        for expression, child in node.wildcards.values():
+            if expression.fullmatch(segment):
+                self._match(child, segments, index + 1, matched)
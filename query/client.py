@@ -0,0 +1,145 @@
+"""UDP client querying game servers for their status."""
+import asyncio
+import logging
+import random
+import socket
+from typing import Optional
+
+from models.server import Server
+from query import minecraft, source
+from query.info import ServerInfo, InvalidQueryResponseError
+
+logger = logging.getLogger(__name__)
+
+_Address = tuple[str, int]
+
+
+class _QueryProtocol(asyncio.DatagramProtocol):
+    """Hands received datagrams over to the client that waits for them."""
+    def __init__(self, client: "QueryClient"):
+        self._client = client
+
+    def datagram_received(self, data: bytes, addr: tuple):
+        self._client.datagram_received(data, (addr[0], addr[1]))
+
+    def error_received(self, exc: Exception):
+        logger.debug("Query socket error: %s", exc)
+
+
+class QueryClient:
+    """
+    Queries game servers over UDP on their game port.
+
+    Minecraft servers are queried using the Minecraft Query protocol, Source servers
+    using A2S_INFO. All queries share one socket per address family. Responses are
+    matched to requests by the address of the server, so only one query per server
+    address is in flight at a time.
+    """
+    def __init__(self, timeout: float = 2, concurrency: int = 64):
+        """
+        :param timeout: Seconds to wait for a query to complete
+        :param concurrency: Maximum number of queries in flight
+        """
+        self._timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._endpoints: dict[int, asyncio.DatagramTransport] = {}
+        self._endpoint_lock = asyncio.Lock()
+        self._address_locks: dict[_Address, asyncio.Lock] = {}
+        self._pending: dict[_Address, asyncio.Future[bytes]] = {}
+
+    async def query(self, server: Server) -> ServerInfo:
+        """
+        Queries the game port of the server.
+
+        :param server: Server to query
+        :return: Information reported by the server
+        :raises TimeoutError: Server did not respond in time
+        :raises InvalidQueryResponseError: Server responded with malformed data
+        :raises OSError: Server address could not be resolved or reached
+        """
+        async with self._semaphore, asyncio.timeout(self._timeout):
+            family, address = await self._resolve(server.host, server.port)
+            transport = await self._endpoint(family)
+            async with self._address_locks.setdefault(address, asyncio.Lock()):
+                if server.type == Server.Type.MINECRAFT_SERVER:
+                    return await self._query_minecraft(transport, address)
+                return await self._query_source(transport, address)
+
+    def close(self):
+        """Closes sockets of the client."""
+        for transport in self._endpoints.values():
+            transport.close()
+        self._endpoints.clear()
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+
+    def datagram_received(self, data: bytes, address: _Address):
+        """Resolves the query waiting for response from given address."""
+        future = self._pending.get(address)
+        if future is None or future.done():
+            logger.debug("Dropping unexpected datagram from %s", address)
+            return
+        future.set_result(data)
+
+    async def _query_minecraft(
+            self,
+            transport: asyncio.DatagramTransport,
+            address: _Address,
+    ) -> ServerInfo:
+        session = minecraft.session_id(random.getrandbits(32))
+        data = await self._exchange(transport, address, minecraft.handshake_request(session))
+        token = minecraft.parse_handshake_response(data, session)
+        data = await self._exchange(transport, address, minecraft.full_stat_request(session, token))
+        return minecraft.parse_full_stat_response(data, session)
+
+    async def _query_source(
+            self,
+            transport: asyncio.DatagramTransport,
+            address: _Address,
+    ) -> ServerInfo:
+        challenge: Optional[bytes] = None
+        # Server may ask for a challenge once, then it has to respond with the info
+        for _ in range(2):
+            data = await self._exchange(transport, address, source.info_request(challenge))
+            result = source.parse_info_response(data)
+            if isinstance(result, ServerInfo):
+                return result
+            challenge = result
+        raise InvalidQueryResponseError("Server repeatedly requested a challenge")
+
+    async def _exchange(
+            self,
+            transport: asyncio.DatagramTransport,
+            address: _Address,
+            request: bytes,
+    ) -> bytes:
+        future = asyncio.get_running_loop().create_future()
+        self._pending[address] = future
+        try:
+            transport.sendto(request, address)
+            return await future
+        finally:
+            del self._pending[address]
+
+    async def _resolve(self, host: str, port: int) -> tuple[int, _Address]:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host,
+            port,
+            type=socket.SOCK_DGRAM,
+        )
+        if not infos:
+            raise OSError(f"Could not resolve {host}")
+        family, _, _, _, sockaddr = infos[0]
+        return family, (sockaddr[0], sockaddr[1])
+
+    async def _endpoint(self, family: int) -> asyncio.DatagramTransport:
+        async with self._endpoint_lock:
+            transport = self._endpoints.get(family)
+            if transport is None or transport.is_closing():
+                transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+                    lambda: _QueryProtocol(self),
+                    family=family,
+                )
+                self._endpoints[family] = transport
+            return transport
@@ -0,0 +1,21 @@
+"""Information about game servers obtained by querying their game port."""
+from dataclasses import dataclass
+
+
+@dataclass(eq=True, frozen=True)
+class ServerInfo:
+    """Server information reported by the game server."""
+    name: str
+    players: int
+    max_players: int
+    map: str
+    version: str
+
+
+class InvalidQueryResponseError(Exception):
+    """Game server responded with malformed or unexpected data."""
+    def __init__(self, message: str):
+        self.message = message
+
+    def __str__(self):
+        return self.message
@@ -0,0 +1,74 @@
+"""
+Minecraft Query protocol.
+
+Requires enable-query=true in server.properties. See https://wiki.vg/Query
+"""
+import struct
+
+from query.info import ServerInfo, InvalidQueryResponseError
+
+_MAGIC = b"\xFE\xFD"
+_HANDSHAKE_TYPE = 9
+_STAT_TYPE = 0
+# Constant padding preceding key-value section of the full stat response
+_STAT_PADDING = b"splitnum\x00\x80\x00"
+_PLAYERS_SECTION = b"\x00\x01player_\x00\x00"
+
+
+def session_id(value: int) -> int:
+    """Returns a valid session id - only lower 4 bits of each byte are used by the server."""
+    return value & 0x0F0F0F0F
+
+
+def handshake_request(session: int) -> bytes:
+    """Encodes handshake request obtaining challenge token."""
+    return _MAGIC + struct.pack(">Bi", _HANDSHAKE_TYPE, session)
+
+
+def parse_handshake_response(data: bytes, session: int) -> int:
+    """
+    Decodes handshake response.
+
+    :return: Challenge token
+    """
+    _check_header(data, _HANDSHAKE_TYPE, session)
+    try:
+        return int(data[5:].rstrip(b"\x00"))
+    except ValueError as e:
+        raise InvalidQueryResponseError("Invalid challenge token") from e
+
+
+def full_stat_request(session: int, token: int) -> bytes:
+    """Encodes full stat request."""
+    return _MAGIC + struct.pack(">BiI", _STAT_TYPE, session, token & 0xFFFFFFFF) + b"\x00" * 4
+
+
+def parse_full_stat_response(data: bytes, session: int) -> ServerInfo:
+    """Decodes full stat response."""
+    _check_header(data, _STAT_TYPE, session)
+    body = data[5:]
+    if not body.startswith(_STAT_PADDING):
+        raise InvalidQueryResponseError("Missing full stat padding")
+
+    kv_section, _, _ = body[len(_STAT_PADDING):].partition(_PLAYERS_SECTION)
+    items = kv_section.decode("utf-8", errors="replace").split("\x00")
+    values = dict(zip(items[0::2], items[1::2]))
+
+    try:
+        return ServerInfo(
+            name=values.get("hostname", ""),
+            players=int(values["numplayers"]),
+            max_players=int(values["maxplayers"]),
+            map=values.get("map", ""),
+            version=values.get("version", ""),
+        )
+    except (KeyError, ValueError) as e:
+        raise InvalidQueryResponseError("Missing player counts") from e
+
+
+def _check_header(data: bytes, packet_type: int, session: int):
+    if len(data) < 5:
+        raise InvalidQueryResponseError("Response too short")
+    resp_type, resp_session = struct.unpack_from(">Bi", data)
+    if resp_type != packet_type or resp_session != session:
+        raise InvalidQueryResponseError("Unexpected response type or session")
@@ -0,0 +1,65 @@
+"""
+Source A2S_INFO query protocol.
+
+See https://developer.valvesoftware.com/wiki/Server_queries#A2S_INFO
+"""
+import struct
+from typing import Optional
+
+from query.info import ServerInfo, InvalidQueryResponseError
+
+_SINGLE_PACKET = b"\xFF\xFF\xFF\xFF"
+_INFO_REQUEST = _SINGLE_PACKET + b"TSource Engine Query\x00"
+_CHALLENGE_TYPE = 0x41
+_INFO_TYPE = 0x49
+
+
+def info_request(challenge: Optional[bytes] = None) -> bytes:
+    """Encodes A2S_INFO request, with challenge if the server requested one."""
+    return _INFO_REQUEST + (challenge or b"")
+
+
+def parse_info_response(data: bytes) -> ServerInfo | bytes:
+    """
+    Decodes A2S_INFO response.
+
+    :return: Server information or challenge the request must be repeated with
+    """
+    if len(data) < 5 or not data.startswith(_SINGLE_PACKET):
+        raise InvalidQueryResponseError("Not a single packet response")
+
+    if data[4] == _CHALLENGE_TYPE and len(data) >= 9:
+        return data[5:9]
+    if data[4] == _INFO_TYPE:
+        return _parse_info(data)
+    raise InvalidQueryResponseError("Unexpected response type")
+
+
+def _parse_info(data: bytes) -> ServerInfo:
+    try:
+        # Header and protocol version
+        offset = 6
+        name, offset = _read_string(data, offset)
+        map_name, offset = _read_string(data, offset)
+        _, offset = _read_string(data, offset)  # folder
+        _, offset = _read_string(data, offset)  # game
+        # Steam application id, players, max players, bots, server type, environment,
+        # visibility and VAC flags
+        _, players, max_players = struct.unpack_from("<hBB", data, offset)
+        offset += 9
+        version, _ = _read_string(data, offset)
+    except (ValueError, struct.error) as e:
+        raise InvalidQueryResponseError("Truncated A2S_INFO response") from e
+
+    return ServerInfo(
+        name=name,
+        players=players,
+        max_players=max_players,
+        map=map_name,
+        version=version,
+    )
+
+
+def _read_string(data: bytes, offset: int) -> tuple[str, int]:
+    end = data.index(b"\x00", offset)
+    return data[offset:end].decode("utf-8", errors="replace"), end + 1
@@ -0,0 +1,74 @@
+"""Server query client tests."""
+# pylint: disable=missing-class-docstring
+
+import unittest
+
+from models.server import Server
+from query.client import QueryClient
+from query.info import ServerInfo
+from utils.testing import FakeQueryServer, sample_server
+
+INFO = ServerInfo(
+    name="A Minecraft Server",
+    players=3,
+    max_players=20,
+    map="world",
+    version="1.20.4",
+)
+
+
+class QueryClientTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = QueryClient(timeout=0.5, concurrency=4)
+        self.fake_servers: list[FakeQueryServer] = []
+
+    async def asyncTearDown(self):
+        self.client.close()
+        for fake in self.fake_servers:
+            fake.close()
+
+    async def _serve(self, fake: FakeQueryServer, server_type: Server.Type) -> Server:
+        self.fake_servers.append(fake)
+        server = sample_server(server_type)
+        server.host = "127.0.0.1"
+        server.port = await fake.start()
+        return server
+
+    async def test_minecraft_query(self):
+        """Tests Minecraft server is queried using handshake and full stat."""
+        fake = FakeQueryServer(INFO)
+        server = await self._serve(fake, Server.Type.MINECRAFT_SERVER)
+
+        self.assertEqual(INFO, await self.client.query(server))
+        self.assertEqual(2, len(fake.requests))
+
+    async def test_source_query_with_challenge(self):
+        """Tests A2S_INFO request is repeated with the challenge sent by the server."""
+        fake = FakeQueryServer(INFO, Server.Type.SOURCE_SERVER, challenge=b"\x01\x02\x03\x04")
+        server = await self._serve(fake, Server.Type.SOURCE_SERVER)
+
+        self.assertEqual(INFO, await self.client.query(server))
+        self.assertEqual(2, len(fake.requests))
+        self.assertTrue(fake.requests[1].endswith(b"\x01\x02\x03\x04"))
+
+    async def test_shared_socket(self):
+        """Tests queries of multiple servers share a single socket."""
+        other_info = ServerInfo("Other", 0, 10, "de_dust2", "1.0")
+        minecraft = await self._serve(FakeQueryServer(INFO), Server.Type.MINECRAFT_SERVER)
+        source = await self._serve(
+            FakeQueryServer(other_info, Server.Type.SOURCE_SERVER),
+            Server.Type.SOURCE_SERVER,
+        )
+
+        self.assertEqual(INFO, await self.client.query(minecraft))
+        self.assertEqual(other_info, await self.client.query(source))
+        self.assertEqual(1, len(self.client._endpoints))  # pylint: disable=protected-access
+
+    async def test_timeout(self):
+        """Tests query of a server that does not respond times out."""
+        fake = FakeQueryServer(INFO)
+        fake.muted = True
+        server = await self._serve(fake, Server.Type.MINECRAFT_SERVER)
+
+        with self.assertRaises(TimeoutError):
+            await self.client.query(server)
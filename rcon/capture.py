@@ -0,0 +1,162 @@
+"""
+Capture of RCON traffic to files.
+
+Capture file starts with a header (magic, format version and server type) followed
+by records. Each record is a header (monotonic timestamp, direction, connection id
+and data length) followed by the raw data - a single received packet frame or all
+frames sent in a single write. Capture files are rotated when they reach their
+maximal size, only a given number of rotated files is kept.
+"""
+import logging
+import os
+import struct
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import BinaryIO, Callable, Iterator, Optional
+
+from models.server import Server
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"RCAP"
+_VERSION = 1
+_file_header = struct.Struct("<4sBB")
+_record_header = struct.Struct("<dBHI")
+
+
+class Direction(IntEnum):
+    """Direction of captured data."""
+    RECEIVED = 0
+    SENT = 1
+
+
+@dataclass(frozen=True)
+class CaptureRecord:
+    """Data received or sent over a connection."""
+    # Monotonic time in seconds
+    timestamp: float
+    direction: Direction
+    # Identifies the connection within the capture
+    connection: int
+    data: bytes
+
+
+# pylint: disable-next=too-many-instance-attributes
+class CaptureWriter:
+    """
+    Writes captured traffic of RCON connections to a server.
+
+    Once the file reaches max_file_size bytes, it is renamed to path.1 (the older
+    ones to path.2 and so on) and a new file is started. At most max_files files
+    are kept, older ones are deleted.
+    """
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+            self,
+            path: str,
+            server_type: Server.Type,
+            max_file_size: int = 16 * 2 ** 20,
+            max_files: int = 4,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param path: Path of the current capture file
+        :param server_type: Type of the captured server, determines payload encoding
+        :param max_file_size: Size in bytes at which the file is rotated
+        :param max_files: Maximal number of capture files including the current one
+        :param clock: Monotonic clock in seconds
+        """
+        self._path = path
+        self._server_type = server_type
+        self._max_file_size = max_file_size
+        self._max_files = max_files
+        self._clock = clock
+        self._file: Optional[BinaryIO] = None
+        self._size = 0
+        self._connections = 0
+
+    def connection_id(self) -> int:
+        """Returns id of a new captured connection."""
+        self._connections = (self._connections + 1) % 2 ** 16
+        return self._connections
+
+    def record(self, connection: int, direction: Direction, data: bytes):
+        """Writes a record of data received or sent over the connection."""
+        size = _record_header.size + len(data)
+        if self._file is None:
+            self._open()
+        elif self._size + size > self._max_file_size:
+            self._rotate()
+        self._file.write(_record_header.pack(self._clock(), direction, connection, len(data)))
+        self._file.write(data)
+        self._size += size
+
+    def close(self):
+        """Flushes and closes the current file."""
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        # Appends to the capture left by a previous run
+        # pylint: disable-next=consider-using-with
+        self._file = open(self._path, "ab", buffering=65536)
+        self._size = self._file.tell()
+        if not self._size:
+            self._file.write(_file_header.pack(_MAGIC, _VERSION, self._server_type.value))
+            self._size = _file_header.size
+
+    def _rotate(self):
+        self.close()
+        for i in range(self._max_files - 1, 0, -1):
+            older = f"{self._path}.{i}"
+            if not os.path.exists(older):
+                continue
+            if i == self._max_files - 1:
+                os.remove(older)
+            else:
+                os.replace(older, f"{self._path}.{i + 1}")
+        if self._max_files > 1:
+            os.replace(self._path, f"{self._path}.1")
+        logger.debug("Rotated RCON capture %s", self._path)
+        self._open()
+
+
+def capture_files(path: str) -> list[str]:
+    """Returns existing files of a rotated capture from the oldest one."""
+    rotated = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        rotated.append(f"{path}.{i}")
+        i += 1
+    return list(reversed(rotated)) + ([path] if os.path.exists(path) else [])
+
+
+def read_capture(path: str) -> tuple[Server.Type, Iterator[CaptureRecord]]:
+    """
+    Reads a single capture file.
+
+    :param path: Capture file
+    :raises ValueError: File is not a capture file
+    :return: Type of the captured server and records of the file
+    """
+    with open(path, "rb") as file:
+        magic, version, server_type = _file_header.unpack(file.read(_file_header.size))
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"{path} is not a RCON capture")
+
+    def records() -> Iterator[CaptureRecord]:
+        with open(path, "rb") as file:
+            file.seek(_file_header.size)
+            while header := file.read(_record_header.size):
+                if len(header) < _record_header.size:
+                    # Capture was not closed properly
+                    return
+                timestamp, direction, connection, length = _record_header.unpack(header)
+                data = file.read(length)
+                if len(data) < length:
+                    return
+                yield CaptureRecord(timestamp, Direction(direction), connection, data)
+
+    return Server.Type(server_type), records()
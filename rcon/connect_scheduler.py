@@ -0,0 +1,125 @@
+"""Scheduling of connection attempts to RCON servers."""
+import asyncio
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from rcon.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ConnectState:
+    """Connection attempts to a server that did not succeed yet."""
+    # Number of failed attempts
+    failures: int = 0
+    # Time of the next attempt, None while an attempt is in progress or waiting for a slot
+    next_attempt_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+
+class ConnectScheduler:
+    """
+    Schedules connection attempts of all RCON services.
+
+    At most max_concurrent connects (including login) are in progress at a time,
+    so services launched together connect in a staggered way. Failed attempts are
+    retried after a decorrelated jitter backoff. All retries draw from a shared
+    retry budget, so a network failure affecting many servers does not result in
+    a storm of reconnects. Reconnects of dropped connections draw from the budget
+    from their first attempt.
+    """
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+            self,
+            max_concurrent: int = 8,
+            backoff: float = 1,
+            max_backoff: float = 240,
+            retry_rate: float = 2,
+            retry_burst: int = 20,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param max_concurrent: Maximal number of connects in progress
+        :param backoff: Minimal number of seconds between attempts to connect to a server
+        :param max_backoff: Maximal number of seconds between attempts to connect to a server
+        :param retry_rate: Retries per second allowed across all servers
+        :param retry_burst: Retries allowed across all servers at once
+        :param clock: Monotonic clock in seconds
+        """
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._budget = TokenBucket(retry_rate, retry_burst, clock)
+        self._states: dict[uuid.UUID, ConnectState] = {}
+
+    async def connect[OutT](
+            self,
+            key: uuid.UUID,
+            coro: Callable[[], Awaitable[OutT]],
+            exc_types: tuple[type[Exception], ...],
+            retry: bool = False,
+    ) -> OutT:
+        """
+        Connects using the coroutine, retrying until it succeeds.
+
+        :param key: Server the connection is made to
+        :param coro: Coroutine supplier making the connection
+        :param exc_types: Exception types to retry on
+        :param retry: Connection replaces a dropped one, its first attempt is a retry
+        :return: Result of the coroutine
+        """
+        state = ConnectState()
+        self._states[key] = state
+        delay = self._backoff
+        try:
+            if retry:
+                await self._wait(state, 0)
+            while True:
+                async with self._semaphore:
+                    state.next_attempt_at = None
+                    try:
+                        return await coro()
+                    except exc_types as e:
+                        state.failures += 1
+                        state.last_error = str(e) or type(e).__name__
+
+                delay = self._next_delay(delay)
+                await self._wait(state, delay)
+                logger.info("Retrying connection to %s, attempt %d.", key, state.failures + 1)
+        finally:
+            if self._states.get(key) is state:
+                del self._states[key]
+
+    def state(self, key: uuid.UUID) -> Optional[ConnectState]:
+        """
+        Returns state of connection attempts to the server.
+
+        :param key: Server
+        :return: State, None if the server is not being connected to
+        """
+        return self._states.get(key)
+
+    def states(self, keys: set[uuid.UUID]) -> dict[uuid.UUID, ConnectState]:
+        """Returns states of connection attempts to servers being connected to."""
+        return {key: self._states[key] for key in keys if key in self._states}
+
+    def _next_delay(self, previous: float) -> float:
+        # Decorrelated jitter - random delay between the minimum and thrice the previous delay
+        return min(self._max_backoff, random.uniform(self._backoff, previous * 3))
+
+    async def _wait(self, state: ConnectState, delay: float):
+        while True:
+            if delay:
+                state.next_attempt_at = datetime.now() + timedelta(seconds=delay)
+                logger.info("Next connection attempt in %.1f seconds.", delay)
+                await asyncio.sleep(delay)
+            delay = self._budget.delay()
+            if not delay:
+                self._budget.take()
+                return
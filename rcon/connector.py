@@ -0,0 +1,238 @@
+"""Opening of TCP connections to RCON hosts."""
+import asyncio
+import logging
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Resolved address family and socket address
+Address = tuple[int, tuple]
+
+
+@dataclass
+class LatencyStats:
+    """Aggregated latency of an operation."""
+    count: int = 0
+    failures: int = 0
+    # Total and maximal latency of successful operations in seconds
+    total: float = 0
+    max: float = 0
+
+    def record(self, seconds: float):
+        """Records latency of a successful operation."""
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> float:
+        """Mean latency of successful operations in seconds."""
+        return self.total / self.count if self.count else 0
+
+
+@dataclass
+class ConnectorStats:
+    """Statistics of resolutions and connects."""
+    resolutions: LatencyStats = field(default_factory=LatencyStats)
+    connects: LatencyStats = field(default_factory=LatencyStats)
+    cache_hits: int = 0
+
+
+# pylint: disable-next=too-many-instance-attributes
+class Connector:
+    """
+    Opens TCP connections to RCON hosts.
+
+    Resolved addresses are cached for ttl seconds, failed resolutions for negative_ttl
+    seconds, so reconnect attempts do not resolve the host again. Cached addresses
+    are dropped early only after max_connect_failures connects in a row failed to
+    all of them. Concurrent resolutions of the same host are shared. When a host
+    has multiple addresses, connects to them are raced Happy Eyeballs style
+    (RFC 8305) - next address is tried when the previous did not connect within
+    happy_eyeballs_delay seconds.
+
+    Statistics of resolutions and connects are logged every log_interval seconds
+    while connections are opened.
+    """
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+            self,
+            ttl: float = 300,
+            negative_ttl: float = 10,
+            happy_eyeballs_delay: float = 0.25,
+            max_connect_failures: int = 3,
+            log_interval: float = 300,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param ttl: Seconds resolved addresses are cached for
+        :param negative_ttl: Seconds failed resolutions are cached for
+        :param happy_eyeballs_delay: Seconds to wait for a connect before trying next address
+        :param max_connect_failures: Failed connects in a row after which the host is resolved
+            again before its cached addresses expire
+        :param log_interval: Seconds between logs of the statistics, 0 to log none
+        :param clock: Monotonic clock in seconds
+        """
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._happy_eyeballs_delay = happy_eyeballs_delay
+        self._max_connect_failures = max_connect_failures
+        self._log_interval = log_interval
+        self._clock = clock
+        # Resolved addresses or resolution error with expiration time
+        self._cache: dict[tuple[str, int], tuple[float, list[Address] | OSError]] = {}
+        self._resolving: dict[tuple[str, int], asyncio.Task[list[Address]]] = {}
+        # Failed connects in a row to cached addresses of each host
+        self._connect_failures: dict[tuple[str, int], int] = {}
+        self._logged_at = clock()
+        self.stats = ConnectorStats()
+
+    async def connect(self, host: str, port: int) -> socket.socket:
+        """
+        Opens a connection to the host.
+
+        :param host: Host name or address
+        :param port: TCP port
+        :raises OSError: Host could not be resolved or none of its addresses connected
+        :return: Connected non-blocking socket
+        """
+        addresses = await self.resolve(host, port)
+        started = self._clock()
+        key = (host, port)
+        try:
+            sock = await self._race(addresses)
+        except OSError:
+            self.stats.connects.failures += 1
+            self._connect_failures[key] = self._connect_failures.get(key, 0) + 1
+            if self._connect_failures[key] >= self._max_connect_failures:
+                # Addresses of the host might have changed
+                self.invalidate(host, port)
+            self._log_stats()
+            raise
+        self._connect_failures.pop(key, None)
+        self.stats.connects.record(self._clock() - started)
+        self._log_stats()
+        return sock
+
+    async def resolve(self, host: str, port: int) -> list[Address]:
+        """
+        Resolves TCP addresses of the host, using cached addresses when possible.
+
+        :raises OSError: Host could not be resolved
+        """
+        key = (host, port)
+        cached = self._cache.get(key)
+        if cached and cached[0] > self._clock():
+            self.stats.cache_hits += 1
+            if isinstance(cached[1], OSError):
+                raise cached[1]
+            return cached[1]
+
+        task = self._resolving.get(key)
+        if task is None:
+            task = asyncio.create_task(self._resolve(host, port))
+            self._resolving[key] = task
+            task.add_done_callback(lambda _: self._resolving.pop(key, None))
+        return await asyncio.shield(task)
+
+    def invalidate(self, host: str, port: int):
+        """Removes cached addresses of the host, e.g. when none of them connected."""
+        self._cache.pop((host, port), None)
+        self._connect_failures.pop((host, port), None)
+
+    def _log_stats(self):
+        if not self._log_interval or self._clock() - self._logged_at < self._log_interval:
+            return
+        self._logged_at = self._clock()
+        resolutions, connects = self.stats.resolutions, self.stats.connects
+        logger.info(
+            "RCON hosts resolved %d times (mean %.3fs, max %.3fs, %d failed, %d cache hits), "
+            "connected %d times (mean %.3fs, max %.3fs, %d failed).",
+            resolutions.count,
+            resolutions.mean,
+            resolutions.max,
+            resolutions.failures,
+            self.stats.cache_hits,
+            connects.count,
+            connects.mean,
+            connects.max,
+            connects.failures,
+        )
+
+    async def _resolve(self, host: str, port: int) -> list[Address]:
+        started = self._clock()
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host,
+                port,
+                type=socket.SOCK_STREAM,
+            )
+        except OSError as e:
+            self.stats.resolutions.failures += 1
+            self._cache[(host, port)] = (self._clock() + self._negative_ttl, e)
+            raise
+        elapsed = self._clock() - started
+        self.stats.resolutions.record(elapsed)
+        logger.debug("Resolved %s in %.3fs", host, elapsed)
+
+        addresses = _interleave([(family, sockaddr) for family, _, _, _, sockaddr in infos])
+        self._cache[(host, port)] = (self._clock() + self._ttl, addresses)
+        return addresses
+
+    async def _race(self, addresses: list[Address]) -> socket.socket:
+        pending: set[asyncio.Task[socket.socket]] = set()
+        errors: list[OSError] = []
+        remaining = list(addresses)
+        try:
+            while remaining or pending:
+                if remaining:
+                    pending.add(asyncio.create_task(_connect(*remaining.pop(0))))
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self._happy_eyeballs_delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+        finally:
+            for task in pending:
+                task.cancel()
+            # Close sockets of attempts that connected after the winner
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(result, socket.socket):
+                    result.close()
+        if not errors:
+            raise OSError("No addresses to connect to")
+        if len(errors) == 1:
+            raise errors[0]
+        raise OSError(f"Multiple exceptions: {', '.join(str(e) for e in errors)}")
+
+
+async def _connect(family: int, sockaddr: tuple) -> socket.socket:
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, sockaddr)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def _interleave(addresses: list[Address]) -> list[Address]:
+    """Orders addresses alternating address families, starting with the first family."""
+    by_family: dict[int, list[Address]] = {}
+    for address in addresses:
+        by_family.setdefault(address[0], []).append(address)
+    ordered = []
+    queues = list(by_family.values())
+    while any(queues):
+        for queue in queues:
+            if queue:
+                ordered.append(queue.pop(0))
+    return ordered
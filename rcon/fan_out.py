@@ -0,0 +1,102 @@
+"""Execution of a command on many servers at once."""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+from messages.rcon import RconCommand
+from models.server import Server
+from rcon.rcon_client_errors import ConnectionClosedError
+from rcon.rcon_service import RconExecutor
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FanOutResult:
+    """Outcome of the command on a single server."""
+    server_uid: uuid.UUID
+    server_name: str
+    # Response of the server, None if the command failed
+    response: Optional[str]
+    # Reason the command failed
+    error: Optional[str]
+    # Seconds from dispatching the command to the server to its response
+    elapsed: float
+
+
+class FanOutExecutor:
+    """
+    Executes a command on many servers concurrently.
+
+    Commands are executed through the running RCON services of the servers.
+    At most concurrency servers are waited for at a time.
+    """
+    def __init__(
+            self,
+            service_lookup: Callable[[uuid.UUID], Optional[RconExecutor]],
+            concurrency: int,
+            timeout: float,
+    ):
+        """
+        :param service_lookup: Returns running RCON service of a server
+        :param concurrency: Maximal number of servers the command is in flight on
+        :param timeout: Seconds to wait for response of each server
+        """
+        self._service_lookup = service_lookup
+        self._concurrency = concurrency
+        self._timeout = timeout
+
+    async def execute(
+            self,
+            msg: RconCommand,
+            servers: Iterable[Server],
+    ) -> AsyncIterator[FanOutResult]:
+        """
+        Executes the command on given servers.
+
+        :param msg: Command to execute
+        :param servers: Servers to execute the command on
+        :return: Results in order the servers answered
+        """
+        semaphore = asyncio.Semaphore(self._concurrency)
+        tasks = [
+            asyncio.create_task(self._execute_on(semaphore, msg, server))
+            for server in servers
+        ]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _execute_on(
+            self,
+            semaphore: asyncio.Semaphore,
+            msg: RconCommand,
+            server: Server,
+    ) -> FanOutResult:
+        async with semaphore:
+            started = time.perf_counter()
+            service = self._service_lookup(server.uid)
+            response, error = None, None
+            try:
+                if service is None:
+                    raise ConnectionClosedError()
+                response = (await service.execute(msg, self._timeout)).response
+            except TimeoutError:
+                error = "Timed out"
+            except ConnectionClosedError:
+                error = "Not connected to RCON"
+            if error:
+                logger.debug("Command %s on server %s failed: %s", msg.command, server.name, error)
+            return FanOutResult(
+                server.uid,
+                server.name,
+                response,
+                error,
+                time.perf_counter() - started,
+            )
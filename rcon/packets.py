@@ -1,6 +1,7 @@
 """RCON communication packets."""
 import struct
 from abc import ABC, abstractmethod
+from collections.abc import Buffer
 from dataclasses import dataclass
 from typing import Callable, Awaitable
 
@@ -159,6 +160,43 @@ decoders: dict[int, Callable[[int, bytes], RconResponsePacket]] = {
 }
 
 
+# Request id, packet type and two padding bytes
+MIN_PACKET_LENGTH = 10
+
+_length_struct = struct.Struct("<i")
+_header_struct = struct.Struct("<ii")
+
+
+def unpack_length(buffer: Buffer, offset: int = 0) -> int:
+    """
+    Reads the length prefix of a packet.
+
+    :param buffer: Buffer containing the length prefix
+    :param offset: Offset of the length prefix in the buffer
+    :return: Length of the packet body following the prefix
+    """
+    (data_length,) = _length_struct.unpack_from(buffer, offset)
+    return data_length
+
+
+def unpack_packet(buffer: Buffer, offset: int, data_length: int) -> RconResponsePacket:
+    """
+    Decodes a packet body in place.
+
+    Only the payload is copied out of the buffer.
+
+    :param buffer: Buffer containing the packet body
+    :param offset: Offset of the packet body (right after the length prefix)
+    :param data_length: Length of the packet body
+    :return: Decoded packet
+    """
+    req_id, res_type = _header_struct.unpack_from(buffer, offset)
+    end = offset + data_length
+    with memoryview(buffer) as view:
+        payload = bytes(view[offset + 8:end - 2])
+        return _decode(res_type, req_id, payload, view[end - 2:end])
+
+
 async def next_packet(
         read_n: Callable[[int], Awaitable[bytes]],
 ):
@@ -169,20 +207,17 @@ async def next_packet(
     :return:
     """
     len_bytes = await read_n(4)
-    (data_length,) = struct.unpack("<i", len_bytes)
+    data_length = unpack_length(len_bytes)
     data_bytes = await read_n(data_length)
-    req_id, res_type = struct.unpack("<ii", data_bytes[0:8])
-    payload = data_bytes[8:-2]
-    padding = data_bytes[-2:]
 
-    return _decode(res_type, req_id, payload, padding)
+    return unpack_packet(data_bytes, 0, data_length)
 
 
 def _decode(
         packet_type: int,
         request_id: int,
         payload: bytes,
-        padding: bytes
+        padding: Buffer
 ) -> RconResponsePacket:
     if padding != b"\x00\x00":
         return UnprocessableResponse(request_id, "Padding mismatch")
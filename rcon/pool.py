@@ -0,0 +1,174 @@
+"""Pool of RCON connections to a single server."""
+import asyncio
+import logging
+from typing import Callable, Awaitable, Optional
+
+from messages.rcon import RconCommand, RconResponse, RconResponseChunk
+from models.server import Server
+from rcon.rcon_client import RconClient, CommandResult
+from rcon.rcon_client_errors import ConnectionClosedError
+
+logger = logging.getLogger(__name__)
+
+
+class RconClientPool:
+    """
+    Pool of authenticated connections to the RCON of a single server.
+
+    Commands are dispatched to the connection with the fewest commands waiting for
+    a response. Commands of a user go to the same connection as the user's commands
+    still waiting for a response, so the order of a user's commands is kept.
+    Failed connections are closed and replaced in the background.
+    """
+    def __init__(
+            self,
+            client: RconClient,
+            size: int,
+            connect: Callable[[], Awaitable[RconClient]],
+    ):
+        """
+        :param client: Already connected client
+        :param size: Number of connections to keep open
+        :param connect: Opens a new connection (retrying on failure)
+        """
+        self._clients = [client]
+        self._server = client.server
+        self._size = size
+        self._connect = connect
+
+    async def send_command(self, msg: RconCommand):
+        """Sends a command to the RCON using the least busy connection."""
+        await self._pick(msg.issuing_user).send_command(msg)
+
+    async def send_commands(self, msgs: list[RconCommand]):
+        """Sends commands to the RCON, commands of each user in a single write."""
+        by_user: dict[str, list[RconCommand]] = {}
+        for msg in msgs:
+            by_user.setdefault(msg.issuing_user, []).append(msg)
+        for user, user_msgs in by_user.items():
+            await self._pick(user).send_commands(user_msgs)
+
+    async def execute(
+            self,
+            msg: RconCommand,
+            timeout: Optional[float] = None,
+            silent: bool = False,
+    ) -> RconResponse:
+        """Executes a command using the least busy connection. See RconClient.execute."""
+        return await self._pick(msg.issuing_user).execute(msg, timeout, silent)
+
+    async def execute_batch(
+            self,
+            msgs: list[RconCommand],
+            timeout: Optional[float] = None,
+            silent: bool = False,
+    ) -> list[CommandResult]:
+        """
+        Executes commands pipelined over a single connection. See RconClient.execute_batch.
+
+        All commands go over one connection, so they are executed in order.
+        """
+        user = msgs[0].issuing_user if msgs else ""
+        return await self._pick(user).execute_batch(msgs, timeout, silent)
+
+    async def probe(self, timeout: float) -> float:
+        """
+        Sends keepalive probes over all pooled connections. See RconClient.probe.
+
+        Connections that do not answer are closed and replaced.
+
+        :return: Round-trip time of the slowest connection that answered
+        :raises KeepaliveTimeoutError: No connection answered in time
+        """
+        results = await asyncio.gather(
+            *(client.probe(timeout) for client in list(self._clients)),
+            return_exceptions=True,
+        )
+        latencies = [r for r in results if isinstance(r, float)]
+        if latencies:
+            return max(latencies)
+        for result in results:
+            raise result
+        raise ConnectionClosedError()
+
+    async def read(
+            self,
+            on_response: Callable[[RconResponse], None],
+            on_error: Callable[[str], None] | None = None,
+            on_chunk: Callable[[RconResponseChunk], None] | None = None,
+    ):
+        """
+        Coroutine that reads responses from all pooled connections.
+
+        Keeps the pool filled - failed connections are replaced by new ones.
+        Fails when the last open connection fails.
+        """
+        readers: dict[asyncio.Task, RconClient] = {}
+        connecting: set[asyncio.Task] = set()
+
+        def start_reading(client: RconClient):
+            readers[asyncio.create_task(client.read(on_response, on_error, on_chunk))] = client
+
+        for client in self._clients:
+            start_reading(client)
+        for _ in range(self._size - len(self._clients)):
+            connecting.add(asyncio.create_task(self._connect()))
+
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    readers.keys() | connecting,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task in connecting:
+                        connecting.remove(task)
+                        client = task.result()
+                        self._clients.append(client)
+                        start_reading(client)
+                        continue
+
+                    client = readers.pop(task)
+                    self._clients.remove(client)
+                    client.close()
+                    if not self._clients:
+                        raise task.exception() or ConnectionClosedError()
+                    logger.warning(
+                        "Pooled connection to RCON %s failed (%s), replacing it. %d of %d open.",
+                        self._server.name,
+                        task.exception(),
+                        len(self._clients),
+                        self._size,
+                    )
+                    connecting.add(asyncio.create_task(self._connect()))
+        finally:
+            for task in readers.keys() | connecting:
+                task.cancel()
+
+    def close(self):
+        """Closes all pooled connections."""
+        for client in self._clients:
+            client.close()
+        self._clients.clear()
+
+    def has_pending_requests_of(self, user: str) -> bool:
+        """Checks if there are commands of given user waiting for a response."""
+        return any(client.has_pending_requests_of(user) for client in self._clients)
+
+    @property
+    def size(self) -> int:
+        """Number of currently open connections."""
+        return len(self._clients)
+
+    @property
+    def server(self) -> Server:
+        """Returns model of the server this pool is connected to."""
+        return self._server
+
+    def _pick(self, user: str) -> RconClient:
+        if not self._clients:
+            raise ConnectionClosedError()
+        for client in self._clients:
+            if client.has_pending_requests_of(user):
+                return client
+        return min(self._clients, key=lambda c: c.pending_requests)
@@ -0,0 +1,209 @@
+"""Buffered asyncio protocol decoding RCON packets in place."""
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Optional, override
+
+from rcon.packets import RconResponsePacket, MIN_PACKET_LENGTH, unpack_length, unpack_packet
+from rcon.rcon_client_errors import InvalidPacketError
+
+logger = logging.getLogger(__name__)
+
+# Upper bound of a single packet body, anything longer is treated as a corrupted stream
+MAX_PACKET_LENGTH = 1 << 20
+
+_MIN_READ_SIZE = 4096
+
+
+# pylint: disable-next=too-many-instance-attributes
+class RconBufferedProtocol(asyncio.BufferedProtocol):
+    """
+    Protocol reading RCON packets into a reusable receive buffer.
+
+    The event loop receives data directly into the buffer. Complete packets are
+    decoded in place and queued until they are read.
+    """
+    def __init__(self, buffer_size: int = 65536, max_queued_packets: int = 1024):
+        """
+        :param buffer_size: Initial size of the receive buffer
+        :param max_queued_packets: Number of decoded packets after which reading is paused
+        """
+        self._buffer = bytearray(buffer_size)
+        # Unparsed data is in self._buffer[self._start:self._end]
+        self._start = 0
+        self._end = 0
+        # Bytes missing to complete the packet at self._start
+        self._missing = 0
+        self._packets: deque[RconResponsePacket] = deque()
+        self._max_queued_packets = max_queued_packets
+        self._transport: Optional[asyncio.Transport] = None
+        self._read_waiter: Optional[asyncio.Future] = None
+        self._drain_waiter: Optional[asyncio.Future] = None
+        self._reading_paused = False
+        self._writing_paused = False
+        self._exception: Optional[Exception] = None
+        self._closed = False
+        # Called with raw frame of each decoded packet
+        self.on_frame: Optional[Callable[[bytes], None]] = None
+
+    @override
+    def connection_made(self, transport: asyncio.Transport):
+        self._transport = transport
+
+    @override
+    def connection_lost(self, exc: Optional[Exception]):
+        self._closed = True
+        if exc and not self._exception:
+            self._exception = exc
+        self._wake_reader()
+        self._wake_writer()
+
+    @override
+    def eof_received(self) -> bool:
+        # Let the transport close itself
+        return False
+
+    @override
+    def get_buffer(self, sizehint: int) -> memoryview:
+        self._reserve(max(self._missing, _MIN_READ_SIZE))
+        return memoryview(self._buffer)[self._end:]
+
+    @override
+    def buffer_updated(self, nbytes: int):
+        if self._exception:
+            # Stream is corrupted, discard anything received until the transport closes
+            return
+        self._end += nbytes
+        self._parse()
+
+        if self._packets:
+            self._wake_reader()
+        if len(self._packets) >= self._max_queued_packets and not self._reading_paused:
+            self._reading_paused = True
+            self._transport.pause_reading()
+
+    @override
+    def pause_writing(self):
+        self._writing_paused = True
+
+    @override
+    def resume_writing(self):
+        self._writing_paused = False
+        self._wake_writer()
+
+    async def read(self) -> RconResponsePacket:
+        """
+        Returns next decoded packet, waiting for it if necessary.
+
+        :raises IncompleteReadError: Connection was closed before next packet was received
+        """
+        while not self._packets:
+            if self._exception:
+                raise self._exception
+            if self._closed:
+                raise asyncio.IncompleteReadError(
+                    bytes(self._buffer[self._start:self._end]),
+                    None,
+                )
+            self._read_waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._read_waiter
+            finally:
+                self._read_waiter = None
+
+        packet = self._packets.popleft()
+        if self._reading_paused and len(self._packets) <= self._max_queued_packets // 2:
+            self._reading_paused = False
+            self._transport.resume_reading()
+        return packet
+
+    def write(self, data: bytes):
+        """Writes data to the transport."""
+        self._transport.write(data)
+
+    def writelines(self, data: list[bytes]):
+        """Writes a list of buffers to the transport."""
+        self._transport.writelines(data)
+
+    async def drain(self):
+        """Waits until the transport write buffer is below its high watermark."""
+        if self._exception:
+            raise self._exception
+        if self._closed:
+            raise ConnectionResetError("Connection lost")
+        if not self._writing_paused:
+            return
+        self._drain_waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self._drain_waiter
+        finally:
+            self._drain_waiter = None
+        if self._closed:
+            raise ConnectionResetError("Connection lost")
+
+    def is_closing(self) -> bool:
+        """Whether the transport is closed or being closed."""
+        return self._closed or self._transport is None or self._transport.is_closing()
+
+    def close(self):
+        """Closes the transport."""
+        if self._transport:
+            self._transport.close()
+
+    def _parse(self):
+        buffer = self._buffer
+        on_frame = self.on_frame
+        while True:
+            available = self._end - self._start
+            if available < 4:
+                self._missing = 4 - available
+                break
+
+            data_length = unpack_length(buffer, self._start)
+            if not MIN_PACKET_LENGTH <= data_length <= MAX_PACKET_LENGTH:
+                self._fail(InvalidPacketError(f"Invalid packet length {data_length}"))
+                return
+
+            if available < 4 + data_length:
+                self._missing = 4 + data_length - available
+                break
+
+            self._packets.append(unpack_packet(buffer, self._start + 4, data_length))
+            if on_frame is not None:
+                on_frame(bytes(buffer[self._start:self._start + 4 + data_length]))
+            self._start += 4 + data_length
+
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def _reserve(self, size: int):
+        """Makes sure at least size bytes are free at the end of the buffer."""
+        if len(self._buffer) - self._end >= size:
+            return
+
+        unparsed = self._end - self._start
+        if unparsed + size <= len(self._buffer):
+            # Move unparsed data to the start of the buffer
+            self._buffer[:unparsed] = self._buffer[self._start:self._end]
+        else:
+            # Buffer may still be exported by the transport - replace it instead of resizing
+            grown = bytearray(max(2 * len(self._buffer), unparsed + size))
+            grown[:unparsed] = self._buffer[self._start:self._end]
+            self._buffer = grown
+        self._start = 0
+        self._end = unparsed
+
+    def _fail(self, exc: Exception):
+        logger.warning("Closing RCON connection: %s", exc)
+        self._exception = exc
+        self._start = self._end = 0
+        self._wake_reader()
+        self.close()
+
+    def _wake_reader(self):
+        if self._read_waiter and not self._read_waiter.done():
+            self._read_waiter.set_result(None)
+
+    def _wake_writer(self):
+        if self._drain_waiter and not self._drain_waiter.done():
+            self._drain_waiter.set_result(None)
@@ -0,0 +1,298 @@
+"""Rate limiting of commands sent to RCON."""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Optional
+
+from messages.rcon import RconCommand
+from rcon.rcon_client_errors import ConnectionClosedError
+
+
+class TokenBucket:
+    """
+    Token bucket allowing rate tokens per second on average and bursts of up to burst tokens.
+    """
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        """
+        :param rate: Tokens added per second
+        :param burst: Maximal number of tokens
+        :param clock: Monotonic clock in seconds
+        """
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    @property
+    def tokens(self) -> float:
+        """Number of currently available tokens."""
+        now = self._clock()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        return self._tokens
+
+    def delay(self) -> float:
+        """Returns number of seconds until a token is available."""
+        return max(0.0, (1 - self.tokens) / self._rate)
+
+    def take(self):
+        """Takes a token, the token must be available."""
+        self._tokens -= 1
+
+
+class Admission(Enum):
+    """Outcome of submitting a command to the rate limiter."""
+    # Command is queued and will be sent without delay
+    ACCEPTED = 1
+    # Command is queued, but is delayed as the user started hitting the limit
+    THROTTLED = 2
+    # Command is queued, the user was already notified about being throttled
+    DELAYED = 3
+    # Queue of the user is full, the command was dropped
+    REJECTED = 4
+
+
+@dataclass
+class UserQueueStats:
+    """Commands of a user queued by the rate limiter."""
+    # Number of waiting commands
+    queued: int = 0
+    # Seconds the oldest waiting command waits for
+    oldest_wait: float = 0
+    # Number of released commands and seconds they waited in total
+    released: int = 0
+    total_wait: float = 0
+    # Mean seconds released commands waited for, a field so it is serialized with the others
+    mean_wait: float = field(init=False, default=0)
+
+    def __post_init__(self):
+        self.mean_wait = self.total_wait / self.released if self.released else 0
+
+
+@dataclass(frozen=True)
+class _Queued:
+    """Waiting command."""
+    # Virtual time the command is finished at, commands are released in its order
+    finish: float
+    sequence: int
+    arrived: float
+    msg: RconCommand
+    # Completed when a command executed by a caller is released, None for commands to send
+    release: Optional[asyncio.Future] = None
+
+
+# pylint: disable-next=too-many-instance-attributes
+class CommandRateLimiter:
+    """
+    Queues commands and releases them at the rate the server can handle.
+
+    Commands go through a bucket of the server and optionally a bucket of the user
+    who issued them. Users share the server by weighted fair queueing - each user
+    gets a share of released commands proportional to their weight, so a user
+    sending many commands does not hold back commands of the others. Commands with
+    priority are released before any other commands when the priority lane is on.
+    Commands of a user out of tokens do not hold back commands of other users.
+    Each user can have at most max_queued commands waiting.
+
+    Commands executed by callers are reserved - they wait in the same queues, but
+    the caller sends them when they are released instead of next_batch returning them.
+    """
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+            self,
+            rate: float,
+            burst: int,
+            user_rate: Optional[float] = None,
+            user_burst: int = 1,
+            max_queued: int = 100,
+            clock: Callable[[], float] = time.monotonic,
+            user_weights: Optional[dict[str, float]] = None,
+            priority_lane: bool = False,
+    ):
+        """
+        :param rate: Commands per second sent to the server
+        :param burst: Commands that can be sent to the server at once
+        :param user_rate: Commands per second of a single user, unlimited when None
+        :param user_burst: Commands of a single user that can be sent at once
+        :param max_queued: Maximal number of waiting commands of a single user
+        :param clock: Monotonic clock in seconds
+        :param user_weights: Weights of users in the fair queue, 1 for users not listed
+        :param priority_lane: Release commands with priority before other commands
+        """
+        self._bucket = TokenBucket(rate, burst, clock)
+        self._user_rate = user_rate
+        self._user_burst = user_burst
+        self._max_queued = max_queued
+        self._clock = clock
+        self._user_weights = user_weights or {}
+        self._priority_lane = priority_lane
+        self._user_buckets: dict[str, TokenBucket] = {}
+        self._queues: dict[str, deque[_Queued]] = {}
+        # Virtual time of the fair queue - finish of the last released command
+        self._virtual_time = 0.0
+        # Finish of the last queued command of each user with waiting commands
+        self._finish: dict[str, float] = {}
+        self._stats: dict[str, UserQueueStats] = {}
+        self._queued = 0
+        self._sequence = 0
+        self._throttled: set[str] = set()
+        self._submitted = asyncio.Event()
+
+    def submit(self, msg: RconCommand) -> Admission:
+        """
+        Queues a command to be sent.
+
+        :param msg: Command to queue
+        :return: Whether the command was queued and if the user is being throttled
+        """
+        user = msg.issuing_user
+        queue = self._queues.setdefault(user, deque())
+        if len(queue) >= self._max_queued:
+            return Admission.REJECTED
+
+        self._enqueue(msg)
+
+        if user in self._throttled:
+            return Admission.DELAYED
+        if self._bucket.tokens < self._queued or self._user_tokens(user) < len(queue):
+            self._throttled.add(user)
+            return Admission.THROTTLED
+        return Admission.ACCEPTED
+
+    def reserve(self, msgs: list[RconCommand]) -> list[asyncio.Future]:
+        """
+        Queues commands a caller executes itself.
+
+        Reserved commands are not limited by max_queued, the caller waits for them.
+        Cancelled futures give up their place in the queue.
+
+        :param msgs: Commands to queue
+        :return: Futures completed when each command can be sent, in order of the commands
+        """
+        loop = asyncio.get_running_loop()
+        releases = []
+        for msg in msgs:
+            release = loop.create_future()
+            self._enqueue(msg, release)
+            releases.append(release)
+        return releases
+
+    def close(self):
+        """Fails reserved commands, the connection they were to be sent over is closed."""
+        for queue in self._queues.values():
+            for queued in queue:
+                if queued.release is not None and not queued.release.done():
+                    queued.release.set_exception(ConnectionClosedError())
+
+    async def next_batch(self, max_commands: int) -> list[RconCommand]:
+        """
+        Waits for commands that can be sent.
+
+        :param max_commands: Maximal number of commands to return
+        :return: Commands to send now, in order they are to be sent
+        """
+        while True:
+            if not self._queued:
+                self._submitted.clear()
+                await self._submitted.wait()
+
+            batch = []
+            while len(batch) < max_commands and self._queued and not self._bucket.delay():
+                user = self._next_user()
+                if user is None:
+                    break
+                if (msg := self._pop(user)) is not None:
+                    batch.append(msg)
+            if batch:
+                return batch
+
+            await asyncio.sleep(self._wait_time())
+
+    @property
+    def queued(self) -> int:
+        """Number of waiting commands."""
+        return self._queued
+
+    def user_queues(self) -> dict[str, UserQueueStats]:
+        """Returns queue statistics of users whose commands were queued."""
+        now = self._clock()
+        stats = {}
+        for user, user_stats in self._stats.items():
+            queue = self._queues.get(user)
+            stats[user] = UserQueueStats(
+                len(queue) if queue else 0,
+                now - queue[0].arrived if queue else 0,
+                user_stats.released,
+                user_stats.total_wait,
+            )
+        return stats
+
+    def _next_user(self) -> Optional[str]:
+        """User with the first command in the fair queue order who has a token available."""
+        candidates = [
+            (
+                not (self._priority_lane and queue[0].msg.priority),
+                queue[0].finish,
+                queue[0].sequence,
+                user,
+            )
+            for user, queue in self._queues.items()
+            if queue and not self._user_delay(user)
+        ]
+        return min(candidates)[3] if candidates else None
+
+    def _enqueue(self, msg: RconCommand, release: Optional[asyncio.Future] = None):
+        user = msg.issuing_user
+        queue = self._queues.setdefault(user, deque())
+        start = max(self._virtual_time, self._finish.get(user, 0.0))
+        self._finish[user] = start + 1 / self._user_weights.get(user, 1.0)
+        queue.append(_Queued(self._finish[user], self._sequence, self._clock(), msg, release))
+        self._stats.setdefault(user, UserQueueStats())
+        self._sequence += 1
+        self._queued += 1
+        self._submitted.set()
+
+    def _pop(self, user: str) -> Optional[RconCommand]:
+        """Releases the first command of the user, returns it unless it is reserved."""
+        queue = self._queues[user]
+        queued = queue.popleft()
+        self._queued -= 1
+        if not queue:
+            del self._queues[user]
+            del self._finish[user]
+            self._throttled.discard(user)
+        if queued.release is not None and queued.release.done():
+            # Caller gave up waiting, the command is not sent
+            return None
+
+        self._virtual_time = max(self._virtual_time, queued.finish)
+        stats = self._stats[user]
+        stats.released += 1
+        stats.total_wait += self._clock() - queued.arrived
+        self._bucket.take()
+        if self._user_rate:
+            self._user_bucket(user).take()
+        if queued.release is not None:
+            queued.release.set_result(None)
+            return None
+        return queued.msg
+
+    def _wait_time(self) -> float:
+        user_delays = [self._user_delay(user) for user in self._queues]
+        return max(self._bucket.delay(), min(user_delays, default=0.0))
+
+    def _user_bucket(self, user: str) -> TokenBucket:
+        bucket = self._user_buckets.get(user)
+        if bucket is None:
+            bucket = TokenBucket(self._user_rate, self._user_burst, self._clock)
+            self._user_buckets[user] = bucket
+        return bucket
+
+    def _user_tokens(self, user: str) -> float:
+        return self._user_bucket(user).tokens if self._user_rate else float("inf")
+
+    def _user_delay(self, user: str) -> float:
+        return self._user_bucket(user).delay() if self._user_rate else 0.0
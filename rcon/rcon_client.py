@@ -1,19 +1,27 @@
 """Client for RCON communication."""
 
+import codecs
 import logging
+import uuid
+from abc import ABC, abstractmethod
 from asyncio import (
+    Future,
+    wait,
+    FIRST_COMPLETED,
     StreamReader,
     StreamWriter,
     TimeoutError as AioTimeoutError,
     IncompleteReadError,
+    get_running_loop,
+    timeout as asyncio_timeout,
     wait_for,
     open_connection,
 )
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Callable, Optional, Awaitable
+from typing import Callable, Optional, Awaitable, Iterable, override
 
-from messages.rcon import RconCommand, RconResponse
+from messages.rcon import RconCommand, RconResponse, RconResponseChunk
 from models.server import Server
 from rcon.packets import (
     RconResponsePacket,
@@ -28,51 +36,175 @@ from rcon.packets import (
     next_packet,
     encoding,
 )
-from rcon.rcon_client_errors import RequestIdMismatchError, InvalidPasswordError, InvalidPacketError
+from rcon.capture import CaptureWriter, Direction
+from rcon.connector import Connector
+from rcon.protocol import RconBufferedProtocol
+from rcon.rcon_client_errors import (
+    RequestIdMismatchError,
+    InvalidPasswordError,
+    InvalidPacketError,
+    ConnectionClosedError,
+    KeepaliveTimeoutError,
+)
 from rcon.request_id import IntRequestIdProvider
+from rcon.types import RconTransport
+from rcon.stats import WireStats
 from utils.async_helpers import yield_to_event_loop
 from utils.retry import retry_jitter_exponential_backoff as retry, RetryConfiguration
 
 logger = logging.getLogger(__name__)
 
 
-class RconConnection:
+class RconConnection(ABC):
     """Connection proxy to the RCON server."""
+    def __init__(self, payload_encoding: str):
+        self._payload_encoding = payload_encoding
+        self._capture: Optional[CaptureWriter] = None
+        self._capture_id = 0
+
+    def set_capture(self, capture: Optional[CaptureWriter], connection_id: int = 0):
+        """
+        Starts recording raw traffic of the connection.
+
+        :param capture: Writer to record the traffic to, None to stop recording
+        :param connection_id: Id of the connection within the capture
+        """
+        self._capture = capture
+        self._capture_id = connection_id
+
+    async def send(self, data: OutgoingRconPacket) -> int:
+        """Sends a packet to the RCON, returns the number of bytes sent."""
+        return await self.send_many([data])
+
+    async def send_many(self, data: Iterable[OutgoingRconPacket]) -> int:
+        """
+        Sends packets to the RCON with a single vectored write and drain.
+
+        :return: Number of bytes sent
+        """
+        encoded = [packet.encode(self._payload_encoding) for packet in data]
+        logger.debug("Writing data to server: %s", encoded)
+        if self._capture:
+            self._capture.record(self._capture_id, Direction.SENT, b"".join(encoded))
+        self._write(encoded)
+        await self._drain()
+        # Sometimes data is not sent without this yield
+        await yield_to_event_loop()
+        return sum(map(len, encoded))
+
+    @abstractmethod
+    async def read(self) -> RconResponsePacket:
+        """Reads a single packet from the RCON server."""
+
+    @abstractmethod
+    def close(self):
+        """Closes the connection."""
+
+    @abstractmethod
+    def _write(self, data: list[bytes]):
+        """Writes buffers to the underlying transport."""
+
+    @abstractmethod
+    async def _drain(self):
+        """Waits until written data is flushed to the underlying transport."""
+
+
+class StreamRconConnection(RconConnection):
+    """RCON connection over asyncio streams."""
     def __init__(
             self,
             reader: StreamReader,
             writer: StreamWriter,
             payload_encoding: str,
     ):
+        super().__init__(payload_encoding)
         self._reader = reader
         self._writer = writer
-        self._payload_encoding = payload_encoding
-
-    async def send(self, data: OutgoingRconPacket):
-        """Sends a packet to the RCON."""
-        encoded = data.encode(self._payload_encoding)
-        logger.debug("Writing data to server: %s", encoded)
-        self._writer.write(encoded)
-        await self._writer.drain()
-        # Sometimes data is not sent without this yield
-        await yield_to_event_loop()
 
+    @override
     async def read(self) -> RconResponsePacket:
-        """Reads a single packet from the RCON server."""
+        frame = [] if self._capture else None
+
         async def read_exactly(n: int):
             logger.debug("Reading %d bytes", n)
-            return await self._reader.readexactly(n)
+            data = await self._reader.readexactly(n)
+            if frame is not None:
+                frame.append(data)
+            return data
 
-        return await next_packet(
+        packet = await next_packet(
             read_exactly,
         )
+        if frame is not None:
+            self._capture.record(self._capture_id, Direction.RECEIVED, b"".join(frame))
+        return packet
 
+    @override
     def close(self):
-        """Closes the connection."""
         self._writer.close()
         self._reader.feed_eof()
 
+    @override
+    def _write(self, data: list[bytes]):
+        if self._writer.is_closing():
+            raise ConnectionClosedError()
+        self._writer.writelines(data)
+
+    @override
+    async def _drain(self):
+        await self._writer.drain()
+
+
+class BufferedRconConnection(RconConnection):
+    """RCON connection over RconBufferedProtocol."""
+    def __init__(
+            self,
+            protocol: RconBufferedProtocol,
+            payload_encoding: str,
+    ):
+        super().__init__(payload_encoding)
+        self._protocol = protocol
+
+    @override
+    def set_capture(self, capture: Optional[CaptureWriter], connection_id: int = 0):
+        super().set_capture(capture, connection_id)
+        self._protocol.on_frame = (
+            (lambda frame: capture.record(connection_id, Direction.RECEIVED, frame))
+            if capture else None
+        )
+
+    @override
+    async def read(self) -> RconResponsePacket:
+        return await self._protocol.read()
 
+    @override
+    def close(self):
+        self._protocol.close()
+
+    @override
+    def _write(self, data: list[bytes]):
+        if self._protocol.is_closing():
+            raise ConnectionClosedError()
+        self._protocol.writelines(data)
+
+    @override
+    async def _drain(self):
+        await self._protocol.drain()
+
+
+@dataclass
+class CommandResult:
+    """Outcome of a command executed as part of a batch."""
+    command: str
+    # Response to the command, None if the command failed
+    response: Optional[RconResponse]
+    # Reason the command failed
+    error: Optional[BaseException]
+    # Seconds from sending the batch to receiving the response
+    elapsed: float
+
+
+# pylint: disable-next=too-many-instance-attributes
 class RconClient:
     """Client for communicating with RCON."""
     @dataclass
@@ -81,132 +213,471 @@ class RconClient:
         request_id: int
         issuing_user: str
         command: str
+        # Response is only returned to the awaiting caller
+        silent: bool = False
+        # Event loop time the command was sent at, set only when stats are kept
+        sent_at: float = 0
+
+    @dataclass
+    class ResponseStream:
+        """State of a response delivered in chunks."""
+        response_id: uuid.UUID
+        issuing_user: str
+        command: str
+        decoder: codecs.IncrementalDecoder
+        chunks: int = 0
 
     def __init__(
             self,
             server: Server,
             connection: RconConnection,
             request_id_provider: IntRequestIdProvider,
+            stats: Optional[WireStats] = None,
     ):
+        """
+        :param server: Server the connection is open to
+        :param connection: Connection to the RCON of the server
+        :param request_id_provider: Provides request ids of the sent packets
+        :param stats: Statistics to record traffic of the connection to, None to keep none
+        """
         self._server = server
         self._connection = connection
         self._request_id_provider = request_id_provider
-        self._responses: dict[int, list[bytes]] = defaultdict(list)
+        # Response fragments keyed by command request id
+        self._responses: dict[int, list[bytes]] = {}
+        # Streamed responses keyed by command request id
+        self._streams: dict[int, RconClient.ResponseStream] = {}
+        # Set when responses of commands that are not awaited are streamed
+        self._streaming = False
+        # Request metadata keyed by ending request id
         self._requests: dict[int, RconClient.RequestMetadata] = {}
+        # Futures of awaited commands keyed by ending request id
+        self._waiters: dict[int, Future[RconResponse]] = {}
+        # Futures of keepalive probes keyed by their request id
+        self._probes: dict[int, Future[None]] = {}
+        self._latency: Optional[float] = None
+        self._stats = stats
 
     async def send_command(self, msg: RconCommand):
         """Sends a command to the RCON."""
+        await self.send_commands([msg])
+
+    async def send_commands(self, msgs: list[RconCommand]):
+        """Sends commands to the RCON in a single write."""
+        end_ids = [self._register_request(msg) for msg in msgs]
+        try:
+            await self._send_registered(end_ids)
+        except BaseException:
+            for end_id in end_ids:
+                self._forget_request(end_id)
+            raise
+
+    async def execute(
+            self,
+            msg: RconCommand,
+            timeout: Optional[float] = None,
+            silent: bool = False,
+    ) -> RconResponse:
+        """
+        Sends a command to the RCON and waits for its response.
+
+        Responses are received only while read is running.
+
+        :param msg: Command to execute
+        :param timeout: Maximal number of seconds to wait for the response
+        :param silent: Response is not passed to on_response callback of read
+        :raises TimeoutError: Response was not received in time
+        :raises ConnectionClosedError: Connection was closed before response was received
+        :return: Response to the command
+        """
+        end_id = self._register_request(msg, awaited=True)
+        self._requests[end_id].silent = silent
+        waiter = get_running_loop().create_future()
+        self._waiters[end_id] = waiter
+        try:
+            async with asyncio_timeout(timeout):
+                await self._send_registered([end_id])
+                return await waiter
+        finally:
+            # No-op when the response was received, otherwise forgets the timed-out request
+            self._forget_request(end_id)
+
+    # pylint: disable-next=too-many-locals
+    async def execute_batch(
+            self,
+            msgs: list[RconCommand],
+            timeout: Optional[float] = None,
+            silent: bool = False,
+    ) -> list[CommandResult]:
+        """
+        Sends commands to the RCON in a single write and waits for their responses.
+
+        Commands are pipelined - responses are correlated by request ids, so the batch
+        takes a single round trip instead of one per command.
+        Responses are received only while read is running.
+        The timeout applies to each response, counted from the previous response,
+        so large batches are not cut short. Once it passes without a response, the
+        unanswered commands are reported as timed out.
+
+        :param msgs: Commands to execute in order
+        :param timeout: Maximal number of seconds to wait for each next response
+        :param silent: Responses are not passed to on_response callback of read
+        :return: Results of the commands in order of the commands
+        """
+        loop = get_running_loop()
+        end_ids = [self._register_request(msg, awaited=True) for msg in msgs]
+        finished: dict[int, float] = {}
+        waiters = []
+        for end_id in end_ids:
+            self._requests[end_id].silent = silent
+            waiter = loop.create_future()
+            waiter.add_done_callback(lambda _, e=end_id: finished.setdefault(e, loop.time()))
+            self._waiters[end_id] = waiter
+            waiters.append(waiter)
+
+        started = loop.time()
+        try:
+            await self._send_registered(end_ids)
+            pending = set(waiters)
+            while pending:
+                done, pending = await wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+        finally:
+            for end_id in end_ids:
+                self._forget_request(end_id)
+
+        results = []
+        for msg, end_id, waiter in zip(msgs, end_ids, waiters):
+            elapsed = finished.get(end_id, loop.time()) - started
+            if not waiter.done():
+                waiter.cancel()
+                results.append(CommandResult(msg.command, None, AioTimeoutError(), elapsed))
+            elif waiter.cancelled() or waiter.exception():
+                error = ConnectionClosedError() if waiter.cancelled() else waiter.exception()
+                results.append(CommandResult(msg.command, None, error, elapsed))
+            else:
+                results.append(CommandResult(msg.command, waiter.result(), None, elapsed))
+        return results
+
+    async def probe(self, timeout: float) -> float:
+        """
+        Sends a keepalive probe and waits for the server to answer it.
+
+        The probe is a lone command end packet, which the server answers with an empty
+        response. The connection is closed when the probe is not answered in time.
+        Probes are answered only while read is running.
+
+        :param timeout: Maximal number of seconds to wait for the answer
+        :raises KeepaliveTimeoutError: Probe was not answered in time
+        :raises ConnectionClosedError: Connection was closed before the probe was answered
+        :return: Round-trip time in seconds
+        """
+        loop = get_running_loop()
+        probe_id = self._request_id_provider.get_request_id()
+        waiter = loop.create_future()
+        self._probes[probe_id] = waiter
+        started = loop.time()
+        try:
+            async with asyncio_timeout(timeout):
+                probe_packet = CommandEndPacket(probe_id)
+                sent = await self._connection.send(probe_packet)
+                if self._stats is not None:
+                    self._stats.record_sent([probe_packet], sent)
+                await waiter
+        except AioTimeoutError as e:
+            logger.warning(
+                "Keepalive probe to RCON %s not answered in %s seconds, closing connection",
+                self.server.name,
+                timeout,
+            )
+            self.close()
+            raise KeepaliveTimeoutError(timeout) from e
+        finally:
+            self._probes.pop(probe_id, None)
+
+        self._latency = loop.time() - started
+        logger.debug("RCON %s round-trip time %.3fs", self.server.name, self._latency)
+        return self._latency
+
+    def _register_request(self, msg: RconCommand, awaited: bool = False) -> int:
         cmd_id = self._request_id_provider.get_request_id()
         end_id = self._request_id_provider.get_request_id()
-        logger.debug(
-            "Sending command to %s server %s. Request id: %s, ending id: %s",
-            msg.command,
-            self.server.name,
-            cmd_id,
-            end_id,
-        )
         self._requests[end_id] = RconClient.RequestMetadata(
             cmd_id, msg.issuing_user, msg.command
         )
-        await self._connection.send(
-            CommandPacket(
-                msg.command,
-                cmd_id
+        if self._streaming and not awaited:
+            decoder = codecs.getincrementaldecoder(encoding(self._server.type))()
+            self._streams[cmd_id] = RconClient.ResponseStream(
+                uuid.uuid4(), msg.issuing_user, msg.command, decoder
             )
-        )
-        logger.info(
-            "User %s sent command %s to server %s",
-            msg.issuing_user,
-            msg.command,
-            self.server.name
-        )
-        await self._connection.send(
-            CommandEndPacket(
-                end_id
+        else:
+            self._responses[cmd_id] = []
+        return end_id
+
+    async def _send_registered(self, end_ids: list[int]):
+        packets = []
+        for end_id in end_ids:
+            metadata = self._requests[end_id]
+            logger.debug(
+                "Sending command %s to server %s. Request id: %s, ending id: %s",
+                metadata.command,
+                self.server.name,
+                metadata.request_id,
+                end_id,
             )
-        )
+            packets.append(CommandPacket(metadata.command, metadata.request_id))
+            packets.append(CommandEndPacket(end_id))
+
+        if self._stats is not None:
+            sent_at = get_running_loop().time()
+            for end_id in end_ids:
+                self._requests[end_id].sent_at = sent_at
+        sent = await self._connection.send_many(packets)
+        if self._stats is not None:
+            self._stats.record_sent(packets, sent)
+
+        for end_id in end_ids:
+            metadata = self._requests.get(end_id)
+            if metadata:
+                logger.info(
+                    "User %s sent command %s to server %s",
+                    metadata.issuing_user,
+                    metadata.command,
+                    self.server.name
+                )
+
+    def _forget_request(self, end_id: int):
+        metadata = self._requests.pop(end_id, None)
+        if metadata:
+            self._responses.pop(metadata.request_id, None)
+            self._streams.pop(metadata.request_id, None)
+        self._waiters.pop(end_id, None)
 
     async def read(
             self,
-            on_response: Callable[[RconResponsePacket], None],
+            on_response: Callable[[RconResponse], None],
             on_error: Callable[[str], None] | None = None,
+            on_chunk: Callable[[RconResponseChunk], None] | None = None,
     ):
-        """Coroutine that reads responses from RCON."""
-        while True:
-            packet = await self._connection.read()
-            logger.debug(
-                "Got response packet from the RCON %s",
-                self.server.name,
-            )
-            match packet:
-                case CommandResponse(request_id, payload):
-                    if request_id in self._requests:
-                        # Response to end packet received - process responses
-                        on_response(self._process_command_response(request_id))
-                    else:
-                        self._responses[request_id].append(payload)
-                case UnprocessableResponse(_, message):
-                    if on_error:
-                        on_error(message)
-
-                case _:
-                    pass
+        """
+        Coroutine that reads responses from RCON.
+
+        :param on_response: Called with each complete response
+        :param on_error: Called with description of each packet that could not be processed
+        :param on_chunk: When set, responses to commands that are not awaited (see execute)
+            are not assembled but delivered in chunks as they arrive
+        """
+        self._streaming = on_chunk is not None
+        try:
+            while True:
+                packet = await self._connection.read()
+                logger.debug(
+                    "Got response packet from the RCON %s",
+                    self.server.name,
+                )
+                if self._stats is not None:
+                    self._stats.record_received(
+                        packet,
+                        len(packet.payload) if isinstance(packet, CommandResponse) else 0,
+                    )
+                match packet:
+                    case CommandResponse(request_id, payload):
+                        if request_id in self._probes:
+                            probe = self._probes.pop(request_id)
+                            if not probe.done():
+                                probe.set_result(None)
+                        elif request_id in self._requests:
+                            # Response to end packet received - process responses
+                            self._complete_response(request_id, on_response, on_chunk)
+                        elif request_id in self._responses:
+                            self._responses[request_id].append(payload)
+                        elif request_id in self._streams:
+                            chunk = self._stream_chunk(self._streams[request_id], payload)
+                            if chunk.chunk:
+                                on_chunk(chunk)
+                        else:
+                            logger.debug(
+                                "Dropping response with unknown request id %s from RCON %s",
+                                request_id,
+                                self.server.name,
+                            )
+                    case UnprocessableResponse(_, message):
+                        if on_error:
+                            on_error(message)
+
+                    case _:
+                        pass
+        finally:
+            self._fail_waiters()
+
+    def _complete_response(
+            self,
+            ending_id: int,
+            on_response: Callable[[RconResponse], None],
+            on_chunk: Callable[[RconResponseChunk], None] | None,
+    ):
+        cmd_id = self._requests[ending_id].request_id
+        if self._stats is not None:
+            self._record_response(ending_id)
+        if cmd_id in self._streams:
+            del self._requests[ending_id]
+            on_chunk(self._stream_chunk(self._streams.pop(cmd_id), b"", final=True))
+        elif self._requests[ending_id].silent:
+            self._process_command_response(ending_id)
+        else:
+            on_response(self._process_command_response(ending_id))
+
+    def _record_response(self, ending_id: int):
+        metadata = self._requests[ending_id]
+        if metadata.request_id in self._streams:
+            fragments = self._streams[metadata.request_id].chunks
+        else:
+            fragments = len(self._responses.get(metadata.request_id, ()))
+        self._stats.fragments.record(fragments)
+        if metadata.sent_at:
+            self._stats.round_trip.record(get_running_loop().time() - metadata.sent_at)
+
+    def _stream_chunk(
+            self,
+            stream: ResponseStream,
+            payload: bytes,
+            final: bool = False,
+    ) -> RconResponseChunk:
+        chunk = RconResponseChunk(
+            response_id=stream.response_id,
+            index=stream.chunks,
+            issuing_user=stream.issuing_user,
+            server_type=self._server.type,
+            command=stream.command,
+            chunk=stream.decoder.decode(payload, final),
+            final=final,
+        )
+        if chunk.chunk or final:
+            stream.chunks += 1
+        return chunk
 
     def _process_command_response(self, ending_id: int) -> RconResponse:
-        cmd_metadata = self._requests[ending_id]
-        body_parts = self._responses[cmd_metadata.request_id]
+        cmd_metadata = self._requests.pop(ending_id)
+        body_parts = self._responses.pop(cmd_metadata.request_id)
         body = b"".join(body_parts)
         enc = encoding(self._server.type)
         response = body.decode(enc)
-        return RconResponse(
+        rcon_response = RconResponse(
             issuing_user=cmd_metadata.issuing_user,
             server_type=self._server.type,
             command=cmd_metadata.command,
             response=response
         )
+        waiter = self._waiters.pop(ending_id, None)
+        if waiter and not waiter.done():
+            waiter.set_result(rcon_response)
+        return rcon_response
+
+    def _fail_waiters(self):
+        for end_id, waiter in list(self._waiters.items()):
+            if not waiter.done():
+                waiter.set_exception(ConnectionClosedError())
+            self._forget_request(end_id)
+        for probe in self._probes.values():
+            if not probe.done():
+                probe.set_exception(ConnectionClosedError())
+        self._probes.clear()
 
     def close(self):
         """Closes the connection."""
         self._connection.close()
 
+    @property
+    def latency(self) -> Optional[float]:
+        """Round-trip time of the last answered keepalive probe in seconds."""
+        return self._latency
+
+    @property
+    def pending_requests(self) -> int:
+        """Number of sent commands waiting for a response."""
+        return len(self._requests)
+
+    def has_pending_requests_of(self, user: str) -> bool:
+        """Checks if there are commands of given user waiting for a response."""
+        return any(r.issuing_user == user for r in self._requests.values())
+
     @property
     def server(self) -> Server:
         """Returns model of the server this client is connected to."""
         return self._server
 
 
+_CONNECT_ERRORS = (
+    RequestIdMismatchError,
+    InvalidPasswordError,
+    InvalidPacketError,
+    TimeoutError,
+    AioTimeoutError,
+    ConnectionRefusedError,
+    OSError,
+    IncompleteReadError,
+)
+
+_CONNECT_RETRY = RetryConfiguration(
+    backoff_ms=1000,
+    jitter_ms=100,
+    max_backoff_ms=240000,
+)
+
+
+async def _retry_connect(
+        coro: Callable[[], Awaitable[RconClient]],
+        exc_types: tuple[type[Exception], ...],
+) -> RconClient:
+    return await retry(coro, exc_types, _CONNECT_RETRY)
+
+
+# pylint: disable-next=too-many-instance-attributes
 class RconClientManager:
     """Client used to communicate with the RCON server."""
+    # pylint: disable-next=too-many-arguments
     def __init__(
             self,
             request_id_provider: IntRequestIdProvider,
             server_supplier: Callable[[], Awaitable[Optional[Server]]],
             timeout: int = 5,
+            transport: RconTransport = RconTransport.STREAM,
+            retry_connect: Optional[Callable[
+                [Callable[[], Awaitable[RconClient]], tuple[type[Exception], ...]],
+                Awaitable[RconClient]
+            ]] = None,
+            connector: Optional[Connector] = None,
+            stats: Optional[WireStats] = None,
+            capture: Optional[CaptureWriter] = None,
     ):
+        """
+        :param request_id_provider: Request ids of the first connection
+        :param server_supplier: Supplies the server to connect to
+        :param timeout: Seconds to wait for the connection to open
+        :param transport: Transport used for the connections
+        :param retry_connect: Retries the connect coroutine on given errors until it succeeds,
+            exponential backoff of each manager by default
+        :param connector: Resolves and connects to RCON hosts, asyncio default when None
+        :param stats: Statistics to record traffic of all the connections to, None to keep none
+        :param capture: Writer to record raw traffic of all the connections to after they
+            log in, None to record none
+        """
         self._request_id_provider = request_id_provider
         self._server_supplier = server_supplier
         self._timeout = timeout
+        self._transport = transport
+        self._retry_connect = retry_connect or _retry_connect
+        self._connector = connector
+        self._stats = stats
+        self._capture = capture
         self.responses = defaultdict(set)
         self._client = None
 
     async def __aenter__(self) -> RconClient:
-        self._client = await retry(
-            self._connect,
-            (
-                RequestIdMismatchError,
-                InvalidPasswordError,
-                InvalidPacketError,
-                TimeoutError,
-                AioTimeoutError,
-                ConnectionRefusedError,
-                OSError,
-                IncompleteReadError,
-            ),
-            RetryConfiguration(
-                backoff_ms=1000,
-                jitter_ms=100,
-                max_backoff_ms=240000,
-            ),
+        self._client = await self._retry_connect(
+            lambda: self._connect(self._request_id_provider),
+            _CONNECT_ERRORS,
         )
 
         return self._client
@@ -214,7 +685,20 @@ class RconClientManager:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         self._client.close()
 
-    async def _connect(self):
+    async def connect(self) -> RconClient:
+        """
+        Opens an additional authenticated connection to the server.
+
+        Each connection uses its own request id namespace.
+        Closing the connection is up to the caller.
+        :return: Client of the new connection
+        """
+        return await self._retry_connect(
+            lambda: self._connect(IntRequestIdProvider()),
+            _CONNECT_ERRORS,
+        )
+
+    async def _connect(self, request_id_provider: IntRequestIdProvider):
         server = await self._server_supplier()
 
         if server is None:
@@ -227,24 +711,27 @@ class RconClientManager:
             server.rcon_port,
         )
 
-        reader, writer = await wait_for(
-            open_connection(server.host, server.rcon_port),
+        started = get_running_loop().time()
+        conn = await wait_for(
+            self._open(server),
             self._timeout
         )
 
-        conn = RconConnection(reader, writer, encoding(server.type))
-
-        request_id = self._request_id_provider.get_request_id()
+        request_id = request_id_provider.get_request_id()
         login_packet = LoginPacket(
             server.rcon_password,
             request_id
         )
 
-        await conn.send(login_packet)
+        sent = await conn.send(login_packet)
+        if self._stats is not None:
+            self._stats.record_sent([login_packet], sent)
 
         # Source dedicated server sends empty "command response" packet before login response
         if server.type == Server.Type.SOURCE_SERVER:
             data_response = await conn.read()
+            if self._stats is not None:
+                self._stats.record_received(data_response, 0)
             match data_response:
                 case CommandResponse(resp_req_id, payload):
                     if resp_req_id != request_id:
@@ -257,6 +744,8 @@ class RconClientManager:
                     )
 
         login_response = await conn.read()
+        if self._stats is not None:
+            self._stats.record_received(login_response, 0)
         match login_response:
             case LoginSuccessResponse(resp_req_id):
                 if resp_req_id != request_id:
@@ -288,9 +777,32 @@ class RconClientManager:
             server.host,
             server.rcon_port,
         )
+        if self._stats is not None:
+            self._stats.connect.record(get_running_loop().time() - started)
+        if self._capture:
+            # Only after login, the login packet contains the password
+            conn.set_capture(self._capture, self._capture.connection_id())
 
         return RconClient(
             server,
             conn,
-            self._request_id_provider
+            request_id_provider,
+            self._stats,
         )
+
+    async def _open(self, server: Server) -> RconConnection:
+        # Connected socket when connector is used, otherwise asyncio connects by host and port
+        address = {"host": server.host, "port": server.rcon_port}
+        if self._connector:
+            address = {"sock": await self._connector.connect(server.host, server.rcon_port)}
+
+        match self._transport:
+            case RconTransport.BUFFERED:
+                _, protocol = await get_running_loop().create_connection(
+                    RconBufferedProtocol,
+                    **address,
+                )
+                return BufferedRconConnection(protocol, encoding(server.type))
+            case _:
+                reader, writer = await open_connection(**address)
+                return StreamRconConnection(reader, writer, encoding(server.type))
@@ -18,3 +18,16 @@ class RequestIdMismatchError(Exception):
     def __init__(self, expected: int, received: int):
         self.expected = expected
         self.received = received
+
+
+class ConnectionClosedError(Exception):
+    """Connection to the RCON was closed before the response was received."""
+
+
+class KeepaliveTimeoutError(Exception):
+    """Keepalive probe was not answered in time, the connection is considered dead."""
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+
+    def __str__(self):
+        return f"Keepalive probe not answered within {self.timeout} seconds"
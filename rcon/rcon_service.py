@@ -1,21 +1,55 @@
 """Service for communication with RCON."""
 import asyncio
+import contextlib
 import logging
+import os
+import random
 import uuid
-from typing import Callable, Awaitable, Optional
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, Awaitable, Optional, override
 
+from configuration import RconConfiguration
 from messages.notifications import notification_topic, NotificationMessage
-from messages.rcon import rcon_command_topic, rcon_response_topic
-from messages.server_status import server_status_topic, RconConnected, RconDisconnected
+from messages.rcon import rcon_command_topic, rcon_response_topic, RconCommand, RconResponse
+from messages.rcon_stats import rcon_stats_topic, RconStats
+from messages.server_status import (
+    server_status_topic,
+    RconConnected,
+    RconDisconnected,
+    RconFailover,
+    RconIdle,
+)
 from models.server import Server
 from pubsub.filter import FieldLength
-from pubsub.pubsub import PubSub
-from rcon.rcon_client import RconClientManager, RconClient
+from pubsub.pubsub import PubSub, Subscription
+from rcon.capture import CaptureWriter
+from rcon.connect_scheduler import ConnectScheduler
+from rcon.connector import Connector
+from rcon.pool import RconClientPool
+from rcon.rcon_client import RconClientManager, RconClient, CommandResult
+from rcon.rate_limit import CommandRateLimiter, Admission, UserQueueStats
+from rcon.rcon_client_errors import (
+    InvalidPacketError,
+    ConnectionClosedError,
+    KeepaliveTimeoutError,
+)
+from rcon.single_flight import SingleFlightExecutor
+from rcon.standby import StandbyRconClient
+from rcon.stats import WireStats
 from rcon.request_id import IntRequestIdProvider
 from services.service import Service, RecoverableError
 
 logger = logging.getLogger(__name__)
 
+_Client = RconClient | RconClientPool | StandbyRconClient
+# Mean milliseconds before the service is restarted after its connection dropped
+_RECOVERY_DELAY_MS = 5000
+
+
+class _SessionIdle(Exception):
+    """RCON session was not used for the idle timeout."""
+
+
 def rcon_service_name(uid: uuid.UUID) -> str:
     """
     Returns the name of RCON service with given server UUID
@@ -25,30 +59,208 @@ def rcon_service_name(uid: uuid.UUID) -> str:
     return f"rcon_service_{uid}"
 
 
-class RconService(Service):
+class RconExecutor(ABC):
+    """Executes commands on a server on behalf of a caller."""
+    @abstractmethod
+    async def execute(self, msg: RconCommand, timeout: Optional[float] = None) -> RconResponse:
+        """
+        Executes a command and returns its response to the caller only.
+
+        The command waits for the rate limit like commands sent by users.
+
+        :param msg: Command to execute
+        :param timeout: Seconds to wait for the response, defaults to command timeout
+        :raises ConnectionClosedError: RCON is not connected
+        :raises TimeoutError: Response was not received in time
+        :return: Response to the command
+        """
+
+    @abstractmethod
+    async def execute_batch(self, msgs: list[RconCommand]) -> list[CommandResult]:
+        """
+        Executes commands pipelined over the RCON connection.
+
+        Responses are returned to the caller only, they are not published.
+        Commands wait for the rate limit and are sent as it releases them.
+
+        :param msgs: Commands to execute in order
+        :raises ConnectionClosedError: RCON is not connected
+        :return: Results of the commands in order of the commands
+        """
+
+    @abstractmethod
+    async def wire_stats(self) -> Optional[WireStats]:
+        """
+        Returns wire-level statistics of the RCON connections.
+
+        :return: Copy of the statistics, None when statistics are not kept
+        """
+
+    @abstractmethod
+    async def command_queues(self) -> dict[str, UserQueueStats]:
+        """
+        Returns commands of each user waiting to be sent to the server.
+
+        :return: Queue statistics by user, empty when RCON is not connected
+        """
+
+    @abstractmethod
+    def wake(self):
+        """
+        Signals the server is being used.
+
+        Connects to the RCON when the service is idle and postpones idle disconnect.
+        """
+
+
+# pylint: disable-next=too-many-instance-attributes
+class RconService(Service, RconExecutor):
     """Service responsible for connection to and communication with RCON of a server."""
+    # pylint: disable-next=too-many-arguments
     def __init__(
             self,
             pubsub: PubSub,
             server_uid: uuid.UUID,
             server_supplier: Callable[[], Awaitable[Optional[Server]]],
+            configuration: RconConfiguration = RconConfiguration(),
+            connect_scheduler: Optional[ConnectScheduler] = None,
+            connector: Optional[Connector] = None,
     ):
+        """
+        :param pubsub: PubSub commands are received from and responses published to
+        :param server_uid: UUID of the server
+        :param server_supplier: Supplies current model of the server
+        :param configuration: Configuration of RCON connections
+        :param connect_scheduler: Schedules connection attempts shared by all RCON services
+        :param connector: Resolves and connects to RCON hosts, shared by all RCON services
+        """
         self._pubsub = pubsub
         self._server_supplier = server_supplier
         self._server_uid = server_uid
+        self._configuration = configuration
+        self._connect_scheduler = connect_scheduler
+        self._connector = connector
+        # Connected client, None while not connected
+        self._client: Optional[_Client] = None
+        self._connected = asyncio.Event()
+        # Event loop time the server was last used at, for idle disconnect
+        self._last_activity = 0.0
+        self._woken = asyncio.Event()
+        self._stats = WireStats() if configuration.wire_stats else None
+        self._capture: Optional[CaptureWriter] = None
+        # Queue of commands of the connected client
+        self._limiter: Optional[CommandRateLimiter] = None
+        # Connection dropped, the next connect is a retry
+        self._recovering = False
 
     @property
     def name(self) -> str:
         return rcon_service_name(self._server_uid)
 
     async def launch(self):
-        async with RconClientManager(
+        manager = RconClientManager(
             IntRequestIdProvider(),
             self._server_supplier,
-        ) as client:
-            await self._process(client)
+            transport=self._configuration.transport,
+            retry_connect=self._retry_connect if self._connect_scheduler else None,
+            connector=self._connector,
+            stats=self._stats,
+            capture=await self._capture_writer(),
+        )
+        with self._pubsub.subscribe(
+            rcon_command_topic(self._server_uid),
+            FieldLength(lambda msg: msg.command, 1, FieldLength.Mode.MIN)
+        ) as sub:
+            while True:
+                received = []
+                if self._configuration.lazy_connect:
+                    self._pubsub.publish(server_status_topic, RconIdle(self._server_uid))
+                    received = await self._wait_for_activity(sub)
+
+                async with manager as client:
+                    if self._configuration.pool_size > 1:
+                        wrapper = RconClientPool(
+                            client,
+                            self._configuration.pool_size,
+                            manager.connect,
+                        )
+                    elif self._configuration.warm_standby:
+                        wrapper = StandbyRconClient(client, manager.connect, self._on_failover)
+                    else:
+                        wrapper = None
+
+                    try:
+                        await self._process(wrapper or client, sub, received)
+                    finally:
+                        if wrapper:
+                            wrapper.close()
 
-    async def _process(self, client):
+    async def _retry_connect(
+            self,
+            coro: Callable[[], Awaitable[RconClient]],
+            exc_types: tuple[type[Exception], ...],
+    ) -> RconClient:
+        """Connects through the connect scheduler, reconnects after a drop draw from its budget."""
+        client = await self._connect_scheduler.connect(
+            self._server_uid,
+            coro,
+            exc_types,
+            retry=self._recovering,
+        )
+        self._recovering = False
+        return client
+
+    def _recoverable(self, error: Exception) -> RecoverableError:
+        """
+        Returns error restarting the service after a dropped connection.
+
+        The restart delay is jittered, so services disconnected together do not
+        reconnect together.
+        """
+        self._recovering = True
+        return RecoverableError(error, round(_RECOVERY_DELAY_MS * random.uniform(0.5, 1.5)))
+
+    async def _capture_writer(self) -> Optional[CaptureWriter]:
+        """Returns writer of the traffic capture, None when capture is disabled."""
+        if self._capture is None and self._configuration.capture_dir:
+            server = await self._server_supplier()
+            if server is None:
+                return None
+            self._capture = CaptureWriter(
+                os.path.join(self._configuration.capture_dir, f"{self._server_uid}.rcap"),
+                server.type,
+                self._configuration.capture_max_file_size,
+                self._configuration.capture_max_files,
+            )
+        return self._capture
+
+    @override
+    def wake(self):
+        self._last_activity = asyncio.get_running_loop().time()
+        self._woken.set()
+
+    async def _wait_for_activity(self, sub: Subscription[RconCommand]) -> list[RconCommand]:
+        """Waits for a command or a wake up, returns the received command if any."""
+        self._woken.clear()
+        next_command = asyncio.ensure_future(anext(aiter(sub)))
+        woken = asyncio.create_task(self._woken.wait())
+        try:
+            done, _ = await asyncio.wait(
+                {next_command, woken},
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            next_command.cancel()
+            woken.cancel()
+        self._last_activity = asyncio.get_running_loop().time()
+        return [next_command.result()] if next_command in done else []
+
+    async def _process(
+            self,
+            client: _Client,
+            sub: Subscription[RconCommand],
+            received: list[RconCommand],
+    ):
         self._pubsub.publish(
             server_status_topic,
             RconConnected(self._server_uid)
@@ -62,33 +274,238 @@ class RconService(Service):
             )
         )
 
+        limiter = CommandRateLimiter(
+            self._configuration.rate_limit,
+            self._configuration.rate_limit_burst,
+            self._configuration.user_rate_limit or None,
+            self._configuration.user_rate_limit_burst,
+            self._configuration.max_queued_commands,
+            user_weights=self._configuration.user_weights,
+            priority_lane=self._configuration.priority_lane,
+        )
+        self._client = client
+        self._limiter = limiter
+        self._connected.set()
+        idle = False
         try:
             async with asyncio.TaskGroup() as tg:
-                tg.create_task(self._send(client))
+                tg.create_task(self._send(client, sub, received, limiter))
                 tg.create_task(self._read(client))
+                if self._configuration.keepalive_interval > 0:
+                    tg.create_task(self._keepalive(client))
+                if self._configuration.lazy_connect:
+                    tg.create_task(self._watch_idle())
+                if self._stats is not None:
+                    tg.create_task(self._publish_stats())
+        except* _SessionIdle:
+            idle = True
+            logger.info("Disconnecting idle RCON of %s", client.server.name)
         finally:
+            self._client = None
+            self._limiter = None
+            limiter.close()
+            self._connected.clear()
+            if not idle:
+                self._pubsub.publish(
+                    server_status_topic,
+                    RconDisconnected(client.server.uid)
+                )
+                self._pubsub.publish(
+                    notification_topic,
+                    NotificationMessage(
+                        audience="all",
+                        message=f"Disconnected from RCON of {client.server.name}",
+                        type=NotificationMessage.NotificationType.ERROR,
+                    )
+                )
+
+    async def _publish_stats(self):
+        while True:
+            await asyncio.sleep(self._configuration.stats_interval)
             self._pubsub.publish(
-                server_status_topic,
-                RconDisconnected(client.server.uid)
+                rcon_stats_topic,
+                RconStats(self._server_uid, self._stats.snapshot()),
             )
-            self._pubsub.publish(
-                notification_topic,
-                NotificationMessage(
-                    audience="all",
-                    message=f"Disconnected from RCON of {client.server.name}",
-                    type=NotificationMessage.NotificationType.ERROR,
+
+    async def _watch_idle(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            remaining = self._last_activity + self._configuration.idle_timeout - loop.time()
+            if remaining <= 0:
+                raise _SessionIdle()
+            await asyncio.sleep(remaining)
+
+    @override
+    async def execute(self, msg: RconCommand, timeout: Optional[float] = None) -> RconResponse:
+        client = await self._connected_client()
+        async with contextlib.aclosing(self._released([msg])) as released:
+            async for _ in released:
+                pass
+        return await client.execute(
+            msg,
+            timeout if timeout is not None else self._configuration.command_timeout,
+            silent=True,
+        )
+
+    @override
+    async def execute_batch(self, msgs: list[RconCommand]) -> list[CommandResult]:
+        client = await self._connected_client()
+        results = []
+        async with contextlib.aclosing(self._released(msgs)) as released:
+            async for part in released:
+                results += await client.execute_batch(
+                    part,
+                    self._configuration.command_timeout,
+                    silent=True,
                 )
+        return results
+
+    async def _released(self, msgs: list[RconCommand]) -> AsyncIterator[list[RconCommand]]:
+        """
+        Yields commands executed by a caller in order, as the rate limiter releases them.
+
+        :raises ConnectionClosedError: RCON disconnected before the commands were released
+        """
+        if self._limiter is None:
+            raise ConnectionClosedError()
+        releases = self._limiter.reserve(msgs)
+        try:
+            start = 0
+            while start < len(msgs):
+                await releases[start]
+                end = start + 1
+                while end < len(msgs) and releases[end].done():
+                    end += 1
+                yield msgs[start:end]
+                start = end
+        finally:
+            # Commands not released yet give up their place
+            for release in releases:
+                if not release.cancel() and not release.cancelled():
+                    # Failed by a disconnect, the caller got the error of the first one
+                    release.exception()
+
+    @override
+    async def wire_stats(self) -> Optional[WireStats]:
+        return self._stats.snapshot() if self._stats is not None else None
+
+    @override
+    async def command_queues(self) -> dict[str, UserQueueStats]:
+        return self._limiter.user_queues() if self._limiter else {}
+
+    async def _connected_client(self) -> _Client:
+        """Returns connected client, connecting first when the service is idle."""
+        if self._configuration.lazy_connect:
+            self.wake()
+            try:
+                async with asyncio.timeout(self._configuration.command_timeout):
+                    await self._connected.wait()
+            except TimeoutError as e:
+                raise ConnectionClosedError() from e
+        if self._client is None:
+            raise ConnectionClosedError()
+        return self._client
+
+    async def _send(
+            self,
+            client: _Client,
+            sub: Subscription[RconCommand],
+            received: list[RconCommand],
+            limiter: CommandRateLimiter,
+    ):
+        for cmd in received:
+            self._submit(limiter, cmd)
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._receive(sub, limiter))
+                tg.create_task(self._dispatch(client, limiter))
+        except* ConnectionClosedError as e:
+            raise self._recoverable(e) from e
+
+    async def _receive(self, sub: Subscription[RconCommand], limiter: CommandRateLimiter):
+        loop = asyncio.get_running_loop()
+        async for cmd in sub:
+            self._last_activity = loop.time()
+            self._submit(limiter, cmd)
+
+    def _submit(self, limiter: CommandRateLimiter, cmd: RconCommand):
+        match limiter.submit(cmd):
+            case Admission.THROTTLED:
+                self._notify_user(
+                    cmd.issuing_user,
+                    "Too many commands, your commands are being delayed",
+                    NotificationMessage.NotificationType.WARNING,
+                )
+            case Admission.REJECTED:
+                self._notify_user(
+                    cmd.issuing_user,
+                    f"Too many queued commands, command {cmd.command} was dropped",
+                    NotificationMessage.NotificationType.ERROR,
+                )
+
+    async def _dispatch(self, client: _Client, limiter: CommandRateLimiter):
+        single_flight = SingleFlightExecutor(
+            lambda msg: client.execute(msg, self._configuration.command_timeout, silent=True),
+            self._configuration.read_only_commands,
+            self._configuration.read_only_cache_ttl,
+        )
+        # Unfinished shared or deferred command of each user, later commands of the
+        # user wait for it so their responses keep the order of the commands
+        tails: dict[str, asyncio.Task] = {}
+        async with asyncio.TaskGroup() as tg:
+            while True:
+                # Commands allowed by the limiter are sent together
+                batch = await limiter.next_batch(self._configuration.max_command_batch)
+                tails = {user: task for user, task in tails.items() if not task.done()}
+                to_send = []
+                for msg in batch:
+                    user = msg.issuing_user
+                    if user in tails:
+                        tails[user] = tg.create_task(self._send_after(client, tails[user], msg))
+                    elif single_flight.handles(msg) and not (
+                        # Shared response could overtake earlier commands of the user
+                        client.has_pending_requests_of(user)
+                        or any(queued.issuing_user == user for queued in to_send)
+                    ):
+                        tails[user] = tg.create_task(self._execute_shared(single_flight, msg))
+                    else:
+                        to_send.append(msg)
+                if to_send:
+                    await client.send_commands(to_send)
+
+    @staticmethod
+    async def _send_after(client: _Client, previous: asyncio.Task, msg: RconCommand):
+        """Sends the command once the previous command of its user completed."""
+        await asyncio.wait([previous])
+        await client.send_commands([msg])
+
+    async def _execute_shared(self, single_flight: SingleFlightExecutor, msg: RconCommand):
+        try:
+            self._publish(await single_flight.execute(msg))
+        except (TimeoutError, ConnectionClosedError) as e:
+            logger.warning("Read-only command %s failed: %s", msg.command, e)
+            self._notify_user(
+                msg.issuing_user,
+                f"Command {msg.command} did not complete",
+                NotificationMessage.NotificationType.ERROR,
             )
 
-    async def _send(self, client: RconClient):
-        with self._pubsub.subscribe(
-            rcon_command_topic(self._server_uid),
-            FieldLength(lambda msg: msg.command, 1, FieldLength.Mode.MIN)
-        ) as sub:
-            async for cmd in sub:
-                await client.send_command(cmd)
+    def _notify_user(
+            self,
+            user: str,
+            message: str,
+            notification_type: NotificationMessage.NotificationType,
+    ):
+        self._pubsub.publish(
+            notification_topic,
+            NotificationMessage(
+                audience=[user],
+                message=message,
+                type=notification_type,
+            )
+        )
 
-    async def _read(self, client: RconClient):
+    async def _read(self, client: _Client):
         try:
             await client.read(
                 self._publish,
@@ -99,10 +516,30 @@ class RconService(Service):
                         message=err_msg,
                         type=NotificationMessage.NotificationType.ERROR,
                     )
-                )
+                ),
+                self._publish if self._configuration.stream_responses else None,
             )
-        except* asyncio.IncompleteReadError as e:
-            raise RecoverableError(e, 5000) from e
+        except* (asyncio.IncompleteReadError, InvalidPacketError, ConnectionClosedError) as e:
+            raise self._recoverable(e) from e
+
+    async def _keepalive(self, client: _Client):
+        while True:
+            await asyncio.sleep(self._configuration.keepalive_interval)
+            try:
+                await client.probe(self._configuration.keepalive_timeout)
+            except (KeepaliveTimeoutError, ConnectionClosedError) as e:
+                raise self._recoverable(e) from e
+
+    def _on_failover(self, latency: float):
+        self._pubsub.publish(server_status_topic, RconFailover(self._server_uid, latency))
+        self._pubsub.publish(
+            notification_topic,
+            NotificationMessage(
+                audience="all",
+                message=f"RCON connection failed over to standby in {latency * 1000:.0f} ms",
+                type=NotificationMessage.NotificationType.WARNING,
+            )
+        )
 
     def _publish(self, msg):
         logger.debug("Publishing %s", msg)
@@ -112,4 +549,5 @@ class RconService(Service):
         )
 
     async def stop(self):
-        pass
+        if self._capture:
+            self._capture.close()
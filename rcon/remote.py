@@ -0,0 +1,275 @@
+"""RCON services called from processes not running them, over PubSub."""
+import asyncio
+import logging
+import uuid
+from typing import Any, Optional, override
+
+from configuration import RconConfiguration
+from messages.rcon import RconCommand, RconResponse
+from messages.rcon_calls import (
+    RconCall,
+    RconCallBatchResult,
+    RconCallResult,
+    rcon_call_result_topic,
+    rcon_call_topic,
+)
+from pubsub.pubsub import PubSub
+from pubsub.topic import TopicDescriptor
+from rcon.rate_limit import UserQueueStats
+from rcon.rcon_client import CommandResult
+from rcon.rcon_client_errors import ConnectionClosedError
+from rcon.rcon_service import RconExecutor, rcon_service_name
+from rcon.stats import WireStats
+from services.service import Service, ServiceLauncher
+
+logger = logging.getLogger(__name__)
+
+# Operations of RconExecutor that can be called
+_OPERATIONS = ("execute", "execute_batch", "wire_stats", "command_queues", "wake")
+
+
+class RconCallServer(Service):
+    """
+    Executes operations of RCON services called by other processes.
+
+    Runs in the process running RCON services, results are published to the
+    topic of the calling process.
+    """
+    def __init__(self, pubsub: PubSub, service_launcher: ServiceLauncher):
+        """
+        :param pubsub: PubSub calls are received from and results published to
+        :param service_launcher: Launcher of the RCON services
+        """
+        self._pubsub = pubsub
+        self._service_launcher = service_launcher
+        self._calls: set[asyncio.Task] = set()
+
+    @property
+    def name(self) -> str:
+        return "rcon_call_server"
+
+    async def launch(self):
+        with self._pubsub.subscribe(rcon_call_topic) as sub:
+            async for call in sub:
+                task = asyncio.create_task(self._call(call))
+                self._calls.add(task)
+                task.add_done_callback(self._calls.discard)
+
+    async def stop(self):
+        for task in self._calls:
+            task.cancel()
+
+    async def _call(self, call: RconCall):
+        result, error_type, error = None, None, None
+        try:
+            service = self._service_launcher.get(rcon_service_name(call.server_uid))
+            if not isinstance(service, RconExecutor) or call.operation not in _OPERATIONS:
+                raise ConnectionClosedError()
+            if call.operation == "wake":
+                service.wake()
+            else:
+                result = await getattr(service, call.operation)(*call.args)
+            if call.operation == "execute_batch":
+                result = [
+                    RconCallBatchResult(
+                        r.command,
+                        r.response,
+                        _message(r.error) if r.error else None,
+                        r.elapsed,
+                    )
+                    for r in result
+                ]
+        except (ConnectionClosedError, TimeoutError) as e:
+            error_type, error = type(e).__name__, str(e)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.exception("RCON %s of %s failed", call.operation, call.server_uid)
+            error_type, error = RuntimeError.__name__, _message(e)
+        if call.reply_topic is not None:
+            self._pubsub.publish(
+                TopicDescriptor[RconCallResult](call.reply_topic),
+                RconCallResult(call.request_id, result, error_type, error),
+            )
+
+
+class RconCallClient(Service):
+    """
+    Calls operations of RCON services running in another process.
+
+    Calls fail with ConnectionClosedError when no result arrives in time, e.g. when
+    no process runs RCON services.
+    """
+    def __init__(self, pubsub: PubSub):
+        """
+        :param pubsub: PubSub calls are published to and results received from
+        """
+        self._pubsub = pubsub
+        self._results_topic = rcon_call_result_topic(uuid.uuid4())
+        self._pending: dict[uuid.UUID, asyncio.Future] = {}
+
+    @property
+    def name(self) -> str:
+        return "rcon_call_client"
+
+    async def launch(self):
+        with self._pubsub.subscribe(self._results_topic) as sub:
+            async for result in sub:
+                future = self._pending.get(result.request_id)
+                if future is None or future.done():
+                    continue
+                match result.error_type:
+                    case None:
+                        future.set_result(result.result)
+                    case "ConnectionClosedError":
+                        future.set_exception(ConnectionClosedError())
+                    case "TimeoutError":
+                        future.set_exception(TimeoutError())
+                    case _:
+                        future.set_exception(RuntimeError(result.error))
+
+    async def stop(self):
+        for future in self._pending.values():
+            future.cancel()
+
+    async def call(self, server_uid: uuid.UUID, operation: str, args: list, timeout: float) -> Any:
+        """
+        Executes operation of RCON service of the server and returns its result.
+
+        :param server_uid: Server whose RCON service executes the operation
+        :param operation: execute, execute_batch, wire_stats or command_queues
+        :param args: Arguments of the operation
+        :param timeout: Seconds to wait for the result
+        :raises ConnectionClosedError: RCON is not connected or no result arrived in time
+        :return: Result of the operation
+        """
+        request_id = uuid.uuid4()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._pubsub.publish(
+                rcon_call_topic,
+                RconCall(request_id, server_uid, operation, args, self._results_topic.topic),
+            )
+            async with asyncio.timeout(timeout):
+                return await future
+        except TimeoutError as e:
+            if not future.cancelled():
+                # Operation itself timed out
+                raise
+            raise ConnectionClosedError() from e
+        finally:
+            del self._pending[request_id]
+
+    def notify(self, server_uid: uuid.UUID, operation: str):
+        """Calls operation of RCON service of the server without waiting for it."""
+        self._pubsub.publish(
+            rcon_call_topic,
+            RconCall(uuid.uuid4(), server_uid, operation, [], None),
+        )
+
+
+class RemoteRconExecutor(RconExecutor):
+    """Executes commands on a server through RCON service running in another process."""
+    def __init__(
+            self,
+            client: RconCallClient,
+            server_uid: uuid.UUID,
+            configuration: RconConfiguration,
+    ):
+        """
+        :param client: Client calling the process running RCON services
+        :param server_uid: Server the commands are executed on
+        :param configuration: Configuration of RCON connections
+        """
+        self._client = client
+        self._server_uid = server_uid
+        self._configuration = configuration
+
+    @override
+    async def execute(self, msg: RconCommand, timeout: Optional[float] = None) -> RconResponse:
+        timeout = timeout if timeout is not None else self._configuration.command_timeout
+        # Commands wait for the rate limit before their timeout starts
+        return await self._client.call(
+            self._server_uid,
+            "execute",
+            [msg, timeout],
+            timeout + self._wait_time(1),
+        )
+
+    @override
+    async def execute_batch(self, msgs: list[RconCommand]) -> list[CommandResult]:
+        results = await self._client.call(
+            self._server_uid,
+            "execute_batch",
+            [msgs],
+            # Each response might take the command timeout
+            self._configuration.command_timeout * (len(msgs) + 1) + self._wait_time(len(msgs)),
+        )
+        return [
+            CommandResult(
+                r.command,
+                r.response,
+                RuntimeError(r.error) if r.error is not None else None,
+                r.elapsed,
+            )
+            for r in results
+        ]
+
+    @override
+    async def wire_stats(self) -> Optional[WireStats]:
+        return await self._client.call(
+            self._server_uid,
+            "wire_stats",
+            [],
+            self._configuration.command_timeout,
+        )
+
+    @override
+    async def command_queues(self) -> dict[str, UserQueueStats]:
+        return await self._client.call(
+            self._server_uid,
+            "command_queues",
+            [],
+            self._configuration.command_timeout,
+        )
+
+    @override
+    def wake(self):
+        self._client.notify(self._server_uid, "wake")
+
+    def _wait_time(self, commands: int) -> float:
+        """Seconds commands might wait for the rate limit of the server."""
+        return (commands + self._configuration.max_queued_commands) / self._configuration.rate_limit
+
+
+class RconExecutors:
+    """
+    Looks up RCON services executing commands on servers.
+
+    Services run in this process, or in the process hosting the PubSub broker when
+    a call client is given.
+    """
+    def __init__(
+            self,
+            service_launcher: ServiceLauncher,
+            configuration: RconConfiguration,
+            client: Optional[RconCallClient] = None,
+    ):
+        """
+        :param service_launcher: Launcher of RCON services of this process
+        :param configuration: Configuration of RCON connections
+        :param client: Client calling RCON services of another process, None when they run here
+        """
+        self._service_launcher = service_launcher
+        self._configuration = configuration
+        self._client = client
+
+    def get(self, server_uid: uuid.UUID) -> Optional[RconExecutor]:
+        """Returns RCON service of the server, None when it is not running in this process."""
+        if self._client:
+            return RemoteRconExecutor(self._client, server_uid, self._configuration)
+        service = self._service_launcher.get(rcon_service_name(server_uid))
+        return service if isinstance(service, RconExecutor) else None
+
+
+def _message(error: BaseException) -> str:
+    return str(error) or type(error).__name__
@@ -0,0 +1,132 @@
+"""Replay of captured RCON traffic, see rcon.capture."""
+import asyncio
+import struct
+from collections import deque
+from typing import Callable, Iterator, override
+
+from messages.rcon import RconCommand, RconResponse
+from models.server import Server
+from rcon.capture import CaptureRecord, Direction
+from rcon.packets import RconResponsePacket, next_packet, encoding
+from rcon.rcon_client import RconClient, RconConnection
+from rcon.request_id import IntRequestIdProvider
+
+_frame_header = struct.Struct("<iii")
+
+# Packet type of a command request
+_EXEC_COMMAND = 2
+
+
+class _ReplayConnection(RconConnection):
+    """Connection receiving captured frames."""
+    def __init__(self, payload_encoding: str):
+        super().__init__(payload_encoding)
+        self.reader = asyncio.StreamReader()
+
+    @override
+    async def read(self) -> RconResponsePacket:
+        return await next_packet(self.reader.readexactly)
+
+    @override
+    def close(self):
+        self.reader.feed_eof()
+
+    @override
+    def _write(self, data: list[bytes]):
+        pass
+
+    @override
+    async def _drain(self):
+        pass
+
+
+class _ReplayRequestIds(IntRequestIdProvider):
+    """Provides request ids of the captured commands."""
+    def __init__(self):
+        super().__init__()
+        self.ids: deque[int] = deque()
+
+    @override
+    def get_request_id(self) -> int:
+        return self.ids.popleft()
+
+
+def _sent_commands(data: bytes, payload_encoding: str) -> tuple[list[str], list[int]]:
+    """Returns commands and request ids of command and end packets sent in a write."""
+    commands = []
+    ids = []
+    offset = 0
+    while offset + _frame_header.size <= len(data):
+        length, request_id, packet_type = _frame_header.unpack_from(data, offset)
+        if packet_type == _EXEC_COMMAND:
+            payload = data[offset + _frame_header.size:offset + 4 + length - 2]
+            commands.append(payload.decode(payload_encoding))
+            ids.append(request_id)
+        elif commands and len(ids) % 2:
+            # End packet of the preceding command
+            ids.append(request_id)
+        offset += 4 + length
+    return commands, ids
+
+
+# pylint: disable-next=too-many-locals
+async def replay(
+        records: Iterator[CaptureRecord],
+        server_type: Server.Type,
+        on_response: Callable[[RconResponse], None],
+        realtime: bool = False,
+) -> int:
+    """
+    Replays captured traffic through packet decoding and RconClient response assembly.
+
+    Captured commands are sent again with their captured request ids, received
+    frames are decoded by next_packet and processed by RconClient.read of a client
+    per captured connection. Keepalive probes are not replayed, their answers are
+    dropped by the clients.
+
+    :param records: Captured records
+    :param server_type: Type of the captured server
+    :param on_response: Called with each assembled response
+    :param realtime: Keep captured timing, otherwise replay as fast as possible
+    :return: Number of replayed records
+    """
+    server = Server(
+        type=server_type,
+        name="replay",
+        host="localhost",
+        port=0,
+        rcon_port=0,
+        rcon_password="",
+    )
+    clients: dict[int, tuple[RconClient, _ReplayConnection, _ReplayRequestIds]] = {}
+    readers: list[asyncio.Task] = []
+    loop = asyncio.get_running_loop()
+    started, first = loop.time(), None
+    replayed = 0
+    for record in records:
+        if realtime:
+            first = record.timestamp if first is None else first
+            await asyncio.sleep(max(0.0, started + record.timestamp - first - loop.time()))
+
+        if record.connection not in clients:
+            connection, ids = _ReplayConnection(encoding(server_type)), _ReplayRequestIds()
+            client = RconClient(server, connection, ids)
+            clients[record.connection] = (client, connection, ids)
+            readers.append(asyncio.create_task(client.read(on_response)))
+        client, connection, ids = clients[record.connection]
+
+        if record.direction == Direction.SENT:
+            commands, request_ids = _sent_commands(record.data, encoding(server_type))
+            ids.ids.extend(request_ids)
+            if commands:
+                await client.send_commands([RconCommand("replay", cmd) for cmd in commands])
+        else:
+            connection.reader.feed_data(record.data)
+            # Let the reader process the frame
+            await asyncio.sleep(0)
+        replayed += 1
+
+    for client, connection, _ in clients.values():
+        connection.close()
+    await asyncio.gather(*readers, return_exceptions=True)
+    return replayed
@@ -0,0 +1,61 @@
+"""Creation of RCON services."""
+from typing import Optional
+
+from configuration import RconConfiguration
+from dao.dao import ServerDao
+from models.server import Server
+from pubsub.pubsub import PubSub
+from rcon.connect_scheduler import ConnectScheduler
+from rcon.connector import Connector
+from rcon.rcon_service import RconService
+from rcon.workers import RconWorkerPool, ShardedRconService
+
+
+class RconServiceFactory:
+    """Creates RCON services of servers, running them in worker processes when configured."""
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+            self,
+            pubsub: PubSub,
+            server_dao: ServerDao,
+            configuration: RconConfiguration,
+            connect_scheduler: ConnectScheduler,
+            connector: Connector,
+            worker_pool: Optional[RconWorkerPool] = None,
+    ):
+        """
+        :param pubsub: PubSub the services communicate over
+        :param server_dao: Supplies current models of servers
+        :param configuration: Configuration of RCON connections
+        :param connect_scheduler: Schedules connection attempts of services in this process
+        :param connector: Resolves and connects to RCON hosts for services in this process
+        :param worker_pool: Worker processes to run the services in, None to run them here
+        """
+        self._pubsub = pubsub
+        self._server_dao = server_dao
+        self._configuration = configuration
+        self._connect_scheduler = connect_scheduler
+        self._connector = connector
+        self._worker_pool = worker_pool
+
+    def create(self, server: Server) -> RconService | ShardedRconService:
+        """
+        Creates RCON service of the server.
+
+        :param server: Server the service connects to
+        :return: Service to launch
+        """
+        if self._worker_pool:
+            return self._worker_pool.service(server)
+
+        def server_supplier():
+            return self._server_dao.get_by_uid(server.uid)
+
+        return RconService(
+            self._pubsub,
+            server.uid,
+            server_supplier,
+            self._configuration,
+            self._connect_scheduler,
+            self._connector,
+        )
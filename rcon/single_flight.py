@@ -0,0 +1,90 @@
+"""Deduplication and caching of read-only RCON commands."""
+import asyncio
+import dataclasses
+import logging
+import time
+from typing import Callable, Awaitable, Collection
+
+from messages.rcon import RconCommand, RconResponse
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_command(command: str) -> str:
+    """Normalizes whitespace in a command."""
+    return " ".join(command.split())
+
+
+class SingleFlightExecutor:
+    """
+    Executes read-only commands at most once at a time.
+
+    Identical read-only commands issued while one is in flight wait for its response
+    instead of being sent again. Responses are cached for a short time. Every requester
+    receives the shared response as issued by them.
+
+    Commands that are not read-only must not be deduplicated, as each of them changes
+    state of the server.
+    """
+    def __init__(
+            self,
+            execute: Callable[[RconCommand], Awaitable[RconResponse]],
+            read_only_commands: Collection[str],
+            cache_ttl: float,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param execute: Executes a command and returns its response
+        :param read_only_commands: Commands that are safe to deduplicate and cache
+        :param cache_ttl: Number of seconds responses are cached for
+        :param clock: Monotonic clock in seconds
+        """
+        self._execute = execute
+        self._read_only_commands = {normalize_command(c) for c in read_only_commands}
+        self._cache_ttl = cache_ttl
+        self._clock = clock
+        self._in_flight: dict[str, asyncio.Task[RconResponse]] = {}
+        # Cached responses with their expiration time
+        self._cache: dict[str, tuple[float, RconResponse]] = {}
+
+    def handles(self, msg: RconCommand) -> bool:
+        """Checks if the command is read-only and gets deduplicated."""
+        return normalize_command(msg.command) in self._read_only_commands
+
+    async def execute(self, msg: RconCommand) -> RconResponse:
+        """
+        Executes a read-only command or shares response of an identical one.
+
+        :param msg: Read-only command
+        :return: Response to the command as issued by the user of the command
+        """
+        key = normalize_command(msg.command)
+
+        cached = self._cache.get(key)
+        if cached and cached[0] > self._clock():
+            logger.debug("Serving command %s from cache", key)
+            return dataclasses.replace(cached[1], issuing_user=msg.issuing_user)
+
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = asyncio.create_task(self._execute_and_cache(key, msg))
+            self._in_flight[key] = flight
+            flight.add_done_callback(lambda done: self._land(key, done))
+        else:
+            logger.debug("Joining command %s in flight", key)
+
+        # Requester giving up must not cancel the command for the others
+        response = await asyncio.shield(flight)
+        return dataclasses.replace(response, issuing_user=msg.issuing_user)
+
+    async def _execute_and_cache(self, key: str, msg: RconCommand) -> RconResponse:
+        response = await self._execute(msg)
+        if self._cache_ttl > 0:
+            self._cache[key] = (self._clock() + self._cache_ttl, response)
+        return response
+
+    def _land(self, key: str, flight: asyncio.Task):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if not flight.cancelled() and flight.exception():
+            logger.debug("Command %s failed: %s", key, flight.exception())
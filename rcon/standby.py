@@ -0,0 +1,192 @@
+"""RCON connection with a warm standby connection."""
+import asyncio
+import logging
+from typing import Callable, Awaitable, Optional
+
+from messages.rcon import RconCommand, RconResponse, RconResponseChunk
+from models.server import Server
+from rcon.rcon_client import RconClient, CommandResult
+from rcon.rcon_client_errors import ConnectionClosedError
+
+logger = logging.getLogger(__name__)
+
+
+class StandbyRconClient:
+    """
+    RCON connection backed by a pre-authenticated standby connection.
+
+    All commands go over the primary connection. When the primary connection fails,
+    the standby connection is promoted to primary right away and a new standby
+    connection is opened in the background. Failover takes until the promoted
+    connection delivers its first response.
+    """
+    def __init__(
+            self,
+            client: RconClient,
+            connect: Callable[[], Awaitable[RconClient]],
+            on_failover: Optional[Callable[[float], None]] = None,
+    ):
+        """
+        :param client: Already connected primary client
+        :param connect: Opens a new connection (retrying on failure)
+        :param on_failover: Called with seconds between the primary connection failing
+            and the first response received over the standby connection taking over
+        """
+        self._primary = client
+        self._standby: Optional[RconClient] = None
+        self._connect = connect
+        self._on_failover = on_failover
+        # Loop time the primary connection failed at, None once a response was received
+        # over the connection taking over
+        self._failed_at: Optional[float] = None
+
+    async def send_command(self, msg: RconCommand):
+        """Sends a command over the primary connection."""
+        await self._primary.send_command(msg)
+
+    async def send_commands(self, msgs: list[RconCommand]):
+        """Sends commands over the primary connection in a single write."""
+        await self._primary.send_commands(msgs)
+
+    async def execute(
+            self,
+            msg: RconCommand,
+            timeout: Optional[float] = None,
+            silent: bool = False,
+    ) -> RconResponse:
+        """Executes a command over the primary connection. See RconClient.execute."""
+        return await self._primary.execute(msg, timeout, silent)
+
+    async def execute_batch(
+            self,
+            msgs: list[RconCommand],
+            timeout: Optional[float] = None,
+            silent: bool = False,
+    ) -> list[CommandResult]:
+        """Executes commands over the primary connection. See RconClient.execute_batch."""
+        return await self._primary.execute_batch(msgs, timeout, silent)
+
+    async def probe(self, timeout: float) -> float:
+        """
+        Sends keepalive probes over both connections. See RconClient.probe.
+
+        Connections that do not answer are closed - the primary fails over,
+        the standby is replaced.
+
+        :return: Round-trip time of the primary connection, of the standby one when
+            the primary did not answer
+        """
+        clients = [self._primary] + ([self._standby] if self._standby else [])
+        results = await asyncio.gather(
+            *(client.probe(timeout) for client in clients),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, float):
+                return result
+        raise results[0]
+
+    async def read(
+            self,
+            on_response: Callable[[RconResponse], None],
+            on_error: Callable[[str], None] | None = None,
+            on_chunk: Callable[[RconResponseChunk], None] | None = None,
+    ):
+        """
+        Coroutine that reads responses from the primary connection.
+
+        Keeps a standby connection open and fails over to it when the primary fails.
+
+        :raises ConnectionClosedError: Primary connection failed while no standby
+            connection was open
+        """
+        loop = asyncio.get_running_loop()
+
+        def start_reading(client: RconClient) -> asyncio.Task:
+            def responded():
+                if self._failed_at is not None and client is self._primary:
+                    latency = loop.time() - self._failed_at
+                    self._failed_at = None
+                    if self._on_failover:
+                        self._on_failover(latency)
+
+            def response(msg: RconResponse):
+                responded()
+                on_response(msg)
+
+            def chunk(msg: RconResponseChunk):
+                responded()
+                on_chunk(msg)
+
+            return asyncio.create_task(
+                client.read(response, on_error, chunk if on_chunk else None)
+            )
+
+        primary_read = start_reading(self._primary)
+        standby_read: Optional[asyncio.Task] = None
+        connecting: Optional[asyncio.Task] = asyncio.create_task(self._connect())
+
+        try:
+            while True:
+                await asyncio.wait(
+                    {t for t in (primary_read, standby_read, connecting) if t},
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if connecting and connecting.done():
+                    self._standby = connecting.result()
+                    standby_read = start_reading(self._standby)
+                    connecting = None
+
+                if standby_read and standby_read.done():
+                    logger.warning(
+                        "Standby RCON connection to %s failed (%s), replacing it.",
+                        self.server.name,
+                        standby_read.exception(),
+                    )
+                    self._standby.close()
+                    self._standby = None
+                    standby_read = None
+                    connecting = asyncio.create_task(self._connect())
+
+                if primary_read.done():
+                    if self._failed_at is None:
+                        self._failed_at = loop.time()
+                    self._primary.close()
+                    if self._standby is None:
+                        # Commands must not wait on the closed primary until a connection
+                        # is opened, the caller reconnects instead
+                        raise ConnectionClosedError() from primary_read.exception()
+                    logger.warning(
+                        "RCON connection to %s failed (%s), failing over to standby.",
+                        self.server.name,
+                        primary_read.exception(),
+                    )
+                    self._primary, primary_read = self._standby, standby_read
+                    self._standby, standby_read = None, None
+                    connecting = asyncio.create_task(self._connect())
+        finally:
+            for task in (primary_read, standby_read, connecting):
+                if task:
+                    task.cancel()
+
+    def close(self):
+        """Closes both connections."""
+        self._primary.close()
+        if self._standby:
+            self._standby.close()
+            self._standby = None
+
+    def has_pending_requests_of(self, user: str) -> bool:
+        """Checks if there are commands of given user waiting for a response on the primary."""
+        return self._primary.has_pending_requests_of(user)
+
+    @property
+    def standby_ready(self) -> bool:
+        """Whether the standby connection is open."""
+        return self._standby is not None
+
+    @property
+    def server(self) -> Server:
+        """Returns model of the server the client is connected to."""
+        return self._primary.server
@@ -0,0 +1,92 @@
+"""Wire-level statistics of RCON connections."""
+import bisect
+import copy
+from dataclasses import dataclass, field
+from typing import Iterable
+
+# Upper bounds of histogram buckets - seconds for durations, counts for fragments
+DURATION_BOUNDS = tuple(0.001 * 2 ** i for i in range(15))
+FRAGMENT_BOUNDS = tuple(2 ** i for i in range(10))
+
+# Length prefix, request id, packet type and two padding bytes around the payload
+PACKET_OVERHEAD = 14
+
+
+@dataclass
+class Histogram:
+    """Histogram of values in buckets with given upper bounds, the last bucket is unbounded."""
+    bounds: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    count: int = 0
+    total: float = 0
+    max: float = 0
+
+    def __post_init__(self):
+        if not self.counts:
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    def record(self, value: float):
+        """Records a value."""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        """Mean of the recorded values."""
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, q: float) -> float:
+        """
+        Returns upper bound of the bucket containing given percentile.
+
+        :param q: Percentile between 0 and 100
+        :return: Bucket upper bound, the maximal value for the unbounded bucket
+        """
+        if not self.count:
+            return 0
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.bounds, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+@dataclass
+class WireStats:
+    """
+    Statistics of RCON connections to a server.
+
+    Shared by all connections to the server, kept only when enabled in configuration.
+    """
+    bytes_in: int = 0
+    bytes_out: int = 0
+    # Packets by packet class name
+    packets_in: dict[str, int] = field(default_factory=dict)
+    packets_out: dict[str, int] = field(default_factory=dict)
+    # Response packets each response was split into
+    fragments: Histogram = field(default_factory=lambda: Histogram(FRAGMENT_BOUNDS))
+    # Seconds from sending a command to receiving its end marker
+    round_trip: Histogram = field(default_factory=lambda: Histogram(DURATION_BOUNDS))
+    # Seconds to open a connection and log in
+    connect: Histogram = field(default_factory=lambda: Histogram(DURATION_BOUNDS))
+
+    def record_received(self, packet: object, payload_size: int):
+        """Records a received packet."""
+        name = type(packet).__name__
+        self.packets_in[name] = self.packets_in.get(name, 0) + 1
+        self.bytes_in += PACKET_OVERHEAD + payload_size
+
+    def record_sent(self, packets: Iterable[object], size: int):
+        """Records packets sent in a single write of size bytes."""
+        for packet in packets:
+            name = type(packet).__name__
+            self.packets_out[name] = self.packets_out.get(name, 0) + 1
+        self.bytes_out += size
+
+    def snapshot(self) -> "WireStats":
+        """Returns a copy of the statistics."""
+        return copy.deepcopy(self)
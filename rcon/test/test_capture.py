@@ -0,0 +1,152 @@
+"""RCON traffic capture and replay tests."""
+# pylint: disable=missing-class-docstring
+
+import asyncio
+import itertools
+import os
+import tempfile
+import unittest
+
+from messages.rcon import RconCommand, RconResponse
+from models.server import Server
+from rcon.capture import CaptureWriter, Direction, capture_files, read_capture
+from rcon.rcon_client import RconClientManager
+from rcon.replay import replay
+from rcon.request_id import IntRequestIdProvider
+from rcon.types import RconTransport
+from utils.fake_rcon_server import FakeRconServer
+
+
+class CaptureWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.dir.name, "server.rcap")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_records_are_read_back(self):
+        """Tests records are read back with their timestamps, directions and connections."""
+        clock = itertools.count(1.0)
+        writer = CaptureWriter(self.path, Server.Type.SOURCE_SERVER, clock=lambda: next(clock))
+        connection = writer.connection_id()
+        writer.record(connection, Direction.SENT, b"request")
+        writer.record(connection, Direction.RECEIVED, b"response")
+        writer.close()
+
+        server_type, records = read_capture(self.path)
+
+        self.assertEqual(Server.Type.SOURCE_SERVER, server_type)
+        self.assertEqual(
+            [
+                (1.0, Direction.SENT, connection, b"request"),
+                (2.0, Direction.RECEIVED, connection, b"response"),
+            ],
+            [(r.timestamp, r.direction, r.connection, r.data) for r in records],
+        )
+
+    def test_rotation_keeps_max_files(self):
+        """Tests capture is rotated at max file size and only max files are kept."""
+        writer = CaptureWriter(
+            self.path,
+            Server.Type.MINECRAFT_SERVER,
+            max_file_size=100,
+            max_files=3,
+        )
+        for i in range(10):
+            writer.record(1, Direction.RECEIVED, bytes([i]) * 50)
+        writer.close()
+
+        files = capture_files(self.path)
+
+        self.assertEqual([f"{self.path}.2", f"{self.path}.1", self.path], files)
+        data = [record.data[0] for file in files for record in read_capture(file)[1]]
+        self.assertEqual([7, 8, 9], data)
+        self.assertTrue(all(os.path.getsize(file) <= 100 for file in files))
+
+    def test_reopened_capture_is_appended(self):
+        """Tests capture of a restarted writer continues the existing file."""
+        for data in (b"first", b"second"):
+            writer = CaptureWriter(self.path, Server.Type.MINECRAFT_SERVER)
+            writer.record(1, Direction.SENT, data)
+            writer.close()
+
+        _, records = read_capture(self.path)
+
+        self.assertEqual([b"first", b"second"], [record.data for record in records])
+
+    def test_not_a_capture(self):
+        """Tests reading a file which is not a capture fails."""
+        with open(self.path, "wb") as file:
+            file.write(b"garbage")
+
+        with self.assertRaises(ValueError):
+            read_capture(self.path)
+
+
+class CaptureReplayTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.dir.name, "server.rcap")
+
+    async def asyncTearDown(self):
+        self.dir.cleanup()
+
+    async def _capture(self, transport: RconTransport, **kwargs) -> list[str]:
+        """Executes commands on a captured connection, returns their responses."""
+        async with FakeRconServer(**kwargs) as fake:
+            model = fake.model()
+            writer = CaptureWriter(self.path, model.type)
+
+            async def supply():
+                return model
+
+            async def connect_once(coro, _):
+                return await coro()
+
+            client = await RconClientManager(
+                IntRequestIdProvider(),
+                supply,
+                transport=transport,
+                retry_connect=connect_once,
+                capture=writer,
+            ).connect()
+            read = asyncio.create_task(client.read(lambda _: None))
+            responses = [
+                (await client.execute(RconCommand("user", f"say {i}"), timeout=1)).response
+                for i in range(3)
+            ]
+            client.close()
+            await asyncio.gather(read, return_exceptions=True)
+            writer.close()
+        return responses
+
+    async def _replay(self) -> list[str]:
+        server_type, records = read_capture(self.path)
+        replayed: list[RconResponse] = []
+        await replay(records, server_type, replayed.append)
+        return [response.response for response in replayed]
+
+    async def test_replay_stream(self):
+        """Tests responses captured over streams are assembled again by the replay."""
+        responses = await self._capture(RconTransport.STREAM)
+
+        self.assertEqual(responses, await self._replay())
+
+    async def test_replay_buffered_fragmented(self):
+        """Tests fragmented responses captured by the buffered protocol are assembled again."""
+        responses = await self._capture(
+            RconTransport.BUFFERED,
+            response_size=10000,
+            fragment_size=4096,
+        )
+
+        self.assertEqual(["x" * 10000] * 3, await self._replay())
+        self.assertEqual(responses, await self._replay())
+
+    async def test_login_is_not_captured(self):
+        """Tests the password sent at login is not part of the capture."""
+        await self._capture(RconTransport.STREAM, server_type=Server.Type.SOURCE_SERVER)
+
+        with open(self.path, "rb") as file:
+            self.assertNotIn(b"test", file.read())
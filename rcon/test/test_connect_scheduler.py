@@ -0,0 +1,89 @@
+"""Connection scheduler tests."""
+# pylint: disable=missing-class-docstring
+
+import asyncio
+import time
+import unittest
+import uuid
+
+from rcon.connect_scheduler import ConnectScheduler
+
+
+class FlakyConnect:
+    """Fails given number of times, then succeeds."""
+    def __init__(self, failures: int, tracker: dict):
+        self._failures = failures
+        self._tracker = tracker
+        self.attempts: list[float] = []
+
+    async def __call__(self) -> str:
+        self.attempts.append(time.monotonic())
+        self._tracker["in_progress"] += 1
+        self._tracker["max"] = max(self._tracker["max"], self._tracker["in_progress"])
+        try:
+            await asyncio.sleep(0.005)
+            if len(self.attempts) <= self._failures:
+                raise ConnectionRefusedError()
+            return "connected"
+        finally:
+            self._tracker["in_progress"] -= 1
+
+
+class ConnectSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tracker = {"in_progress": 0, "max": 0}
+
+    async def test_concurrency_cap(self):
+        """Tests at most max_concurrent connects are in progress."""
+        scheduler = ConnectScheduler(max_concurrent=2)
+        connects = [FlakyConnect(0, self.tracker) for _ in range(5)]
+
+        results = await asyncio.gather(*(
+            scheduler.connect(uuid.uuid4(), connect, (OSError,))
+            for connect in connects
+        ))
+
+        self.assertEqual(["connected"] * 5, results)
+        self.assertEqual(2, self.tracker["max"])
+
+    async def test_next_attempt_state(self):
+        """Tests failed connects expose time of the next attempt until they succeed."""
+        scheduler = ConnectScheduler(backoff=0.05, max_backoff=0.05)
+        key = uuid.uuid4()
+        connect_task = asyncio.create_task(
+            scheduler.connect(key, FlakyConnect(1, self.tracker), (OSError,))
+        )
+        await asyncio.sleep(0.02)
+
+        state = scheduler.state(key)
+        self.assertEqual(1, state.failures)
+        self.assertIsNotNone(state.next_attempt_at)
+
+        self.assertEqual("connected", await connect_task)
+        self.assertIsNone(scheduler.state(key))
+
+    async def test_shared_retry_budget(self):
+        """Tests retries of all servers draw from the shared budget."""
+        scheduler = ConnectScheduler(backoff=0.001, max_backoff=0.001, retry_rate=20, retry_burst=1)
+        connects = [FlakyConnect(1, self.tracker) for _ in range(2)]
+
+        await asyncio.gather(*(
+            scheduler.connect(uuid.uuid4(), connect, (OSError,))
+            for connect in connects
+        ))
+
+        retries = sorted(connect.attempts[1] for connect in connects)
+        self.assertGreaterEqual(retries[1] - retries[0], 0.04)
+
+    async def test_reconnect_draws_budget(self):
+        """Tests first attempts of reconnects draw from the retry budget."""
+        scheduler = ConnectScheduler(retry_rate=20, retry_burst=1)
+        connects = [FlakyConnect(0, self.tracker) for _ in range(2)]
+
+        await asyncio.gather(*(
+            scheduler.connect(uuid.uuid4(), connect, (OSError,), retry=True)
+            for connect in connects
+        ))
+
+        attempts = sorted(connect.attempts[0] for connect in connects)
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.04)
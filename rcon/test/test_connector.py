@@ -0,0 +1,87 @@
+"""RCON host connector tests."""
+# pylint: disable=missing-class-docstring,protected-access
+
+import asyncio
+import socket
+import unittest
+
+from rcon.connector import Connector
+
+
+class ConnectorTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.connector = Connector(ttl=60, negative_ttl=60, happy_eyeballs_delay=0.05)
+        self.server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_resolution_cached(self):
+        """Tests host is resolved once and its addresses are reused."""
+        first = await self.connector.resolve("127.0.0.1", self.port)
+        second = await self.connector.resolve("127.0.0.1", self.port)
+
+        self.assertEqual(first, second)
+        self.assertEqual(1, self.connector.stats.resolutions.count)
+        self.assertEqual(1, self.connector.stats.cache_hits)
+
+    async def test_failed_resolution_cached(self):
+        """Tests failed resolution is not repeated within negative TTL."""
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                await self.connector.resolve("host.invalid", self.port)
+
+        self.assertEqual(1, self.connector.stats.resolutions.failures)
+        self.assertEqual(1, self.connector.stats.cache_hits)
+
+    async def test_next_address_after_failure(self):
+        """Tests connect falls back to the next address when the first one refuses."""
+        closed = socket.socket()
+        closed.bind(("127.0.0.1", 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+
+        sock = await self.connector._race([
+            (socket.AF_INET, ("127.0.0.1", closed_port)),
+            (socket.AF_INET, ("127.0.0.1", self.port)),
+        ])
+
+        self.assertEqual(self.port, sock.getpeername()[1])
+        sock.close()
+
+    async def test_refused_connects_use_cache(self):
+        """Tests failed connects keep cached addresses until max_connect_failures in a row."""
+        closed = socket.socket()
+        closed.bind(("127.0.0.1", 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+
+        for _ in range(3):
+            with self.assertRaises(OSError):
+                await self.connector.connect("localhost", closed_port)
+
+        self.assertEqual(1, self.connector.stats.resolutions.count)
+        self.assertEqual(3, self.connector.stats.connects.failures)
+        with self.assertRaises(OSError):
+            await self.connector.connect("localhost", closed_port)
+        self.assertEqual(2, self.connector.stats.resolutions.count)
+
+    async def test_stats_logged(self):
+        """Tests statistics are logged once the log interval passed."""
+        self.connector._log_interval = 0.01
+        await asyncio.sleep(0.02)
+
+        with self.assertLogs("rcon.connector", "INFO") as logs:
+            sock = await self.connector.connect("127.0.0.1", self.port)
+        sock.close()
+
+        self.assertIn("connected 1 times", logs.output[0])
+
+    async def test_connect(self):
+        """Tests connect records its latency."""
+        sock = await self.connector.connect("127.0.0.1", self.port)
+        sock.close()
+
+        self.assertEqual(1, self.connector.stats.connects.count)
@@ -0,0 +1,71 @@
+"""Fan-out executor tests."""
+# pylint: disable=missing-class-docstring
+
+import asyncio
+import unittest
+
+from messages.rcon import RconCommand, RconResponse
+from models.server import Server
+from rcon.fan_out import FanOutExecutor
+from utils.testing import sample_server
+
+
+class FakeRconService:
+    """Answers commands after a delay, keeps track of commands in flight."""
+    def __init__(self, delay: float, tracker: dict):
+        self._delay = delay
+        self._tracker = tracker
+
+    async def execute(self, msg: RconCommand, timeout: float) -> RconResponse:
+        """Answers the command with its text."""
+        self._tracker["in_flight"] += 1
+        self._tracker["max"] = max(self._tracker["max"], self._tracker["in_flight"])
+        try:
+            async with asyncio.timeout(timeout):
+                await asyncio.sleep(self._delay)
+            return RconResponse(msg.issuing_user, Server.Type.MINECRAFT_SERVER, msg.command, "ok")
+        finally:
+            self._tracker["in_flight"] -= 1
+
+
+class FanOutExecutorTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tracker = {"in_flight": 0, "max": 0}
+        self.servers = [sample_server() for _ in range(4)]
+        delays = [0.04, 0.01, 0.2, 0.02]
+        self.services = {
+            server.uid: FakeRconService(delay, self.tracker)
+            for server, delay in zip(self.servers[:3], delays)
+        }
+
+    async def _collect(self, concurrency: int, timeout: float):
+        executor = FanOutExecutor(self.services.get, concurrency, timeout)
+        return [
+            result async for result
+            in executor.execute(RconCommand("user", "say hi"), self.servers)
+        ]
+
+    async def test_results_streamed_as_servers_answer(self):
+        """Tests results come in order the servers answer."""
+        results = await self._collect(concurrency=10, timeout=1)
+
+        self.assertEqual(
+            [self.servers[i].uid for i in (3, 1, 0, 2)],
+            [r.server_uid for r in results],
+        )
+        self.assertEqual("Not connected to RCON", results[0].error)
+        self.assertEqual(["ok"] * 3, [r.response for r in results[1:]])
+
+    async def test_concurrency_cap(self):
+        """Tests the command is in flight on at most concurrency servers."""
+        await self._collect(concurrency=2, timeout=1)
+
+        self.assertEqual(2, self.tracker["max"])
+
+    async def test_timeout(self):
+        """Tests servers not answering in time are reported as timed out."""
+        results = await self._collect(concurrency=10, timeout=0.1)
+
+        by_server = {r.server_uid: r for r in results}
+        self.assertEqual("Timed out", by_server[self.servers[2].uid].error)
+        self.assertEqual("ok", by_server[self.servers[0].uid].response)
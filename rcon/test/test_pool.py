@@ -0,0 +1,70 @@
+"""RCON client pool tests."""
+# pylint: disable=missing-class-docstring
+
+import asyncio
+import unittest
+
+from messages.rcon import RconCommand
+from rcon.pool import RconClientPool
+from rcon.rcon_client import RconClient
+from rcon.request_id import IntRequestIdProvider
+from utils.testing import FakeRconConnection, sample_server
+
+
+class RconClientPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.connections: list[FakeRconConnection] = []
+        self.published = []
+        self.pool = RconClientPool(await self._connect(), 2, self._connect)
+        self.read_task = asyncio.create_task(self.pool.read(self.published.append))
+        await asyncio.sleep(0.01)
+
+    async def asyncTearDown(self):
+        self.read_task.cancel()
+        self.pool.close()
+
+    async def test_fills_pool(self):
+        """Tests pool opens the remaining connections."""
+        self.assertEqual(2, self.pool.size)
+
+    async def test_least_busy_dispatch(self):
+        """Tests commands are sent using the connection with fewer pending commands."""
+        self.connections[0].muted = True
+        await self.pool.send_command(RconCommand("alice", "slow"))
+
+        response = await self.pool.execute(RconCommand("bob", "list"), timeout=1)
+
+        self.assertEqual("list", response.response)
+        self.assertEqual(1, len(self.connections[1].sent_packets) // 2)
+
+    async def test_user_affinity(self):
+        """Tests commands of a user follow the user's pending commands."""
+        self.connections[0].muted = True
+        await self.pool.send_command(RconCommand("alice", "first"))
+        await self.pool.send_command(RconCommand("alice", "second"))
+
+        self.assertEqual(4, len(self.connections[0].sent_packets))
+        self.assertEqual([], self.connections[1].sent_packets)
+
+    async def test_replaces_failed_connection(self):
+        """Tests failed connection is replaced and the pool keeps working."""
+        self.connections[0].close()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(3, len(self.connections))
+        self.assertEqual(2, self.pool.size)
+        response = await self.pool.execute(RconCommand("alice", "list"), timeout=1)
+        self.assertEqual("list", response.response)
+
+    async def test_fails_without_connections(self):
+        """Tests reading fails once every connection failed."""
+        for connection in self.connections:
+            connection.close()
+
+        with self.assertRaises(asyncio.IncompleteReadError):
+            await self.read_task
+
+    async def _connect(self) -> RconClient:
+        connection = FakeRconConnection()
+        self.connections.append(connection)
+        return RconClient(sample_server(), connection, IntRequestIdProvider())
@@ -0,0 +1,68 @@
+"""RCON buffered protocol tests."""
+# pylint: disable=missing-class-docstring,protected-access
+
+import asyncio
+import unittest
+
+from models.server import Server
+from rcon.packets import CommandResponse, LoginSuccessResponse, encoding
+from rcon.protocol import RconBufferedProtocol
+from rcon.rcon_client_errors import InvalidPacketError
+from utils.testing import feed_protocol, response_packet
+
+
+class RconBufferedProtocolTest(unittest.IsolatedAsyncioTestCase):
+    async def test_packets_in_single_chunk(self):
+        """Tests multiple packets received at once are all decoded."""
+        protocol = RconBufferedProtocol()
+        data = response_packet(1, 2, b"") + response_packet(2, 0, b"hello")
+
+        feed_protocol(protocol, data, len(data))
+
+        self.assertEqual(LoginSuccessResponse(1), await protocol.read())
+        self.assertEqual(CommandResponse(2, b"hello"), await protocol.read())
+
+    async def test_fragmented_packets(self):
+        """Tests packets split across many reads are decoded."""
+        protocol = RconBufferedProtocol(buffer_size=16)
+        payload = "ěščř".encode(encoding(Server.Type.MINECRAFT_SERVER)) * 100
+        data = response_packet(7, 0, payload) + response_packet(8, 0, b"end")
+
+        feed_protocol(protocol, data, 3)
+
+        self.assertEqual(CommandResponse(7, payload), await protocol.read())
+        self.assertEqual(CommandResponse(8, b"end"), await protocol.read())
+
+    async def test_read_waits_for_packet(self):
+        """Tests read waits until a complete packet is received."""
+        protocol = RconBufferedProtocol()
+        data = response_packet(3, 0, b"late")
+        read_task = asyncio.create_task(protocol.read())
+
+        feed_protocol(protocol, data[:5], 5)
+        await asyncio.sleep(0)
+        self.assertFalse(read_task.done())
+
+        feed_protocol(protocol, data[5:], len(data))
+        self.assertEqual(CommandResponse(3, b"late"), await read_task)
+
+    async def test_connection_lost(self):
+        """Tests read fails after connection is closed and all packets are read."""
+        protocol = RconBufferedProtocol()
+        data = response_packet(4, 0, b"last")
+        feed_protocol(protocol, data, len(data))
+        protocol.connection_lost(None)
+
+        self.assertEqual(CommandResponse(4, b"last"), await protocol.read())
+        with self.assertRaises(asyncio.IncompleteReadError):
+            await protocol.read()
+
+    async def test_invalid_length(self):
+        """Tests corrupted length prefix fails the connection."""
+        protocol = RconBufferedProtocol()
+        data = b"\xFF\xFF\xFF\xFF" + response_packet(5, 0, b"")
+
+        feed_protocol(protocol, data, len(data))
+
+        with self.assertRaises(InvalidPacketError):
+            await protocol.read()
@@ -0,0 +1,163 @@
+"""RCON command rate limiting tests."""
+# pylint: disable=missing-class-docstring
+
+import asyncio
+import dataclasses
+import unittest
+
+from messages.rcon import RconCommand
+from rcon.rcon_client import ConnectionClosedError
+from rcon.rate_limit import TokenBucket, CommandRateLimiter, Admission
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_refill(self):
+        """Tests tokens are refilled at the rate up to the burst."""
+        clock = FakeClock()
+        bucket = TokenBucket(10, 2, clock)
+        bucket.take()
+        bucket.take()
+
+        self.assertAlmostEqual(0.1, bucket.delay())
+        clock.now = 1
+        self.assertEqual(2, bucket.tokens)
+
+
+class CommandRateLimiterTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    async def test_admission(self):
+        """Tests users over the limit are notified once and their excess commands dropped."""
+        limiter = CommandRateLimiter(10, 1, max_queued=3, clock=self.clock)
+
+        admissions = [limiter.submit(RconCommand("alice", f"cmd{i}")) for i in range(4)]
+
+        self.assertEqual(
+            [Admission.ACCEPTED, Admission.THROTTLED, Admission.DELAYED, Admission.REJECTED],
+            admissions,
+        )
+        self.assertEqual(3, limiter.queued)
+
+    async def test_burst(self):
+        """Tests a batch contains at most burst commands."""
+        limiter = CommandRateLimiter(1000, 2, clock=self.clock)
+        for i in range(3):
+            limiter.submit(RconCommand("alice", f"cmd{i}"))
+
+        batch = await limiter.next_batch(10)
+
+        self.assertEqual(["cmd0", "cmd1"], [msg.command for msg in batch])
+        self.clock.now = 1
+        self.assertEqual(["cmd2"], [msg.command for msg in await limiter.next_batch(10)])
+
+    async def test_user_limit(self):
+        """Tests a user out of tokens does not hold back commands of other users."""
+        limiter = CommandRateLimiter(1000, 10, user_rate=1, user_burst=1, clock=self.clock)
+        limiter.submit(RconCommand("alice", "first"))
+        limiter.submit(RconCommand("alice", "second"))
+        limiter.submit(RconCommand("bob", "third"))
+
+        batch = await limiter.next_batch(10)
+
+        self.assertEqual(["first", "third"], [msg.command for msg in batch])
+        self.assertEqual(1, limiter.queued)
+
+    async def test_fair_queue(self):
+        """Tests a user with many queued commands does not hold back commands of others."""
+        limiter = CommandRateLimiter(1000, 10, clock=self.clock)
+        for i in range(5):
+            limiter.submit(RconCommand("script", f"script{i}"))
+        limiter.submit(RconCommand("alice", "alice0"))
+        limiter.submit(RconCommand("alice", "alice1"))
+
+        batch = await limiter.next_batch(4)
+
+        self.assertEqual(
+            ["script0", "alice0", "script1", "alice1"],
+            [msg.command for msg in batch],
+        )
+
+    async def test_user_weights(self):
+        """Tests users get shares of released commands proportional to their weights."""
+        limiter = CommandRateLimiter(1000, 10, clock=self.clock, user_weights={"alice": 2})
+        for i in range(4):
+            limiter.submit(RconCommand("alice", f"alice{i}"))
+            limiter.submit(RconCommand("bob", f"bob{i}"))
+
+        batch = await limiter.next_batch(6)
+
+        self.assertEqual(4, sum(msg.issuing_user == "alice" for msg in batch))
+
+    async def test_priority_lane(self):
+        """Tests commands with priority are released before queued commands of others."""
+        limiter = CommandRateLimiter(1000, 10, clock=self.clock, priority_lane=True)
+        for i in range(3):
+            limiter.submit(RconCommand("script", f"script{i}"))
+        limiter.submit(RconCommand("admin", "stop", priority=True))
+
+        batch = await limiter.next_batch(2)
+
+        self.assertEqual(["stop", "script0"], [msg.command for msg in batch])
+
+    async def test_user_queues(self):
+        """Tests queue depth and wait times of each user are reported."""
+        limiter = CommandRateLimiter(1, 1, clock=self.clock)
+        limiter.submit(RconCommand("alice", "first"))
+        limiter.submit(RconCommand("alice", "second"))
+        self.clock.now = 2
+        await limiter.next_batch(10)
+        self.clock.now = 3
+
+        stats = limiter.user_queues()["alice"]
+
+        self.assertEqual(
+            (1, 3, 1, 2),
+            (stats.queued, stats.oldest_wait, stats.released, stats.total_wait),
+        )
+        self.assertEqual(2, dataclasses.asdict(stats)["mean_wait"])
+
+    async def test_reserved_commands(self):
+        """Tests reserved commands are released by the rate limit in the fair queue."""
+        limiter = CommandRateLimiter(1, 2, clock=self.clock)
+        releases = limiter.reserve([RconCommand("alice", f"say {i}") for i in range(3)])
+        limiter.submit(RconCommand("bob", "list"))
+
+        batch = await limiter.next_batch(10)
+
+        self.assertEqual(["list"], [msg.command for msg in batch])
+        self.assertEqual([True, False, False], [release.done() for release in releases])
+        self.clock.now = 1
+        dispatcher = asyncio.create_task(limiter.next_batch(10))
+        await asyncio.sleep(0)
+        self.assertEqual([True, True, False], [release.done() for release in releases])
+        dispatcher.cancel()
+
+    async def test_cancelled_reservation(self):
+        """Tests cancelled reservations are skipped without taking tokens."""
+        limiter = CommandRateLimiter(1, 1, clock=self.clock)
+        releases = limiter.reserve([RconCommand("alice", "say 0")])
+        releases[0].cancel()
+        limiter.submit(RconCommand("bob", "list"))
+
+        batch = await limiter.next_batch(10)
+
+        self.assertEqual(["list"], [msg.command for msg in batch])
+
+    async def test_close_fails_reservations(self):
+        """Tests reservations fail when the limiter is closed."""
+        limiter = CommandRateLimiter(1, 1, clock=self.clock)
+        releases = limiter.reserve([RconCommand("alice", "say 0")])
+
+        limiter.close()
+
+        with self.assertRaises(ConnectionClosedError):
+            await releases[0]
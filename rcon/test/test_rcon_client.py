@@ -0,0 +1,208 @@
+"""RCON client tests."""
+# pylint: disable=missing-class-docstring,protected-access
+
+import asyncio
+import unittest
+
+from messages.rcon import RconCommand
+from rcon.rcon_client import RconClient
+from rcon.rcon_client_errors import ConnectionClosedError, KeepaliveTimeoutError
+from rcon.request_id import IntRequestIdProvider
+from utils.testing import FakeRconConnection, sample_server
+
+
+class RconClientTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.connection = FakeRconConnection(lambda cmd: f"response to {cmd}", fragment_size=4)
+        self.client = RconClient(sample_server(), self.connection, IntRequestIdProvider())
+        self.published = []
+        self.read_task = asyncio.create_task(self.client.read(self.published.append))
+
+    async def asyncTearDown(self):
+        self.read_task.cancel()
+
+    async def test_execute(self):
+        """Tests execute returns assembled response of the command."""
+        response = await self.client.execute(RconCommand("user", "list"), timeout=1)
+
+        self.assertEqual("response to list", response.response)
+        self.assertEqual("list", response.command)
+        self.assertEqual("user", response.issuing_user)
+        self.assertEqual([response], self.published)
+
+    async def test_execute_silent(self):
+        """Tests silent execute returns the response only to the caller."""
+        response = await self.client.execute(RconCommand("user", "list"), timeout=1, silent=True)
+
+        self.assertEqual("response to list", response.response)
+        self.assertEqual([], self.published)
+
+    async def test_execute_concurrent(self):
+        """Tests concurrently executed commands get their own responses."""
+        commands = [f"cmd{i}" for i in range(20)]
+
+        responses = await asyncio.gather(*[
+            self.client.execute(RconCommand("user", cmd), timeout=1)
+            for cmd in commands
+        ])
+
+        self.assertEqual(
+            [f"response to {cmd}" for cmd in commands],
+            [r.response for r in responses],
+        )
+        self.assertEqual({}, self.client._requests)
+        self.assertEqual({}, self.client._responses)
+
+    async def test_execute_timeout(self):
+        """Tests timed out command is forgotten and late response is dropped."""
+        self.connection.muted = True
+
+        with self.assertRaises(TimeoutError):
+            await self.client.execute(RconCommand("user", "slow"), timeout=0.01)
+
+        self.assertEqual({}, self.client._requests)
+        self.assertEqual({}, self.client._responses)
+        self.assertEqual({}, self.client._waiters)
+
+    async def test_send_command_forgets_answered(self):
+        """Tests request bookkeeping is removed once the response is processed."""
+        await self.client.send_command(RconCommand("user", "say hi"))
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(1, len(self.published))
+        self.assertEqual({}, self.client._requests)
+        self.assertEqual({}, self.client._responses)
+
+    async def test_send_commands_single_write(self):
+        """Tests batch of commands is written at once and each command gets its response."""
+        await self.client.send_commands([
+            RconCommand("user", "first"),
+            RconCommand("user", "second"),
+        ])
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(1, self.connection.writes)
+        self.assertEqual(
+            ["response to first", "response to second"],
+            [r.response for r in self.published],
+        )
+
+    async def test_execute_batch(self):
+        """Tests batch is pipelined in a single write and results keep order of commands."""
+        commands = [f"cmd{i}" for i in range(50)]
+
+        results = await self.client.execute_batch(
+            [RconCommand("user", cmd) for cmd in commands],
+            timeout=1,
+            silent=True,
+        )
+
+        self.assertEqual(1, self.connection.writes)
+        self.assertEqual(commands, [r.command for r in results])
+        self.assertEqual(
+            [f"response to {cmd}" for cmd in commands],
+            [r.response.response for r in results],
+        )
+        self.assertTrue(all(r.error is None and r.elapsed >= 0 for r in results))
+        self.assertEqual([], self.published)
+        self.assertEqual({}, self.client._waiters)
+
+    async def test_execute_batch_timeout(self):
+        """Tests unanswered commands of a batch are reported as timed out."""
+        self.connection.muted = True
+
+        results = await self.client.execute_batch(
+            [RconCommand("user", "first"), RconCommand("user", "second")],
+            timeout=0.01,
+        )
+
+        self.assertTrue(all(isinstance(r.error, TimeoutError) for r in results))
+        self.assertEqual({}, self.client._requests)
+        self.assertEqual({}, self.client._waiters)
+
+    async def test_execute_batch_timeout_per_response(self):
+        """Tests batch taking longer than the timeout completes while responses keep coming."""
+        self.connection.muted = True
+        batch = asyncio.create_task(self.client.execute_batch(
+            [RconCommand("user", f"cmd{i}") for i in range(3)],
+            timeout=0.1,
+        ))
+        await asyncio.sleep(0)
+
+        for request_id, packet_type, payload in self.connection.sent_packets:
+            if packet_type == 2:
+                await asyncio.sleep(0.06)
+            self.connection._respond(request_id, packet_type, payload)
+        results = await batch
+
+        self.assertEqual(
+            ["response to cmd0", "response to cmd1", "response to cmd2"],
+            [r.response.response for r in results],
+        )
+
+    async def test_execute_connection_closed(self):
+        """Tests pending commands fail when the connection is closed."""
+        self.connection.muted = True
+        execute_task = asyncio.create_task(
+            self.client.execute(RconCommand("user", "list"), timeout=1)
+        )
+        await asyncio.sleep(0)
+
+        self.connection.close()
+
+        with self.assertRaises(ConnectionClosedError):
+            await execute_task
+        with self.assertRaises(asyncio.IncompleteReadError):
+            await self.read_task
+
+    async def test_probe(self):
+        """Tests keepalive probe is answered and its round-trip time recorded."""
+        latency = await self.client.probe(timeout=1)
+
+        self.assertEqual(latency, self.client.latency)
+        self.assertEqual(99, self.connection.sent_packets[-1][1])
+        self.assertEqual({}, self.client._probes)
+        self.assertEqual([], self.published)
+
+    async def test_probe_timeout_closes_connection(self):
+        """Tests unanswered keepalive probe tears the connection down."""
+        self.connection.muted = True
+
+        with self.assertRaises(KeepaliveTimeoutError):
+            await self.client.probe(timeout=0.01)
+        with self.assertRaises(asyncio.IncompleteReadError):
+            await self.read_task
+
+
+class RconClientStreamingTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.connection = FakeRconConnection(lambda cmd: "žluťoučký kůň " * 3, fragment_size=5)
+        self.client = RconClient(sample_server(), self.connection, IntRequestIdProvider())
+        self.published = []
+        self.chunks = []
+        self.read_task = asyncio.create_task(
+            self.client.read(self.published.append, None, self.chunks.append)
+        )
+        await asyncio.sleep(0)
+
+    async def asyncTearDown(self):
+        self.read_task.cancel()
+
+    async def test_streamed_response(self):
+        """Tests response is delivered in chunks without splitting multi-byte characters."""
+        await self.client.send_command(RconCommand("user", "cmd"))
+        await asyncio.sleep(0.01)
+
+        self.assertEqual([], self.published)
+        self.assertEqual("žluťoučký kůň " * 3, "".join(c.chunk for c in self.chunks))
+        self.assertEqual(list(range(len(self.chunks))), [c.index for c in self.chunks])
+        self.assertEqual([False] * (len(self.chunks) - 1) + [True], [c.final for c in self.chunks])
+        self.assertEqual(1, len({c.response_id for c in self.chunks}))
+        self.assertEqual({}, self.client._streams)
+
+    async def test_execute_not_streamed(self):
+        """Tests awaited commands get the whole response."""
+        response = await self.client.execute(RconCommand("user", "cmd"), timeout=1)
+
+        self.assertEqual("žluťoučký kůň " * 3, response.response)
+        self.assertEqual([], self.chunks)
@@ -0,0 +1,129 @@
+"""RCON service tests."""
+# pylint: disable=missing-class-docstring,protected-access
+
+import asyncio
+import time
+import unittest
+
+from configuration import RconConfiguration
+from messages.rcon import RconCommand, rcon_command_topic, rcon_response_topic
+from pubsub.inprocess import InProcessPubSub
+from rcon.rcon_service import RconService
+from services.service import RecoverableError
+from utils.exceptions import leaves
+from utils.fake_rcon_server import FakeRconServer
+
+
+class RconServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.fake = FakeRconServer()
+        await self.fake.start()
+        self.pubsub = InProcessPubSub()
+        self.server = self.fake.model()
+
+    async def asyncTearDown(self):
+        await self.fake.close()
+
+    def _service(self, configuration: RconConfiguration) -> RconService:
+        async def supply():
+            return self.server
+
+        return RconService(self.pubsub, self.server.uid, supply, configuration)
+
+    async def _launch(self, configuration: RconConfiguration) -> asyncio.Task:
+        return asyncio.create_task(self._service(configuration).launch())
+
+    async def _wait_logins(self, logins: int):
+        async with asyncio.timeout(5):
+            while self.fake.logins < logins:
+                await asyncio.sleep(0.01)
+
+    async def test_standby_connections_dropped_with_queued_commands(self):
+        """Tests service ends recoverably when primary and standby connections drop."""
+        task = await self._launch(RconConfiguration(warm_standby=True, keepalive_interval=0))
+        await self._wait_logins(2)
+
+        await self.fake.close()
+        topic = rcon_command_topic(self.server.uid)
+        for i in range(5):
+            self.pubsub.publish(topic, RconCommand("user", f"say {i}"))
+
+        with self.assertRaises(ExceptionGroup) as raised:
+            async with asyncio.timeout(5):
+                await task
+        self.assertTrue(all(isinstance(e, RecoverableError) for e in leaves(raised.exception)))
+
+    async def test_recovery_delay_jittered(self):
+        """Tests services restart after dropped connections at different times."""
+        service = self._service(RconConfiguration())
+
+        delays = {service._recoverable(ConnectionError()).recovery_delay_ms for _ in range(10)}
+
+        self.assertGreater(len(delays), 1)
+        self.assertTrue(all(2500 <= delay <= 7500 for delay in delays))
+
+    async def test_batch_paced(self):
+        """Tests commands of a batch are sent at the rate limit."""
+        service = self._service(RconConfiguration(rate_limit=100, rate_limit_burst=10))
+        task = asyncio.create_task(service.launch())
+        await self._wait_logins(1)
+        msgs = [RconCommand("user", f"say {i}") for i in range(50)]
+
+        start = time.monotonic()
+        responses = await service.execute_batch(msgs)
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.35)
+        self.assertEqual(50, len(responses))
+        self.assertTrue(all(r.error is None for r in responses))
+        task.cancel()
+
+    async def _responses(self, commands: list[RconCommand], count: int) -> list[str]:
+        with self.pubsub.subscribe(rcon_response_topic(self.server.uid)) as sub:
+            for msg in commands:
+                self.pubsub.publish(rcon_command_topic(self.server.uid), msg)
+            responses = []
+            async with asyncio.timeout(5):
+                async for response in sub:
+                    responses.append(f"{response.issuing_user} {response.command}")
+                    if len(responses) == count:
+                        return responses
+
+    async def test_read_only_commands_keep_user_order(self):
+        """Tests shared responses of read-only commands do not overtake commands of the user."""
+        task = await self._launch(RconConfiguration())
+        await self._wait_logins(1)
+        # Cached response is available right away
+        await self._responses([RconCommand("other", "list")], 1)
+
+        responses = await self._responses(
+            [
+                RconCommand("user", "list"),
+                RconCommand("user", "say 1"),
+                RconCommand("user", "say 2"),
+                RconCommand("user", "list"),
+            ],
+            4,
+        )
+
+        self.assertEqual(["user list", "user say 1", "user say 2", "user list"], responses)
+        task.cancel()
+
+    async def test_failed_batch_cancels_reservations(self):
+        """Tests commands of a failed batch not released yet give up their place right away."""
+        service = self._service(RconConfiguration(rate_limit=10, rate_limit_burst=1))
+        task = asyncio.create_task(service.launch())
+        await self._wait_logins(1)
+        reserve = service._limiter.reserve
+        releases = []
+        service._limiter.reserve = lambda msgs: releases.extend(reserve(msgs)) or releases
+
+        async def fail(*_, **__):
+            raise ValueError()
+
+        service._client.execute_batch = fail
+        with self.assertRaises(ValueError):
+            await service.execute_batch([RconCommand("user", f"say {i}") for i in range(5)])
+
+        self.assertTrue(releases[0].done())
+        self.assertTrue(all(release.cancelled() for release in releases[1:]))
+        task.cancel()
@@ -0,0 +1,168 @@
+"""Tests of RCON services called from other processes."""
+# pylint: disable=missing-class-docstring,protected-access,too-many-instance-attributes
+import asyncio
+import os
+import tempfile
+import unittest
+import uuid
+from typing import Optional, override
+
+from configuration import RconConfiguration
+from dependencies import Dependencies
+from messages.codec import message_codec
+from messages.rcon import RconCommand, RconResponse
+from models.server import Server
+from pubsub.broker import BrokerPubSub
+from rcon.rate_limit import UserQueueStats
+from rcon.rcon_client import CommandResult
+from rcon.rcon_client_errors import ConnectionClosedError
+from rcon.rcon_service import RconExecutor, rcon_service_name
+from rcon.remote import RconCallClient, RconCallServer, RconExecutors
+from rcon.stats import WireStats
+from services.service import Service, ServiceLauncher
+
+
+class FakeRconService(Service, RconExecutor):
+    """Answers commands with their text, fails commands named fail."""
+    def __init__(self, uid: uuid.UUID, connected: bool = True):
+        self._uid = uid
+        self.connected = connected
+        self.woken = asyncio.Event()
+
+    @property
+    def name(self) -> str:
+        return rcon_service_name(self._uid)
+
+    async def launch(self):
+        await asyncio.Future()
+
+    async def stop(self):
+        pass
+
+    @override
+    async def execute(self, msg: RconCommand, timeout: Optional[float] = None) -> RconResponse:
+        if not self.connected:
+            raise ConnectionClosedError()
+        if msg.command == "fail":
+            raise ValueError("Failed")
+        return RconResponse(msg.issuing_user, Server.Type.MINECRAFT_SERVER, msg.command, "ok")
+
+    @override
+    async def execute_batch(self, msgs: list[RconCommand]) -> list[CommandResult]:
+        results = []
+        for msg in msgs:
+            try:
+                results.append(CommandResult(msg.command, await self.execute(msg), None, 0.1))
+            except ValueError as e:
+                results.append(CommandResult(msg.command, None, e, 0.1))
+        return results
+
+    @override
+    async def wire_stats(self) -> Optional[WireStats]:
+        return None
+
+    @override
+    async def command_queues(self) -> dict[str, UserQueueStats]:
+        return {"user": UserQueueStats(1, 0.5, 2, 3)}
+
+    @override
+    def wake(self):
+        self.woken.set()
+
+
+class RconCallTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        path = os.path.join(self.dir.name, "pubsub.sock")
+        self.host = BrokerPubSub(path, message_codec(), reconnect_delay=0.01)
+        self.other = BrokerPubSub(path, message_codec(), reconnect_delay=0.01)
+        await self.host.start()
+        await self.other.start()
+
+        self.uid = uuid.uuid4()
+        self.service = FakeRconService(self.uid)
+        self.host_launcher = ServiceLauncher(Dependencies())
+        self.host_launcher.launch(self.service)
+        self.host_launcher.launch(RconCallServer(self.host, self.host_launcher))
+
+        self.other_launcher = ServiceLauncher(Dependencies())
+        client = RconCallClient(self.other)
+        self.other_launcher.launch(client)
+        self.executors = RconExecutors(
+            self.other_launcher,
+            RconConfiguration(command_timeout=0.2),
+            client,
+        )
+        # Both processes are subscribed before calls are made
+        await self._until(lambda: len(self.host._remote_interest) == 1)
+        await self._until(lambda: len(self.other._remote_interest) == 1)
+
+    async def asyncTearDown(self):
+        self.other_launcher.stop()
+        self.host_launcher.stop()
+        await asyncio.sleep(0)
+        self.other.close()
+        self.host.close()
+        await asyncio.sleep(0.01)
+        self.dir.cleanup()
+
+    @staticmethod
+    async def _until(condition):
+        async with asyncio.timeout(1):
+            while not condition():
+                await asyncio.sleep(0.01)
+
+    async def test_calls_executed_by_host(self):
+        """Tests operations called by another process are executed by the host."""
+        executor = self.executors.get(self.uid)
+
+        response = await executor.execute(RconCommand("user", "list"))
+        results = await executor.execute_batch(
+            [RconCommand("user", "list"), RconCommand("user", "fail")]
+        )
+        queues = await executor.command_queues()
+        stats = await executor.wire_stats()
+        executor.wake()
+        await asyncio.wait_for(self.service.woken.wait(), 1)
+
+        self.assertEqual("ok", response.response)
+        self.assertEqual(["list", "fail"], [r.command for r in results])
+        self.assertEqual("ok", results[0].response.response)
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, RuntimeError)
+        self.assertEqual("Failed", str(results[1].error))
+        self.assertEqual({"user": UserQueueStats(1, 0.5, 2, 3)}, queues)
+        self.assertIsNone(stats)
+
+    async def test_errors_raised_to_caller(self):
+        """Tests errors of called operations are raised in the calling process."""
+        executor = self.executors.get(self.uid)
+
+        with (
+            self.assertLogs("rcon.remote", "ERROR"),
+            self.assertRaisesRegex(RuntimeError, "Failed"),
+        ):
+            await executor.execute(RconCommand("user", "fail"))
+        self.service.connected = False
+        with self.assertRaises(ConnectionClosedError):
+            await executor.execute(RconCommand("user", "list"))
+
+    async def test_unknown_server_not_connected(self):
+        """Tests calls of servers without RCON service fail as not connected."""
+        with self.assertRaises(ConnectionClosedError):
+            await self.executors.get(uuid.uuid4()).execute(RconCommand("user", "list"))
+
+    async def test_no_host_not_connected(self):
+        """Tests calls fail as not connected when no process answers them."""
+        self.host_launcher.stop_service("rcon_call_server")
+        await self._until(lambda: not self.other._remote_interest)
+
+        with self.assertRaises(ConnectionClosedError):
+            await self.executors.get(self.uid).wire_stats()
+
+    async def test_local_services(self):
+        """Tests services running in this process are returned without client."""
+        executors = RconExecutors(self.host_launcher, RconConfiguration())
+
+        self.assertIs(self.service, executors.get(self.uid))
+        self.assertIsNone(executors.get(uuid.uuid4()))
@@ -0,0 +1,82 @@
+"""Single-flight executor tests."""
+# pylint: disable=missing-class-docstring
+
+import asyncio
+import unittest
+
+from messages.rcon import RconCommand, RconResponse
+from models.server import Server
+from rcon.single_flight import SingleFlightExecutor
+
+
+class SingleFlightExecutorTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.executed = []
+        self.now = 0.0
+        self.release = asyncio.Event()
+        self.executor = SingleFlightExecutor(
+            self._execute,
+            ["list", "whitelist list"],
+            cache_ttl=1,
+            clock=lambda: self.now,
+        )
+
+    async def test_handles_read_only(self):
+        """Tests only read-only commands are handled."""
+        self.assertTrue(self.executor.handles(RconCommand("user", "list")))
+        self.assertTrue(self.executor.handles(RconCommand("user", " whitelist  list")))
+        self.assertFalse(self.executor.handles(RconCommand("user", "say list")))
+
+    async def test_in_flight_shared(self):
+        """Tests identical commands in flight share one execution."""
+        tasks = [
+            asyncio.create_task(self.executor.execute(RconCommand(user, "list")))
+            for user in ["alice", "bob", "carol"]
+        ]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        responses = await asyncio.gather(*tasks)
+
+        self.assertEqual(["list"], self.executed)
+        self.assertEqual(["alice", "bob", "carol"], [r.issuing_user for r in responses])
+        self.assertEqual({"result of list"}, {r.response for r in responses})
+
+    async def test_cache_expires(self):
+        """Tests responses are served from cache until they expire."""
+        self.release.set()
+
+        await self.executor.execute(RconCommand("alice", "list"))
+        self.now = 0.5
+        cached = await self.executor.execute(RconCommand("bob", "list"))
+        self.now = 1.5
+        await self.executor.execute(RconCommand("carol", "list"))
+
+        self.assertEqual("bob", cached.issuing_user)
+        self.assertEqual(["list", "list"], self.executed)
+
+    async def test_failure_shared(self):
+        """Tests failure of the shared execution is raised to every requester."""
+        self.executor = SingleFlightExecutor(self._fail, ["list"], cache_ttl=1)
+
+        results = await asyncio.gather(
+            self.executor.execute(RconCommand("alice", "list")),
+            self.executor.execute(RconCommand("bob", "list")),
+            return_exceptions=True,
+        )
+
+        self.assertTrue(all(isinstance(r, TimeoutError) for r in results))
+
+    async def _execute(self, msg: RconCommand) -> RconResponse:
+        self.executed.append(msg.command)
+        await self.release.wait()
+        return RconResponse(
+            msg.issuing_user,
+            Server.Type.MINECRAFT_SERVER,
+            msg.command,
+            f"result of {msg.command}",
+        )
+
+    async def _fail(self, _: RconCommand) -> RconResponse:
+        await asyncio.sleep(0)
+        raise TimeoutError()
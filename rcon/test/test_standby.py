@@ -0,0 +1,86 @@
+"""Warm standby RCON client tests."""
+# pylint: disable=missing-class-docstring
+
+import asyncio
+import unittest
+
+from messages.rcon import RconCommand
+from rcon.rcon_client import RconClient
+from rcon.rcon_client_errors import ConnectionClosedError
+from rcon.request_id import IntRequestIdProvider
+from rcon.standby import StandbyRconClient
+from utils.testing import FakeRconConnection, sample_server
+
+
+class StandbyRconClientTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.connections: list[FakeRconConnection] = []
+        self.failovers: list[float] = []
+        self.published = []
+        # Cleared to keep new connections from opening
+        self.reachable = asyncio.Event()
+        self.reachable.set()
+        self.client = StandbyRconClient(
+            await self._connect(),
+            self._connect,
+            self.failovers.append,
+        )
+        self.read_task = asyncio.create_task(self.client.read(self.published.append))
+        await asyncio.sleep(0.01)
+
+    async def asyncTearDown(self):
+        self.read_task.cancel()
+        self.client.close()
+
+    async def test_commands_use_primary(self):
+        """Tests commands go over the primary connection only."""
+        response = await self.client.execute(RconCommand("alice", "list"), timeout=1)
+
+        self.assertEqual("list", response.response)
+        self.assertTrue(self.client.standby_ready)
+        self.assertEqual([], self.connections[1].sent_packets)
+
+    async def test_failover(self):
+        """Tests standby connection takes over when primary fails and is replaced."""
+        self.connections[1].latency = 0.05
+        self.connections[0].close()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual([], self.failovers)
+        self.assertEqual(3, len(self.connections))
+        self.assertTrue(self.client.standby_ready)
+        response = await self.client.execute(RconCommand("alice", "list"), timeout=1)
+        self.assertEqual("list", response.response)
+        self.assertEqual(2, len(self.connections[1].sent_packets))
+        # Failover lasts until the standby connection answers
+        self.assertEqual(1, len(self.failovers))
+        self.assertGreaterEqual(self.failovers[0], 0.05)
+
+    async def test_replaces_failed_standby(self):
+        """Tests failed standby connection is replaced without failing over."""
+        self.connections[1].close()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual([], self.failovers)
+        self.assertEqual(3, len(self.connections))
+        self.assertTrue(self.client.standby_ready)
+
+    async def test_both_connections_fail(self):
+        """Tests reading ends when primary fails with no standby and commands are not sent."""
+        self.reachable.clear()
+        self.connections[1].close()
+        await asyncio.sleep(0.01)
+        self.connections[0].close()
+
+        with self.assertRaises(ConnectionClosedError):
+            async with asyncio.timeout(1):
+                await self.read_task
+        with self.assertRaises(ConnectionClosedError):
+            await self.client.send_commands([RconCommand("alice", "list")])
+        self.assertEqual([], self.failovers)
+
+    async def _connect(self) -> RconClient:
+        await self.reachable.wait()
+        connection = FakeRconConnection()
+        self.connections.append(connection)
+        return RconClient(sample_server(), connection, IntRequestIdProvider())
@@ -0,0 +1,61 @@
+"""RCON wire statistics tests."""
+# pylint: disable=missing-class-docstring
+
+import asyncio
+import unittest
+
+from messages.rcon import RconCommand
+from rcon.rcon_client import RconClient, RconClientManager
+from rcon.request_id import IntRequestIdProvider
+from rcon.stats import Histogram, WireStats
+from utils.fake_rcon_server import FakeRconServer
+from utils.testing import FakeRconConnection, sample_server
+
+
+class HistogramTest(unittest.TestCase):
+    def test_percentile(self):
+        """Tests percentiles are reported as upper bounds of buckets."""
+        histogram = Histogram((1, 2, 4, 8))
+        for value in (0.5, 1.5, 1.5, 3, 100):
+            histogram.record(value)
+
+        self.assertEqual([1, 2, 1, 0, 1], histogram.counts)
+        self.assertEqual(2, histogram.percentile(50))
+        self.assertEqual(100, histogram.percentile(100))
+        self.assertAlmostEqual(21.3, histogram.mean)
+
+
+class WireStatsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_client_traffic(self):
+        """Tests client records its traffic, fragments and round-trip time."""
+        stats = WireStats()
+        connection = FakeRconConnection(lambda cmd: "x" * 10, fragment_size=4)
+        client = RconClient(sample_server(), connection, IntRequestIdProvider(), stats)
+        read_task = asyncio.create_task(client.read(lambda _: None))
+
+        await client.execute(RconCommand("user", "list"), timeout=1)
+        read_task.cancel()
+
+        self.assertEqual({"CommandPacket": 1, "CommandEndPacket": 1}, stats.packets_out)
+        self.assertEqual(14 + 4 + 14, stats.bytes_out)
+        # Three fragments of the response and the empty response to the end packet
+        self.assertEqual({"CommandResponse": 4}, stats.packets_in)
+        self.assertEqual(4 * 14 + 10, stats.bytes_in)
+        self.assertEqual(1, stats.round_trip.count)
+        self.assertEqual(3, stats.fragments.max)
+
+    async def test_connect(self):
+        """Tests manager records login traffic and connect duration."""
+        stats = WireStats()
+        async with FakeRconServer() as fake:
+            server = fake.model()
+
+            async def supply():
+                return server
+
+            async with RconClientManager(IntRequestIdProvider(), supply, stats=stats):
+                pass
+
+        self.assertEqual(1, stats.connect.count)
+        self.assertEqual({"LoginPacket": 1}, stats.packets_out)
+        self.assertEqual({"LoginSuccessResponse": 1}, stats.packets_in)
@@ -0,0 +1,111 @@
+"""RCON worker pool tests."""
+# pylint: disable=missing-class-docstring,protected-access
+
+import asyncio
+import struct
+import unittest
+
+from configuration import RconConfiguration
+from messages.rcon import RconCommand, rcon_command_topic, rcon_response_topic
+from pubsub.inprocess import InProcessPubSub
+from rcon.rcon_client_errors import ConnectionClosedError
+from rcon.workers import RconWorkerPool
+from utils.fake_rcon_server import FakeRconServer
+from utils.testing import sample_server
+
+
+class RconWorkerPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = sample_server()
+        # Nothing listens on the port, the service keeps reconnecting
+        self.server.rcon_port = 1
+        self.pool = RconWorkerPool(InProcessPubSub(), RconConfiguration(), 1)
+        await self.pool.start()
+        self.service = self.pool.service(self.server)
+        self.service_task = asyncio.create_task(self.service.launch())
+
+    async def asyncTearDown(self):
+        self.service_task.cancel()
+        self.pool.close()
+
+    async def test_execute_in_worker(self):
+        """Tests command is executed by the service in the worker process."""
+        with self.assertRaises(ConnectionClosedError):
+            await self.service.execute(RconCommand("user", "list"), timeout=1)
+
+    async def test_worker_restarted(self):
+        """Tests exited worker is started again with its services."""
+        process = self.pool._processes[0]
+        process.kill()
+
+        async with asyncio.timeout(10):
+            while self.pool._processes[0] in (process, None):
+                await asyncio.sleep(0.05)
+
+        self.assertEqual({self.server.uid}, set(self.pool._servers[0]))
+        with self.assertRaises(ConnectionClosedError):
+            await self.service.execute(RconCommand("user", "list"), timeout=1)
+
+
+class RconWorkerPoolRespawnTest(unittest.IsolatedAsyncioTestCase):
+    async def test_respawn_backoff(self):
+        """Tests workers exiting soon after start are started again after growing delays."""
+        pool = RconWorkerPool(InProcessPubSub(), RconConfiguration(), 1, respawn_max_backoff=4)
+        pool._started[0] = asyncio.get_running_loop().time()
+
+        delays = [pool._respawn_delay(0) for _ in range(4)]
+        pool._started[0] -= 4
+
+        self.assertEqual([1, 2, 4, 4], delays)
+        self.assertEqual(1, pool._respawn_delay(0))
+
+    async def test_unreadable_frame(self):
+        """Tests worker sending a frame that cannot be unpickled is started again."""
+        pool = RconWorkerPool(InProcessPubSub(), RconConfiguration(), 1, respawn_backoff=0.01)
+        await pool.start()
+        self.addCleanup(pool.close)
+        process = pool._processes[0]
+        future = asyncio.get_running_loop().create_future()
+        pool._pending[0] = (0, future)
+        reader = asyncio.StreamReader()
+        reader.feed_data(struct.pack("!I", 3) + b"bad")
+
+        pool._readers[0].cancel()
+        pool._readers[0] = asyncio.create_task(pool._read(0, reader))
+
+        async with asyncio.timeout(10):
+            with self.assertRaises(ConnectionClosedError):
+                await future
+            while pool._processes[0] in (process, None):
+                await asyncio.sleep(0.05)
+
+
+class RconWorkerPoolFakeServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.fake = FakeRconServer()
+        await self.fake.start()
+        self.pubsub = InProcessPubSub()
+        self.pool = RconWorkerPool(self.pubsub, RconConfiguration(), 2)
+        await self.pool.start()
+        self.server = self.fake.model()
+        self.service = self.pool.service(self.server)
+        self.service_task = asyncio.create_task(self.service.launch())
+
+    async def asyncTearDown(self):
+        self.service_task.cancel()
+        self.pool.close()
+        await self.fake.close()
+
+    async def test_commands_bridged(self):
+        """Tests commands reach the worker and its responses are published in this process."""
+        with self.pubsub.subscribe(rcon_response_topic(self.server.uid)) as sub:
+            async with asyncio.timeout(10):
+                while not self.fake.logins:
+                    await asyncio.sleep(0.05)
+                self.pubsub.publish(
+                    rcon_command_topic(self.server.uid),
+                    RconCommand("user", "list"),
+                )
+                response = await anext(aiter(sub))
+
+        self.assertEqual("list", response.response)
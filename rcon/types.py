@@ -0,0 +1,10 @@
+"""RCON types shared with the configuration, free of dependencies of the RCON client."""
+from enum import Enum
+
+
+class RconTransport(str, Enum):
+    """Transport used to read packets from the RCON server."""
+    # asyncio streams, packets are read using StreamReader.readexactly
+    STREAM = "STREAM"
+    # asyncio.BufferedProtocol, packets are decoded in place from a receive buffer
+    BUFFERED = "BUFFERED"
@@ -0,0 +1,444 @@
+"""RCON services running in worker processes."""
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import pickle
+import socket
+import struct
+import uuid
+from typing import Any, Optional, override
+
+from configuration import RconConfiguration
+from dependencies import Dependencies
+from messages.rcon import rcon_command_topic, RconCommand, RconResponse
+from models.server import Server
+from pubsub.filter import FieldLength
+from pubsub.inprocess import InProcessPubSub
+from pubsub.pubsub import PubSub
+from pubsub.topic import TopicDescriptor
+from rcon.connect_scheduler import ConnectScheduler
+from rcon.connector import Connector
+from rcon.rate_limit import UserQueueStats
+from rcon.rcon_client import CommandResult
+from rcon.rcon_client_errors import ConnectionClosedError
+from rcon.rcon_service import RconExecutor, RconService, rcon_service_name
+from rcon.stats import WireStats
+from services.service import Service, ServiceLauncher
+
+logger = logging.getLogger(__name__)
+
+# Frames exchanged between the main process and workers, first item is the operation.
+# Main process to worker: start, stop, command, wake, execute, execute_batch, wire_stats,
+# command_queues.
+# Worker to main process: publish, result.
+Frame = tuple[Any, ...]
+
+_FRAME_HEADER = struct.Struct("!I")
+
+# Operations of RconExecutor the main process calls and waits for the result of
+_CALLS = ("execute", "execute_batch", "wire_stats", "command_queues")
+
+
+def _write_frame(writer: asyncio.StreamWriter, frame: Frame):
+    payload = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+    writer.write(_FRAME_HEADER.pack(len(payload)) + payload)
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Frame:
+    header = await reader.readexactly(_FRAME_HEADER.size)
+    (length,) = _FRAME_HEADER.unpack(header)
+    return pickle.loads(await reader.readexactly(length))
+
+
+# pylint: disable-next=too-many-instance-attributes
+class RconWorkerPool:
+    """
+    Pool of worker processes running RCON services, each on its own event loop.
+
+    Servers are assigned to workers by their UUID. Commands of a server are
+    forwarded to its worker, messages the RCON service publishes (responses,
+    status updates and notifications) are published to the PubSub of the main
+    process, so the rest of the app does not know where the services run.
+    A worker that exits is started again with the services it was running, after
+    a delay doubling with each exit of a worker that did not run for long.
+    """
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+            self,
+            pubsub: PubSub,
+            configuration: RconConfiguration,
+            size: int,
+            log_level: str = "INFO",
+            respawn_backoff: float = 1,
+            respawn_max_backoff: float = 60,
+    ):
+        """
+        :param pubsub: PubSub messages published by the workers are published to
+        :param configuration: Configuration of RCON connections
+        :param size: Number of worker processes
+        :param log_level: Log level of the worker processes
+        :param respawn_backoff: Seconds to wait before starting an exited worker again
+        :param respawn_max_backoff: Maximal seconds to wait before starting an exited worker
+            again, workers running longer are started again after respawn_backoff
+        """
+        self._pubsub = pubsub
+        self._configuration = configuration
+        self._size = size
+        self._log_level = log_level
+        self._respawn_backoff = respawn_backoff
+        self._respawn_max_backoff = respawn_max_backoff
+        # Loop time each worker was started at and its exits since it last ran for long
+        self._started: list[float] = [0.0] * size
+        self._exits: list[int] = [0] * size
+        self._processes: list[Optional[multiprocessing.Process]] = [None] * size
+        self._writers: list[Optional[asyncio.StreamWriter]] = [None] * size
+        self._readers: list[Optional[asyncio.Task]] = [None] * size
+        # Servers whose services run in each worker
+        self._servers: list[dict[uuid.UUID, Server]] = [{} for _ in range(size)]
+        self._request_ids = itertools.count()
+        # Futures of execute requests by request id
+        self._pending: dict[int, tuple[int, asyncio.Future]] = {}
+        self._closed = False
+
+    async def start(self):
+        """Starts the worker processes."""
+        for index in range(self._size):
+            await self._spawn(index)
+
+    def close(self):
+        """Stops the worker processes."""
+        self._closed = True
+        for index in range(self._size):
+            self._stop_worker(index)
+
+    def service(self, server: Server) -> "ShardedRconService":
+        """
+        Returns service running RCON service of the server in its worker.
+
+        :param server: Server the RCON service connects to
+        :return: Service to launch in the main process
+        """
+        return ShardedRconService(self._pubsub, self, server)
+
+    def worker_of(self, server_uid: uuid.UUID) -> int:
+        """Returns index of the worker running RCON service of the server."""
+        return server_uid.int % self._size
+
+    def start_server(self, server: Server):
+        """Starts RCON service of the server in its worker."""
+        index = self.worker_of(server.uid)
+        self._servers[index][server.uid] = server
+        self._send(index, ("start", server))
+
+    def stop_server(self, server_uid: uuid.UUID):
+        """Stops RCON service of the server in its worker."""
+        index = self.worker_of(server_uid)
+        if self._servers[index].pop(server_uid, None):
+            self._send(index, ("stop", server_uid))
+
+    async def send_command(self, server_uid: uuid.UUID, msg: RconCommand):
+        """Sends a command to RCON service of the server, waiting while the worker is busy."""
+        index = self.worker_of(server_uid)
+        self._send(index, ("command", server_uid, msg))
+        if self._writers[index]:
+            await self._writers[index].drain()
+
+    def wake(self, server_uid: uuid.UUID):
+        """Wakes RCON service of the server. See RconService.wake."""
+        self._send(self.worker_of(server_uid), ("wake", server_uid))
+
+    async def call(self, server_uid: uuid.UUID, operation: str, *args) -> Any:
+        """
+        Executes operation of RCON service of the server and returns its result.
+
+        :param server_uid: Server whose RCON service executes the operation
+        :param operation: execute, execute_batch, wire_stats or command_queues
+        :param args: Arguments of the operation
+        :raises ConnectionClosedError: Worker exited before the operation completed
+        :return: Result of the operation
+        """
+        index = self.worker_of(server_uid)
+        if self._writers[index] is None:
+            raise ConnectionClosedError()
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = (index, future)
+        try:
+            self._send(index, (operation, request_id, server_uid, *args))
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _send(self, index: int, frame: Frame):
+        # Frames sent while the worker restarts are dropped, services are restarted anyway
+        if self._writers[index]:
+            _write_frame(self._writers[index], frame)
+
+    async def _spawn(self, index: int):
+        parent_sock, child_sock = socket.socketpair()
+        process = multiprocessing.get_context("spawn").Process(
+            target=_worker_main,
+            args=(child_sock, self._configuration, self._size, self._log_level),
+            name=f"rcon_worker_{index}",
+            daemon=True,
+        )
+        process.start()
+        child_sock.close()
+        reader, writer = await asyncio.open_unix_connection(sock=parent_sock)
+        self._processes[index] = process
+        self._started[index] = asyncio.get_running_loop().time()
+        self._writers[index] = writer
+        self._readers[index] = asyncio.create_task(self._read(index, reader))
+        for server in self._servers[index].values():
+            self._send(index, ("start", server))
+        logger.info("Started RCON worker %d (pid %d).", index, process.pid)
+
+    def _stop_worker(self, index: int):
+        if self._readers[index]:
+            self._readers[index].cancel()
+            self._readers[index] = None
+        if self._writers[index]:
+            self._writers[index].close()
+            self._writers[index] = None
+        if self._processes[index]:
+            self._processes[index].terminate()
+            self._processes[index] = None
+
+    async def _read(self, index: int, reader: asyncio.StreamReader):
+        try:
+            while True:
+                frame = await _read_frame(reader)
+                match frame:
+                    case ("publish", topic, msg):
+                        # Status published by a stopped service would be retained for a
+                        # server that might be deleted
+                        server_uid = getattr(msg, "server_uid", None)
+                        if server_uid is None or server_uid in self._servers[index]:
+                            self._pubsub.publish(topic, msg)
+                    case ("result", request_id, result, error):
+                        _, future = self._pending.get(request_id, (None, None))
+                        if future and not future.done():
+                            if error is not None:
+                                future.set_exception(error)
+                            else:
+                                future.set_result(result)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.error("RCON worker %d exited: %s", index, e)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Frame could not be unpickled, the worker is restarted like an exited one
+            logger.exception("Reading from RCON worker %d failed", index)
+
+        for request_id, (worker, future) in list(self._pending.items()):
+            if worker == index and not future.done():
+                future.set_exception(ConnectionClosedError())
+                del self._pending[request_id]
+
+        # Reading task is not cancelled by stopping the worker, it ends itself
+        self._readers[index] = None
+        self._stop_worker(index)
+        if not self._closed:
+            delay = self._respawn_delay(index)
+            logger.info("Starting RCON worker %d again in %.1f s.", index, delay)
+            # Closing the pool cancels the wait
+            self._readers[index] = asyncio.current_task()
+            await asyncio.sleep(delay)
+            await self._spawn(index)
+
+    def _respawn_delay(self, index: int) -> float:
+        """Returns seconds to wait before starting the exited worker again."""
+        if asyncio.get_running_loop().time() - self._started[index] >= self._respawn_max_backoff:
+            self._exits[index] = 0
+        delay = min(self._respawn_backoff * 2 ** self._exits[index], self._respawn_max_backoff)
+        self._exits[index] += 1
+        return delay
+
+
+class ShardedRconService(Service, RconExecutor):
+    """
+    Service running RCON service of a server in a worker process.
+
+    Forwards commands sent to the server to the worker, see RconWorkerPool.
+    """
+    def __init__(self, pubsub: PubSub, pool: RconWorkerPool, server: Server):
+        """
+        :param pubsub: PubSub commands are received from
+        :param pool: Pool of the worker processes
+        :param server: Server the RCON service connects to
+        """
+        self._pubsub = pubsub
+        self._pool = pool
+        self._server = server
+
+    @property
+    def name(self) -> str:
+        return rcon_service_name(self._server.uid)
+
+    async def launch(self):
+        self._pool.start_server(self._server)
+        try:
+            with self._pubsub.subscribe(
+                rcon_command_topic(self._server.uid),
+                FieldLength(lambda msg: msg.command, 1, FieldLength.Mode.MIN)
+            ) as sub:
+                async for cmd in sub:
+                    await self._pool.send_command(self._server.uid, cmd)
+        finally:
+            self._pool.stop_server(self._server.uid)
+
+    async def stop(self):
+        pass
+
+    @override
+    async def execute(self, msg: RconCommand, timeout: Optional[float] = None) -> RconResponse:
+        return await self._pool.call(self._server.uid, "execute", msg, timeout)
+
+    @override
+    async def execute_batch(self, msgs: list[RconCommand]) -> list[CommandResult]:
+        return await self._pool.call(self._server.uid, "execute_batch", msgs)
+
+    @override
+    async def wire_stats(self) -> Optional[WireStats]:
+        return await self._pool.call(self._server.uid, "wire_stats")
+
+    @override
+    async def command_queues(self) -> dict[str, UserQueueStats]:
+        return await self._pool.call(self._server.uid, "command_queues")
+
+    @override
+    def wake(self):
+        self._pool.wake(self._server.uid)
+
+
+class _WorkerPubSub(InProcessPubSub):
+    """PubSub of a worker, published messages are sent to the main process."""
+    def __init__(self, writer: asyncio.StreamWriter):
+        super().__init__()
+        self._writer = writer
+
+    @override
+    def publish[MessageT](
+            self,
+            topic: TopicDescriptor[MessageT],
+            message: MessageT
+    ):
+        # Whole descriptor, its retain key applies in the main process
+        _write_frame(self._writer, ("publish", topic, message))
+
+    def deliver[MessageT](
+            self,
+            topic: TopicDescriptor[MessageT],
+            message: MessageT
+    ):
+        """Delivers a message received from the main process to subscribers of the worker."""
+        super().publish(topic, message)
+
+
+def _worker_main(
+        sock: socket.socket,
+        configuration: RconConfiguration,
+        workers: int,
+        log_level: str,
+):
+    """Entry point of a worker process."""
+    logging.basicConfig(level=log_level)
+    try:
+        asyncio.run(_run_worker(sock, configuration, workers))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _run_worker(sock: socket.socket, configuration: RconConfiguration, workers: int):
+    reader, writer = await asyncio.open_unix_connection(sock=sock)
+    try:
+        await _Worker(writer, configuration, workers).run(reader)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        # Main process exited or closed the pool
+        pass
+
+
+class _Worker:
+    """Runs RCON services of the servers assigned to a worker process."""
+    def __init__(
+            self,
+            writer: asyncio.StreamWriter,
+            configuration: RconConfiguration,
+            workers: int,
+    ):
+        self._writer = writer
+        self._configuration = configuration
+        self._pubsub = _WorkerPubSub(writer)
+        self._launcher = ServiceLauncher(Dependencies())
+        # Concurrent connects and retries are shared among the workers
+        self._connect_scheduler = ConnectScheduler(
+            max(1, configuration.connect_concurrency // workers),
+            configuration.connect_backoff,
+            configuration.connect_max_backoff,
+            configuration.connect_retry_rate / workers,
+            max(1, configuration.connect_retry_burst // workers),
+        )
+        self._connector = Connector(
+            configuration.dns_ttl,
+            configuration.dns_negative_ttl,
+            configuration.happy_eyeballs_delay,
+            log_interval=configuration.connector_log_interval,
+        )
+        self._calls: set[asyncio.Task] = set()
+
+    async def run(self, reader: asyncio.StreamReader):
+        """Processes frames from the main process until it closes the connection."""
+        try:
+            while True:
+                match await _read_frame(reader):
+                    case ("start", server):
+                        self._start(server)
+                    case ("stop", server_uid):
+                        self._stop(server_uid)
+                    case ("command", server_uid, msg):
+                        self._pubsub.deliver(rcon_command_topic(server_uid), msg)
+                    case ("wake", server_uid):
+                        if service := self._service_of(server_uid):
+                            service.wake()
+                    case (op, request_id, server_uid, *args) if op in _CALLS:
+                        task = asyncio.create_task(self._call(request_id, server_uid, op, args))
+                        self._calls.add(task)
+                        task.add_done_callback(self._calls.discard)
+        finally:
+            self._launcher.stop()
+
+    def _start(self, server: Server):
+        async def supply():
+            return server
+
+        self._stop(server.uid)
+        self._launcher.launch(RconService(
+            self._pubsub,
+            server.uid,
+            supply,
+            self._configuration,
+            self._connect_scheduler,
+            self._connector,
+        ))
+
+    def _stop(self, server_uid: uuid.UUID):
+        if self._launcher.is_running(rcon_service_name(server_uid)):
+            self._launcher.stop_service(rcon_service_name(server_uid))
+
+    def _service_of(self, server_uid: uuid.UUID) -> Optional[RconService]:
+        service = self._launcher.get(rcon_service_name(server_uid))
+        return service if isinstance(service, RconService) else None
+
+    async def _call(self, request_id: int, server_uid: uuid.UUID, operation: str, args: list):
+        result, error = None, None
+        try:
+            service = self._service_of(server_uid)
+            if service is None:
+                raise ConnectionClosedError()
+            result = await getattr(service, operation)(*args)
+        except (ConnectionClosedError, TimeoutError) as e:
+            error = e
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Unexpected errors might not be picklable, the caller gets their message
+            logger.exception("RCON %s of %s failed", operation, server_uid)
+            error = RuntimeError(str(e))
+        _write_frame(self._writer, ("result", request_id, result, error))
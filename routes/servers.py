@@ -1,12 +1,15 @@
 """Servers related routes."""
 # pylint: disable=too-many-function-args,too-many-arguments
+import time
 import uuid
 from typing import Annotated, Callable, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, WebSocketException, status, Form
 from fastapi.requests import Request
+from fastapi.responses import StreamingResponse
 from fastapi.websockets import WebSocket
 
+from configuration import Configuration
 from dao.dao import ServerDao, UserDao
 from dependencies import (
     get_current_user,
@@ -15,15 +18,33 @@ from dependencies import (
     status_update_converter_factory, user_with_capabilities
 )
 from htmx import HtmxResponse, htmx_response_factory
-from messages.rcon import RconWSConverter, rcon_command_topic, rcon_response_topic
+from messages.rcon import (
+    RconCommand,
+    RconWSConverter,
+    rcon_command_topic,
+    rcon_response_topic,
+)
+from messages.server_changes import ServerChanged, server_changed_topic
 from messages.server_status import ServerStatusUpdateConverter, server_status_topic
+from models.rcon import (
+    RconBatchRequest,
+    RconBatchResponse,
+    RconBatchCommandResult,
+    RconFanOutRequest,
+    RconFanOutResult,
+)
 from models.server import Server, from_form_data
 from models.user import UserView, UserCapability
-from pubsub.filter import FieldEquals
+from pubsub.filter import AttributeEquals
 from pubsub.pubsub import PubSub
-from rcon.rcon_service import RconService, rcon_service_name
+from rcon.connect_scheduler import ConnectScheduler
+from rcon.fan_out import FanOutExecutor
+from rcon.rate_limit import UserQueueStats
+from rcon.rcon_client_errors import ConnectionClosedError
+from rcon.rcon_service import RconExecutor
+from rcon.remote import RconExecutors
+from rcon.stats import WireStats
 from services.server_status import ServerStatusService
-from services.service import ServiceLauncher
 from websocket_processor import WebsocketProcessor as WsProcessor, WebsocketPubSub
 
 router = APIRouter()
@@ -37,7 +58,8 @@ async def servers_index(
     server_status_service: Annotated[
         ServerStatusService,
         Depends(ioc.supplier(ServerStatusService))
-    ]
+    ],
+    connect_scheduler: Annotated[ConnectScheduler, Depends(ioc.supplier(ConnectScheduler))],
 ):
     """Route for getting all servers list."""
     user_servers = await server_dao.get_user_servers(user.username)
@@ -47,7 +69,8 @@ async def servers_index(
         template="servers/list.html",
         context={
             "servers": user_servers,
-            "statuses": server_statuses
+            "statuses": server_statuses,
+            "connect_states": connect_scheduler.states({s.uid for s in user_servers}),
         },
     ).to_response()
 
@@ -61,7 +84,9 @@ async def server_view(
     server_status_service: Annotated[
         ServerStatusService,
         Depends(ioc.supplier(ServerStatusService))
-    ]
+    ],
+    connect_scheduler: Annotated[ConnectScheduler, Depends(ioc.supplier(ConnectScheduler))],
+    executors: Annotated[RconExecutors, Depends(ioc.supplier(RconExecutors))],
 ):
     """Route for getting a specific server detail by id."""
     try:
@@ -73,13 +98,19 @@ async def server_view(
     if server_from_db is None:
         raise HTTPException(status_code=404)
 
+    # Viewed server is being used, lazily connected RCON connects
+    service = executors.get(uid)
+    if service:
+        service.wake()
+
     server_status = server_status_service.get_state(uid)
 
     return response_factory(
         template="servers/detail.html",
         context={
             "server": server_from_db,
-            "server_status": server_status
+            "server_status": server_status,
+            "connect_state": connect_scheduler.state(uid),
         },
     ).to_response()
 
@@ -138,7 +169,6 @@ async def server_management_upsert(
         server: Annotated[Server, Depends(from_form_data)],
         server_users: Annotated[list[str], Form()],
         server_dao: Annotated[ServerDao, Depends(ioc.supplier(ServerDao))],
-        service_launcher: Annotated[ServiceLauncher, Depends(ioc.supplier(ServiceLauncher))],
         pubsub: Annotated[PubSub, Depends(ioc.supplier(PubSub))],
         response_factory: Annotated[type[HtmxResponse], Depends(htmx_response_factory)],
 ):
@@ -146,22 +176,8 @@ async def server_management_upsert(
     await server_dao.upsert(server, user.username)
     await server_dao.set_assigned_users(server.uid, server_users, user.username)
 
-    name = rcon_service_name(server.uid)
-
-    # (Re)start RCON service for this server
-    if service_launcher.is_running(name):
-        service_launcher.stop_service(name)
-
-    def server_supplier():
-        return server_dao.get_by_uid(server.uid)
-
-    service_launcher.launch(
-        RconService(
-            pubsub,
-            server.uid,
-            server_supplier
-        )
-    )
+    # (Re)start RCON service for this server in the process running RCON services
+    pubsub.publish(server_changed_topic, ServerChanged(server.uid))
 
     return response_factory(
         template="management/management_success.html",
@@ -178,7 +194,7 @@ async def server_management_delete(
             Depends(user_with_capabilities([UserCapability.SERVER_MANAGEMENT]))
         ],
         server_dao: Annotated[ServerDao, Depends(ioc.supplier(ServerDao))],
-        service_launcher: Annotated[ServiceLauncher, Depends(ioc.supplier(ServiceLauncher))],
+        pubsub: Annotated[PubSub, Depends(ioc.supplier(PubSub))],
         response_factory: Annotated[type[HtmxResponse], Depends(htmx_response_factory)],
 ):
     """Route for deleting a server"""
@@ -190,12 +206,11 @@ async def server_management_delete(
     if prompted_name != server.name:
         raise HTTPException(status_code=400)
 
-    service_name = rcon_service_name(server_uid)
-
-    service_launcher.stop_service(service_name)
-
     await server_dao.delete(server_uid, user.username)
 
+    # Stop RCON service of the server in the process running RCON services
+    pubsub.publish(server_changed_topic, ServerChanged(server_uid))
+
     return response_factory(
         template="management/management_success.html",
         context={"route": "/server-mgmt/"},
@@ -254,7 +269,7 @@ async def detail_updates(
             pubsub,
             None,
             server_status_topic,
-            FieldEquals(lambda msg: msg.server_uid, uid),
+            AttributeEquals("server_uid", uid),
         ),
     ).process()
 
@@ -285,3 +300,129 @@ async def command(
             rcon_response_topic(server_uid),
         ),
     ).process()
+
+
+async def _user_rcon_service(
+    server_id: str,
+    user: Annotated[Optional[UserView], Depends(user_with_capabilities([]))],
+    server_dao: Annotated[ServerDao, Depends(ioc.supplier(ServerDao))],
+    executors: Annotated[RconExecutors, Depends(ioc.supplier(RconExecutors))],
+) -> Optional[RconExecutor]:
+    """
+    Dependency returning RCON service of a server of the user.
+
+    :return: RCON service of the server, None when it is not running
+    """
+    try:
+        uid = uuid.UUID(server_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=404) from exc
+
+    user_servers = await server_dao.get_user_servers(user.username)
+    if uid not in {server.uid for server in user_servers}:
+        raise HTTPException(status_code=404)
+    return executors.get(uid)
+
+
+@router.get("/rcon/{server_id}/stats", tags=["rcon"])
+async def rcon_stats(
+    service: Annotated[Optional[RconExecutor], Depends(_user_rcon_service)],
+) -> WireStats:
+    """Route returning wire-level statistics of RCON connections to the server."""
+    try:
+        stats = await service.wire_stats() if service else None
+    except ConnectionClosedError as exc:
+        raise HTTPException(status_code=503) from exc
+    if stats is None:
+        # Statistics are not kept
+        raise HTTPException(status_code=404)
+    return stats
+
+
+@router.get("/rcon/{server_id}/queues", tags=["rcon"])
+async def rcon_queues(
+    service: Annotated[Optional[RconExecutor], Depends(_user_rcon_service)],
+) -> dict[str, UserQueueStats]:
+    """Route returning depth and wait times of command queues of each user of the server."""
+    if service is None:
+        raise HTTPException(status_code=503)
+    try:
+        return await service.command_queues()
+    except ConnectionClosedError as exc:
+        raise HTTPException(status_code=503) from exc
+
+
+@router.post("/rcon/{server_id}/batch", tags=["rcon"])
+async def command_batch(
+    batch: RconBatchRequest,
+    user: Annotated[Optional[UserView], Depends(user_with_capabilities([]))],
+    service: Annotated[Optional[RconExecutor], Depends(_user_rcon_service)],
+) -> RconBatchResponse:
+    """
+    Route executing an ordered list of RCON commands.
+
+    Commands are pipelined over the RCON connection of the server. Results are
+    returned in order of the commands, each with its own error and timing.
+    """
+    if service is None:
+        raise HTTPException(status_code=503)
+
+    started = time.perf_counter()
+    try:
+        results = await service.execute_batch(
+            [RconCommand(user.username, cmd) for cmd in batch.commands]
+        )
+    except ConnectionClosedError as exc:
+        raise HTTPException(status_code=503) from exc
+
+    return RconBatchResponse(
+        results=[
+            RconBatchCommandResult(
+                command=result.command,
+                response=result.response.response if result.response else None,
+                error=(str(result.error) or type(result.error).__name__) if result.error else None,
+                elapsed_ms=result.elapsed * 1000,
+            )
+            for result in results
+        ],
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+@router.post("/rcon/fan-out", tags=["rcon"])
+async def command_fan_out(
+    fan_out: RconFanOutRequest,
+    user: Annotated[Optional[UserView], Depends(user_with_capabilities([]))],
+    server_dao: Annotated[ServerDao, Depends(ioc.supplier(ServerDao))],
+    executors: Annotated[RconExecutors, Depends(ioc.supplier(RconExecutors))],
+    configuration: Annotated[Configuration, Depends(ioc.supplier(Configuration))],
+):
+    """
+    Route executing a command on many servers.
+
+    The command is executed on the requested servers the user can access, or on all
+    of them when no servers are requested. Results are streamed as newline
+    delimited JSON in order the servers answer.
+    """
+    servers = await server_dao.get_user_servers(user.username)
+    if fan_out.servers is not None:
+        requested = set(fan_out.servers)
+        servers = [server for server in servers if server.uid in requested]
+
+    executor = FanOutExecutor(
+        executors.get,
+        configuration.rcon_configuration.fan_out_concurrency,
+        configuration.rcon_configuration.fan_out_timeout,
+    )
+
+    async def results():
+        async for result in executor.execute(RconCommand(user.username, fan_out.command), servers):
+            yield RconFanOutResult(
+                server_uid=result.server_uid,
+                server_name=result.server_name,
+                response=result.response,
+                error=result.error,
+                elapsed_ms=result.elapsed * 1000,
+            ).model_dump_json() + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
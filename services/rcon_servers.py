@@ -0,0 +1,70 @@
+"""Service that keeps RCON services in line with configured servers."""
+import asyncio
+import logging
+import uuid
+
+from dao.dao import ServerDao
+from messages.server_changes import server_changed_topic
+from messages.server_status import server_status_topic
+from pubsub.pubsub import PubSub
+from rcon.rcon_service import rcon_service_name
+from rcon.service_factory import RconServiceFactory
+from services.service import Service, ServiceLauncher
+
+logger = logging.getLogger(__name__)
+
+
+class RconServersService(Service):
+    """
+    Restarts RCON service of a changed server, stops it when the server is deleted.
+    Retained status of a deleted server is cleared once its RCON service stopped.
+    A change failing to apply is logged, later changes are still applied.
+
+    Runs in the process running RCON services, servers are changed by any process.
+    """
+    def __init__(
+            self,
+            pubsub: PubSub,
+            server_dao: ServerDao,
+            service_launcher: ServiceLauncher,
+            rcon_service_factory: RconServiceFactory,
+    ):
+        """
+        :param pubsub: PubSub server changes are received from
+        :param server_dao: Supplies changed servers
+        :param service_launcher: Launches RCON services
+        :param rcon_service_factory: Creates RCON services
+        """
+        self._pubsub = pubsub
+        self._server_dao = server_dao
+        self._service_launcher = service_launcher
+        self._rcon_service_factory = rcon_service_factory
+
+    @property
+    def name(self) -> str:
+        return "rcon_servers_service"
+
+    async def launch(self):
+        with self._pubsub.subscribe(server_changed_topic) as sub:
+            async for msg in sub:
+                try:
+                    await self._apply(msg.server_uid)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("Applying change of server %s failed", msg.server_uid)
+
+    async def _apply(self, server_uid: uuid.UUID):
+        name = rcon_service_name(server_uid)
+        stopped = None
+        if self._service_launcher.is_running(name):
+            stopped = self._service_launcher.stop_service(name)
+        server = await self._server_dao.get_by_uid(server_uid)
+        if server is not None:
+            self._service_launcher.launch(self._rcon_service_factory.create(server))
+        else:
+            if stopped:
+                # Service publishes its disconnect while stopping
+                await asyncio.wait([stopped])
+            self._pubsub.clear_retained(server_status_topic, server_uid=server_uid)
+
+    async def stop(self):
+        pass
@@ -0,0 +1,72 @@
+"""Service that polls game ports of servers for their status."""
+import asyncio
+import logging
+import uuid
+from typing import Optional
+
+from dao.dao import ServerDao
+from messages.server_status import server_status_topic, ServerQueried, ServerQueryFailed
+from models.server import Server
+from pubsub.pubsub import PubSub
+from query.client import QueryClient
+from query.info import ServerInfo, InvalidQueryResponseError
+from services.service import Service
+
+logger = logging.getLogger(__name__)
+
+
+class ServerQueryService(Service):
+    """
+    Periodically queries game ports of all servers.
+
+    Information reported by the servers is published to the server status topic
+    whenever it changes. Queries go over UDP and do not use the RCON connection.
+    """
+    def __init__(
+            self,
+            pubsub: PubSub,
+            server_dao: ServerDao,
+            interval: float,
+            client: QueryClient,
+    ):
+        """
+        :param pubsub: PubSub to publish results to
+        :param server_dao: Provides servers to query
+        :param interval: Seconds between queries of each server
+        :param client: Client used to query the servers
+        """
+        self._pubsub = pubsub
+        self._server_dao = server_dao
+        self._interval = interval
+        self._client = client
+        # Latest published result of each server, None for failed query
+        self._results: dict[uuid.UUID, Optional[ServerInfo]] = {}
+
+    @property
+    def name(self) -> str:
+        return "server_query_service"
+
+    async def launch(self):
+        while True:
+            servers = await self._server_dao.get_all()
+            await asyncio.gather(*(self._query(server) for server in servers))
+            await asyncio.sleep(self._interval)
+
+    async def stop(self):
+        self._client.close()
+
+    async def _query(self, server: Server):
+        try:
+            info = await self._client.query(server)
+        except (TimeoutError, OSError, InvalidQueryResponseError) as e:
+            logger.debug("Query of server %s failed: %s", server.name, e)
+            info = None
+
+        if server.uid in self._results and self._results[server.uid] == info:
+            return
+        self._results[server.uid] = info
+
+        if info is None:
+            self._pubsub.publish(server_status_topic, ServerQueryFailed(server.uid))
+        else:
+            self._pubsub.publish(server_status_topic, ServerQueried(server.uid, info))
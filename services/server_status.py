@@ -2,14 +2,20 @@
 import uuid
 from collections import defaultdict
 from dataclasses import dataclass
+from typing import Optional
 
 from messages.server_status import (
     server_status_topic,
     ServerStatusMessage,
     RconConnected,
-    RconDisconnected
+    RconDisconnected,
+    RconFailover,
+    RconIdle,
+    ServerQueried,
+    ServerQueryFailed,
 )
 from pubsub.pubsub import PubSub
+from query.info import ServerInfo
 from services.service import Service
 
 
@@ -17,13 +23,22 @@ from services.service import Service
 class ServerStatus:
     """Status of the server."""
     rcon_connected: bool
+    # RCON is not connected because the server is not being used, see lazy_connect
+    rcon_idle: bool = False
+    # Latest information reported on the game port, None when the server did not respond
+    info: Optional[ServerInfo] = None
+    # Number of times RCON connection failed over to the standby connection
+    failovers: int = 0
+    # Seconds the last failover took
+    last_failover_latency: Optional[float] = None
 
 
 class ServerStatusService(Service):
     """
     This service keeps track of server statuses.
 
-    Contains latest information of the RCON connection to each server.
+    Contains latest information of the RCON connection to each server and
+    the latest information each server reported on its game port.
     """
     def __init__(self, pubsub: PubSub):
         self._pubsub = pubsub
@@ -38,8 +53,10 @@ class ServerStatusService(Service):
         return "server_state_service"
 
     async def launch(self):
+        # State of servers is kept from all status changes, none can be dropped
         with self._pubsub.subscribe(
-            server_status_topic
+            server_status_topic,
+            capacity=0,
         ) as sub:
             async for msg in sub:
                 self._process_msg(msg)
@@ -69,5 +86,17 @@ class ServerStatusService(Service):
         match msg:
             case RconConnected(uid):
                 self._server_states[uid].rcon_connected = True
+                self._server_states[uid].rcon_idle = False
             case RconDisconnected(uid):
                 self._server_states[uid].rcon_connected = False
+                self._server_states[uid].rcon_idle = False
+            case RconIdle(uid):
+                self._server_states[uid].rcon_connected = False
+                self._server_states[uid].rcon_idle = True
+            case RconFailover(uid, latency):
+                self._server_states[uid].failovers += 1
+                self._server_states[uid].last_failover_latency = latency
+            case ServerQueried(uid, info):
+                self._server_states[uid].info = info
+            case ServerQueryFailed(uid):
+                self._server_states[uid].info = None
@@ -36,6 +36,7 @@ class ServiceLauncher:
     def __init__(self, ioc: Dependencies):
         self._ioc = ioc
         self._services: dict[str, Task] = {}
+        self._instances: dict[str, Service] = {}
 
     def launch(
             self,
@@ -71,12 +72,14 @@ class ServiceLauncher:
             finally:
                 await service.stop()
                 referenced = self._services.get(service.name, None)
-                if referenced == service:
+                if referenced == task:
                     self._services.pop(service.name)
+                    self._instances.pop(service.name)
                 logger.info("Service %s stopped.", service.name)
 
         task = asyncio.create_task(handled())
         self._services[service.name] = task
+        self._instances[service.name] = service
 
         if register_as:
             self._ioc.register(service, register_as)
@@ -94,13 +97,24 @@ class ServiceLauncher:
         """
         return name in self._services
 
-    def stop_service(self, name: str):
+    def get(self, name: str) -> Optional[Service]:
+        """
+        Returns a running service.
+        :param name: Name of the service.
+        :return: The service, None if no service with given name is running.
+        """
+        return self._instances.get(name)
+
+    def stop_service(self, name: str) -> asyncio.Task:
         """
         Stops a service.
         :param name: Name of the service.
+        :return: Cancelled task of the service, done once the service stopped.
         """
         task = self._services.pop(name)
+        self._instances.pop(name, None)
         task.cancel()
+        return task
 
 
 class RecoverableError(Exception):
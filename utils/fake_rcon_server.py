@@ -0,0 +1,251 @@
+"""
+Fake RCON server for tests, load testing and chaos testing.
+
+Speaks the Minecraft and Source dialects of RCON. Responses can be made large,
+are split into packets like real servers do, and commands can be delayed,
+connections dropped and requests read slowly.
+
+Usage: python -m utils.fake_rcon_server [--servers N] [--port P] [--type minecraft|source] ...
+"""
+import argparse
+import asyncio
+import logging
+import random
+import struct
+from typing import Callable, Optional
+
+from models.server import Server
+from rcon.packets import encoding
+from utils.testing import response_packet
+
+logger = logging.getLogger(__name__)
+
+# Packet types of the RCON protocol
+_RESPONSE_VALUE = 0
+_AUTH_RESPONSE = 2
+_EXEC_COMMAND = 2
+_AUTH = 3
+
+
+# pylint: disable-next=too-many-instance-attributes
+class FakeRconServer:
+    """
+    RCON server listening on a local TCP port.
+
+    Each command is answered by responder (echo by default) or by a response of
+    response_size bytes, split into packets of fragment_size bytes.
+    Requests of a connection are processed in order, like real servers do.
+    """
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+            self,
+            server_type: Server.Type = Server.Type.MINECRAFT_SERVER,
+            password: str = "test",
+            responder: Callable[[str], str] = lambda command: command,
+            response_size: int = 0,
+            fragment_size: int = 4096,
+            latency: float = 0,
+            disconnect_rate: float = 0,
+            read_delay: float = 0,
+            seed: Optional[int] = None,
+    ):
+        """
+        :param server_type: Dialect of the server
+        :param password: Password clients log in with
+        :param responder: Returns response to a command
+        :param response_size: When set, each command is answered by this many bytes instead
+        :param fragment_size: Maximal payload size of a response packet
+        :param latency: Seconds each command takes to execute
+        :param disconnect_rate: Probability of a command dropping its connection
+        :param read_delay: Seconds to wait before reading each request packet
+        :param seed: Seed of the random disconnects
+        """
+        self._server_type = server_type
+        self._encoding = encoding(server_type)
+        self._password = password
+        self._responder = responder
+        self._response_size = response_size
+        self._fragment_size = fragment_size
+        self._latency = latency
+        self._disconnect_rate = disconnect_rate
+        self._read_delay = read_delay
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.Server] = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        self.port: Optional[int] = None
+        # Number of successful logins, executed commands and dropped connections
+        self.logins = 0
+        self.commands = 0
+        self.disconnects = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """
+        Starts listening.
+
+        :param host: Address to listen on
+        :param port: Port to listen on, any free port when 0
+        :return: Port the server listens on
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self):
+        """Stops listening and closes all connections."""
+        if self._server:
+            self._server.close()
+        self.drop_connections()
+        if self._server:
+            await self._server.wait_closed()
+            self._server = None
+
+    def drop_connections(self):
+        """Aborts all open connections."""
+        for writer in list(self._writers):
+            writer.transport.abort()
+
+    @property
+    def connections(self) -> int:
+        """Number of open connections."""
+        return len(self._writers)
+
+    def model(self, host: str = "127.0.0.1") -> Server:
+        """Returns model of a server connecting to this fake server."""
+        return Server(
+            type=self._server_type,
+            name=f"fake-{self.port}",
+            host=host,
+            port=self.port,
+            rcon_port=self.port,
+            rcon_password=self._password,
+        )
+
+    async def __aenter__(self) -> "FakeRconServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._writers.add(writer)
+        try:
+            while True:
+                if self._read_delay:
+                    await asyncio.sleep(self._read_delay)
+                (length,) = struct.unpack("<i", await reader.readexactly(4))
+                body = await reader.readexactly(length)
+                request_id, packet_type = struct.unpack_from("<ii", body)
+                payload = body[8:-2].decode(self._encoding, errors="replace")
+
+                if packet_type == _AUTH:
+                    self._login(writer, request_id, payload)
+                elif packet_type == _EXEC_COMMAND:
+                    if not await self._execute(writer, request_id, payload):
+                        return
+                else:
+                    self._unknown(writer, request_id, packet_type)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _login(self, writer: asyncio.StreamWriter, request_id: int, password: str):
+        if self._server_type == Server.Type.SOURCE_SERVER:
+            # Source servers send empty response value before the auth response
+            writer.write(response_packet(request_id, _RESPONSE_VALUE, b""))
+        if password != self._password:
+            writer.write(response_packet(-1, _AUTH_RESPONSE, b""))
+            return
+        self.logins += 1
+        writer.write(response_packet(request_id, _AUTH_RESPONSE, b""))
+
+    async def _execute(self, writer: asyncio.StreamWriter, request_id: int, command: str) -> bool:
+        """Answers a command, returns False when the connection was dropped instead."""
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        if self._disconnect_rate and self._random.random() < self._disconnect_rate:
+            self.disconnects += 1
+            writer.transport.abort()
+            return False
+
+        self.commands += 1
+        if self._response_size:
+            response = b"x" * self._response_size
+        else:
+            response = self._responder(command).encode(self._encoding)
+        for i in range(0, max(len(response), 1), self._fragment_size):
+            fragment = response[i:i + self._fragment_size]
+            writer.write(response_packet(request_id, _RESPONSE_VALUE, fragment))
+        return True
+
+    def _unknown(self, writer: asyncio.StreamWriter, request_id: int, packet_type: int):
+        if self._server_type == Server.Type.MINECRAFT_SERVER:
+            payload = f"Unknown request {packet_type:x}".encode(self._encoding)
+        else:
+            payload = b""
+        writer.write(response_packet(request_id, _RESPONSE_VALUE, payload))
+
+
+async def start_fake_servers(count: int, port: int = 0, **kwargs) -> list[FakeRconServer]:
+    """
+    Starts fake RCON servers on consecutive ports.
+
+    :param count: Number of servers
+    :param port: Port of the first server, any free ports when 0
+    :param kwargs: Arguments of each FakeRconServer
+    :return: Started servers
+    """
+    servers = [FakeRconServer(**kwargs) for _ in range(count)]
+    for i, server in enumerate(servers):
+        await server.start(port=port + i if port else 0)
+    return servers
+
+
+async def _serve(args: argparse.Namespace):
+    servers = await start_fake_servers(
+        args.servers,
+        args.port,
+        server_type=Server.Type[f"{args.type.upper()}_SERVER"],
+        password=args.password,
+        response_size=args.response_size,
+        latency=args.latency,
+        disconnect_rate=args.disconnect_rate,
+        read_delay=args.read_delay,
+    )
+    logger.info(
+        "Serving %d fake RCON servers on ports %d-%d",
+        len(servers),
+        servers[0].port,
+        servers[-1].port,
+    )
+    try:
+        await asyncio.Future()
+    finally:
+        for server in servers:
+            await server.close()
+
+
+def main():
+    """Fake RCON server entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--servers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=25575)
+    parser.add_argument("--type", choices=["minecraft", "source"], default="minecraft")
+    parser.add_argument("--password", default="test")
+    parser.add_argument("--response-size", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--disconnect-rate", type=float, default=0)
+    parser.add_argument("--read-delay", type=float, default=0)
+    args = parser.parse_args()
+    logging.basicConfig(level="INFO")
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
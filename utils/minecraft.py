@@ -43,50 +43,68 @@ def minecraft_colored_str_to_html(text: str):
     :param text: String with bukkit color codes
     :return: HTML string with colored text
     """
-    color = _colormap["f"]
-    fmts = []
-    partial = ""
-    result = ""
-    nfmt = False  # Next char is format
-
-    for char in text:
-        if char == "§":
-            nfmt = True
-            continue
-
-        # Format reset
-        if nfmt and char == "r":
-            nfmt = False
-            result += _apply_fmt(partial, fmts, color)
-            color = _colormap["f"]
-            fmts.clear()
-            partial = ""
-            continue
-
-        # Colored text
-        if nfmt and char in _colormap:
-            nfmt = False
-            result += _apply_fmt(partial, fmts, color)
-            # Color change resets formatting
-            # https://minecraft.fandom.com/wiki/Formatting_codes#Usage
-            fmts.clear()
-            color = _colormap[char]
-            partial = ""
-            continue
-
-        # Formatted text
-        if nfmt and char in _formatmap:
-            nfmt = False
-            result += _apply_fmt(partial, fmts, color)
-            fmts.append(_formatmap[char])
-            partial = ""
-            continue
-
-        # Unknown code - keep
-        if nfmt:
-            nfmt = False
-            partial += f"§{char}"
-            continue
-
-        partial += char
-    return result + _apply_fmt(partial, fmts, color)
+    return MinecraftHtmlFormatter().feed(text)
+
+
+class MinecraftHtmlFormatter:
+    """
+    Creates HTML with colored text from bukkit color codes of text received in parts.
+
+    Color, formatting and a color code split between parts carry over to the next part.
+    """
+    def __init__(self):
+        self._color = _colormap["f"]
+        self._fmts = []
+        self._nfmt = False  # Next char is format
+
+    def feed(self, text: str) -> str:
+        """
+        Formats next part of the text.
+
+        :param text: Part of the text with bukkit color codes
+        :return: HTML string with colored text of this part
+        """
+        partial = ""
+        result = ""
+
+        for char in text:
+            if char == "§":
+                self._nfmt = True
+                continue
+
+            # Format reset
+            if self._nfmt and char == "r":
+                self._nfmt = False
+                result += _apply_fmt(partial, self._fmts, self._color)
+                self._color = _colormap["f"]
+                self._fmts.clear()
+                partial = ""
+                continue
+
+            # Colored text
+            if self._nfmt and char in _colormap:
+                self._nfmt = False
+                result += _apply_fmt(partial, self._fmts, self._color)
+                # Color change resets formatting
+                # https://minecraft.fandom.com/wiki/Formatting_codes#Usage
+                self._fmts.clear()
+                self._color = _colormap[char]
+                partial = ""
+                continue
+
+            # Formatted text
+            if self._nfmt and char in _formatmap:
+                self._nfmt = False
+                result += _apply_fmt(partial, self._fmts, self._color)
+                self._fmts.append(_formatmap[char])
+                partial = ""
+                continue
+
+            # Unknown code - keep
+            if self._nfmt:
+                self._nfmt = False
+                partial += f"§{char}"
+                continue
+
+            partial += char
+        return result + _apply_fmt(partial, self._fmts, self._color)
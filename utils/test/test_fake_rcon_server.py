@@ -0,0 +1,75 @@
+"""Fake RCON server tests."""
+# pylint: disable=missing-class-docstring
+
+import asyncio
+import unittest
+
+from messages.rcon import RconCommand
+from models.server import Server
+from rcon.rcon_client import RconClientManager, RconClient
+from rcon.rcon_client_errors import ConnectionClosedError, InvalidPasswordError
+from rcon.request_id import IntRequestIdProvider
+from utils.fake_rcon_server import FakeRconServer
+
+
+class FakeRconServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.servers: list[FakeRconServer] = []
+        self.read_tasks: list[asyncio.Task] = []
+
+    async def asyncTearDown(self):
+        for task in self.read_tasks:
+            task.cancel()
+        for server in self.servers:
+            await server.close()
+
+    async def _connect(self, password: str = "test", **kwargs) -> tuple[FakeRconServer, RconClient]:
+        fake = FakeRconServer(**kwargs)
+        self.servers.append(fake)
+        await fake.start()
+        model = fake.model()
+        model.rcon_password = password
+
+        async def supply():
+            return model
+
+        async def connect_once(coro, _):
+            return await coro()
+
+        client = await RconClientManager(
+            IntRequestIdProvider(),
+            supply,
+            retry_connect=connect_once,
+        ).connect()
+        self.read_tasks.append(asyncio.create_task(client.read(lambda _: None)))
+        return fake, client
+
+    async def test_minecraft_fragmented_response(self):
+        """Tests long response is split into packets and assembled by the client."""
+        fake, client = await self._connect(response_size=10000)
+
+        response = await client.execute(RconCommand("user", "list"), timeout=1)
+
+        self.assertEqual("x" * 10000, response.response)
+        self.assertEqual((1, 1), (fake.logins, fake.commands))
+
+    async def test_source_dialect(self):
+        """Tests client logs in to the Source dialect and gets responses."""
+        _, client = await self._connect(server_type=Server.Type.SOURCE_SERVER)
+
+        response = await client.execute(RconCommand("user", "status"), timeout=1)
+
+        self.assertEqual("status", response.response)
+
+    async def test_invalid_password(self):
+        """Tests login with a wrong password is refused."""
+        with self.assertRaises(InvalidPasswordError):
+            await self._connect(password="wrong")
+
+    async def test_random_disconnect(self):
+        """Tests command can drop the connection."""
+        fake, client = await self._connect(disconnect_rate=1)
+
+        with self.assertRaises(ConnectionClosedError):
+            await client.execute(RconCommand("user", "list"), timeout=1)
+        self.assertEqual(1, fake.disconnects)
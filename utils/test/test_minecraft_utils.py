@@ -2,7 +2,7 @@
 # pylint: disable=missing-class-docstring
 import unittest
 
-from utils.minecraft import minecraft_colored_str_to_html
+from utils.minecraft import minecraft_colored_str_to_html, MinecraftHtmlFormatter
 
 
 class MinecraftUtilsTest(unittest.TestCase):
@@ -39,3 +39,16 @@ class MinecraftUtilsTest(unittest.TestCase):
             result,
             """<span class="red underline">X</span><span class="white">Y</span>"""
         )
+
+    def test_formatting_in_parts(self):
+        """Tests formatting carries over between parts of the text."""
+        formatter = MinecraftHtmlFormatter()
+
+        result = [formatter.feed(part) for part in ["§cX§", "nY", "Z"]]
+
+        self.assertEqual(
+            result,
+            ['<span class="red">X</span>',
+             '<span class="red underline">Y</span>',
+             '<span class="red underline">Z</span>']
+        )
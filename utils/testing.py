@@ -1,6 +1,14 @@
 """General utility functions and classes for tests."""
 import asyncio
+import struct
 from datetime import datetime, tzinfo, timedelta
+from typing import Callable, Optional
+
+from models.server import Server
+from query.info import ServerInfo
+from rcon.packets import CommandResponse, RconResponsePacket
+from rcon.rcon_client import RconConnection
+from rcon.rcon_client_errors import ConnectionClosedError
 
 
 class TestTimeProvider:
@@ -34,3 +42,182 @@ class PacketProvider:
         res = self._packets[:n]
         self._packets = self._packets[n:]
         return res
+
+
+def sample_server(server_type: Server.Type = Server.Type.MINECRAFT_SERVER) -> Server:
+    """Returns a server model to be used in tests."""
+    return Server(
+        type=server_type,
+        name="test",
+        host="localhost",
+        port=25565,
+        rcon_port=25575,
+        rcon_password="test",
+    )
+
+
+def response_packet(request_id: int, packet_type: int, payload: bytes) -> bytes:
+    """Encodes a packet the way RCON server sends it."""
+    body = struct.pack("<ii", request_id, packet_type) + payload + b"\x00\x00"
+    return struct.pack("<i", len(body)) + body
+
+
+def feed_protocol(protocol: asyncio.BufferedProtocol, data: bytes, chunk_size: int):
+    """Feeds data to a buffered protocol the way event loop does, in chunks of given size."""
+    offset = 0
+    while offset < len(data):
+        buffer = protocol.get_buffer(chunk_size)
+        n = min(chunk_size, len(buffer), len(data) - offset)
+        buffer[:n] = data[offset:offset + n]
+        buffer.release()
+        protocol.buffer_updated(n)
+        offset += n
+
+
+# pylint: disable-next=too-many-instance-attributes
+class FakeRconConnection(RconConnection):
+    """
+    In-memory RCON connection answering commands like a RCON server.
+
+    Each command is answered by responder, the response is split into packets of
+    fragment_size bytes. Command end packets are answered with empty response.
+    """
+    def __init__(
+            self,
+            responder: Callable[[str], str] = lambda command: command,
+            fragment_size: int = 4096,
+            payload_encoding: str = "utf-8",
+    ):
+        super().__init__(payload_encoding)
+        self._responder = responder
+        self._fragment_size = fragment_size
+        self._packets: asyncio.Queue[Optional[RconResponsePacket]] = asyncio.Queue()
+        self.sent_packets: list[tuple[int, int, str]] = []
+        self.writes = 0
+        self.muted = False
+        self.closed = False
+        # Seconds each command takes to be answered
+        self.latency = 0.0
+
+    async def read(self) -> RconResponsePacket:
+        packet = await self._packets.get()
+        if packet is None:
+            raise asyncio.IncompleteReadError(b"", 4)
+        return packet
+
+    def close(self):
+        self.closed = True
+        self._packets.put_nowait(None)
+
+    def _write(self, data: list[bytes]):
+        if self.closed:
+            raise ConnectionClosedError()
+        self.writes += 1
+        self._receive(b"".join(data))
+
+    async def _drain(self):
+        pass
+
+    def _receive(self, data: bytes):
+        offset = 0
+        while offset < len(data):
+            (length,) = struct.unpack_from("<i", data, offset)
+            request_id, packet_type = struct.unpack_from("<ii", data, offset + 4)
+            payload = data[offset + 12:offset + 2 + length].decode(self._payload_encoding)
+            self.sent_packets.append((request_id, packet_type, payload))
+            if not self.muted:
+                self._respond(request_id, packet_type, payload)
+            offset += 4 + length
+
+    def _respond(self, request_id: int, packet_type: int, payload: str):
+        if packet_type != 2:
+            self._answer(CommandResponse(request_id, b""))
+            return
+        response = self._responder(payload).encode(self._payload_encoding)
+        for i in range(0, max(len(response), 1), self._fragment_size):
+            self._answer(CommandResponse(request_id, response[i:i + self._fragment_size]))
+
+    def _answer(self, packet: RconResponsePacket):
+        if self.latency:
+            asyncio.get_running_loop().call_later(self.latency, self._packets.put_nowait, packet)
+        else:
+            self._packets.put_nowait(packet)
+
+
+class FakeQueryServer(asyncio.DatagramProtocol):
+    """
+    Local UDP server answering status queries like a game server.
+
+    Answers Minecraft Query or Source A2S_INFO requests (based on server_type) with
+    given info. Source server asks for a challenge first when challenge is set.
+    """
+    def __init__(
+            self,
+            info: ServerInfo,
+            server_type: Server.Type = Server.Type.MINECRAFT_SERVER,
+            challenge: Optional[bytes] = None,
+    ):
+        self.info = info
+        self.requests: list[bytes] = []
+        self.muted = False
+        self._server_type = server_type
+        self._challenge = challenge
+        self._token = 9513307
+        self._transport: Optional[asyncio.DatagramTransport] = None
+
+    async def start(self) -> int:
+        """Starts listening on localhost, returns the port."""
+        self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: self,
+            local_addr=("127.0.0.1", 0),
+        )
+        return self._transport.get_extra_info("sockname")[1]
+
+    def close(self):
+        """Stops listening."""
+        self._transport.close()
+
+    def datagram_received(self, data: bytes, addr: tuple):
+        self.requests.append(data)
+        if self.muted:
+            return
+        if self._server_type == Server.Type.MINECRAFT_SERVER:
+            response = self._minecraft_response(data)
+        else:
+            response = self._source_response(data)
+        self._transport.sendto(response, addr)
+
+    def _minecraft_response(self, data: bytes) -> bytes:
+        packet_type, session = struct.unpack_from(">Bi", data, 2)
+        header = struct.pack(">Bi", packet_type, session)
+        if packet_type == 9:
+            return header + str(self._token).encode() + b"\x00"
+
+        values = {
+            "hostname": self.info.name,
+            "gametype": "SMP",
+            "game_id": "MINECRAFT",
+            "version": self.info.version,
+            "plugins": "",
+            "map": self.info.map,
+            "numplayers": str(self.info.players),
+            "maxplayers": str(self.info.max_players),
+        }
+        kv_section = b"".join(f"{k}\x00{v}\x00".encode() for k, v in values.items())
+        return (
+            header + b"splitnum\x00\x80\x00" + kv_section
+            + b"\x00\x01player_\x00\x00" + b"steve\x00\x00"
+        )
+
+    def _source_response(self, data: bytes) -> bytes:
+        request_challenge = data[25:29]
+        if self._challenge and request_challenge != self._challenge:
+            return b"\xFF\xFF\xFF\xFF\x41" + self._challenge
+        strings = [self.info.name, self.info.map, "cstrike", "Counter-Strike"]
+        return (
+            b"\xFF\xFF\xFF\xFF\x49\x11"
+            + b"".join(string.encode() + b"\x00" for string in strings)
+            + struct.pack("<hBBBccBB", 10, self.info.players, self.info.max_players, 0,
+                          b"d", b"l", 0, 1)
+            + self.info.version.encode() + b"\x00"
+        )